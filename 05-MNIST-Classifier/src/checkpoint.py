@@ -0,0 +1,174 @@
+import glob
+import os
+import queue
+import random
+import threading
+import torch
+from src.model import MNISTModel
+
+
+def snapshot(obj):
+    """Detached CPU copy of every tensor in a (nested) state dict, so training can keep mutating the originals."""
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().to('cpu', copy=True)
+    if isinstance(obj, dict):
+        return {key: snapshot(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(snapshot(value) for value in obj)
+    return obj
+
+
+def rng_state():
+    return {'torch': torch.get_rng_state(), 'python': random.getstate()}
+
+
+def set_rng_state(state):
+    torch.set_rng_state(state['torch'])
+    random.setstate(state['python'])
+
+
+def training_state(model, optimizer, epoch, batch, samples, epoch_rng_state):
+    """Everything needed to resume training right after batch `batch` of `epoch` (a snapshot, see `snapshot`).
+
+    `epoch_rng_state` is the RNG state at the start of `epoch`, so the resumed
+    run can redraw the same shuffle before skipping the batches already done.
+    """
+    model = getattr(model, 'module', model)  # unwrap DistributedDataParallel
+    return snapshot({
+        'model': model.state_dict(),
+        'optimizer': optimizer.state_dict(),
+        'epoch': epoch,
+        'batch': batch,
+        'samples': samples,
+        'epoch_rng_state': epoch_rng_state,
+        'rng_state': rng_state(),
+    })
+
+
+def atomic_save(obj, path):
+    """`torch.save` to a temporary file and rename it over `path`, so a crash never leaves a torn checkpoint."""
+    tmp_path = f'{path}.tmp'
+    torch.save(obj, tmp_path)
+    os.replace(tmp_path, path)
+
+
+class AsyncCheckpointer:
+    """Write checkpoints on a background thread so the training loop isn't blocked on disk I/O.
+
+    `save()` only takes the (cheap) in-memory snapshot; serialization happens
+    on the worker. At most one save is queued behind the one being written, so
+    a slow disk applies backpressure instead of piling up snapshots. Errors
+    from the worker are re-raised by the next `save()` or by `close()`.
+    """
+
+    def __init__(self, directory, filename='latest.pt'):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, filename)
+        self.saves = 0
+        self._error = None
+        self._queue = queue.Queue(maxsize=1)
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def _run(self):
+        while True:
+            state = self._queue.get()
+            try:
+                if state is None:
+                    return
+                atomic_save(state, self.path)
+                self.saves += 1
+            except Exception as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError(f'Checkpoint save to {self.path} failed') from error
+
+    def save(self, state):
+        self._raise_error()
+        self._queue.put(state)
+
+    def wait(self):
+        """Block until every queued checkpoint is on disk."""
+        self._queue.join()
+        self._raise_error()
+
+    def close(self):
+        self._queue.put(None)
+        self._worker.join()
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def resolve_checkpoint(path):
+    """Accept a checkpoint file or the directory an `AsyncCheckpointer` writes to."""
+    return os.path.join(path, 'latest.pt') if os.path.isdir(path) else path
+
+
+def load_training_state(path):
+    return torch.load(resolve_checkpoint(path), weights_only=False)
+
+
+def latest_model_path(pattern='model_*.pth'):
+    """The most recent `model_{timestamp}.pth` written by train()."""
+    paths = glob.glob(pattern)
+    if not paths:
+        raise FileNotFoundError(f'No checkpoint matches {pattern!r}')
+    return max(paths)
+
+
+class ModelRegistry:
+    """In-process cache of eval-mode `MNISTModel`s, keyed by checkpoint file.
+
+    State dicts are read with `torch.load(mmap=True)` and assigned to the
+    model without an extra copy. A cached model is reused until its file
+    changes on disk (path, size and mtime), so evaluation, robustness tests and
+    serving share one instance per checkpoint. Treat returned models as
+    read-only; copy one before training it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models = {}
+        self.loads = 0
+
+    def _key(self, path):
+        stat = os.stat(path)
+        return os.path.realpath(path), stat.st_size, stat.st_mtime_ns
+
+    def get(self, path=None):
+        """The model stored at `path` (a state dict or a training checkpoint); default: the latest model_*.pth."""
+        path = resolve_checkpoint(path) if path is not None else latest_model_path()
+        key = self._key(path)
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                state = torch.load(path, mmap=True, weights_only=True)
+                model = MNISTModel()
+                model.load_state_dict(state.get('model', state), assign=True)
+                model.eval()
+                self._models = {k: m for k, m in self._models.items() if k[0] != key[0]}
+                self._models[key] = model
+                self.loads += 1
+            return model
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+
+registry = ModelRegistry()
+
+
+def load_model(path=None):
+    """Shared, eval-mode `MNISTModel` for `path` from the process-wide `registry`."""
+    return registry.get(path)
@@ -0,0 +1,156 @@
+import os
+import torch
+from torchvision import datasets, transforms
+
+MNIST_MEAN = 0.1307
+MNIST_STD = 0.3081
+
+
+def mnist_transform():
+    """The per-sample torchvision pipeline used by the original data loaders."""
+    return transforms.Compose([
+        transforms.ToTensor(),
+        transforms.Normalize((MNIST_MEAN,), (MNIST_STD,))
+    ])
+
+
+def normalize(images):
+    """Scale uint8 images to [0, 1] and normalize them, like ToTensor + Normalize."""
+    return images.float().div(255).sub_(MNIST_MEAN).div_(MNIST_STD)
+
+
+class MNISTTensorDataset:
+    """MNIST held as whole tensors, served a batch at a time by tensor indexing.
+
+    The IDX files are decoded once (by torchvision) into a uint8 tensor, which
+    is either normalized up front (`dtype=torch.float32`) or kept as uint8 and
+    normalized per batch to use a quarter of the memory. With `cache_dir` the
+    tensors are saved once and later loaded with `torch.load(mmap=True)`, so
+    runs share the page cache instead of re-reading the IDX files.
+    """
+
+    def __init__(self, root='./data', train=True, download=True, dtype=torch.float32, cache_dir=None, mmap=True):
+        split = 'train' if train else 'test'
+        cache_path = os.path.join(cache_dir, f'mnist_{split}_{str(dtype).split(".")[-1]}.pt') if cache_dir else None
+
+        if cache_path and os.path.exists(cache_path):
+            cached = torch.load(cache_path, mmap=mmap)
+            self.images, self.labels = cached['images'], cached['labels']
+        else:
+            mnist = datasets.MNIST(root, train=train, download=download)
+            images = mnist.data.unsqueeze(1)
+            self.images = normalize(images) if dtype != torch.uint8 else images.contiguous()
+            self.labels = mnist.targets.long()
+            if cache_path:
+                os.makedirs(cache_dir, exist_ok=True)
+                torch.save({'images': self.images, 'labels': self.labels}, cache_path)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, idx):
+        return self._prepare(self.images[idx]), self.labels[idx]
+
+    def _prepare(self, images):
+        return normalize(images) if images.dtype == torch.uint8 else images
+
+    def batches(self, batch_size=64, shuffle=False, **kwargs):
+        """Return a `TensorBatchLoader` over this dataset."""
+        return TensorBatchLoader(self, batch_size, shuffle=shuffle, **kwargs)
+
+
+class TensorBatchLoader:
+    """DataLoader-like iterator yielding `(images, labels)` batches from a `MNISTTensorDataset`.
+
+    Shuffling draws one index permutation per epoch; unshuffled batches are
+    plain slices (views, no copy). With `num_replicas > 1` each rank gets an
+    equal-sized, disjoint shard of the permutation (seeded by `seed` and the
+    epoch set with `set_epoch`), like `DistributedSampler`.
+    """
+
+    def __init__(self, dataset, batch_size=64, shuffle=False, drop_last=False, generator=None,
+                 num_replicas=1, rank=0, seed=0):
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.generator = generator
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    @property
+    def num_samples(self):
+        return len(self.dataset) // self.num_replicas
+
+    def __len__(self):
+        if self.drop_last:
+            return self.num_samples // self.batch_size
+        return -(-self.num_samples // self.batch_size)
+
+    def _order(self):
+        n = len(self.dataset)
+        if self.shuffle:
+            generator = self.generator
+            if generator is None and self.num_replicas > 1:
+                generator = torch.Generator().manual_seed(self.seed + self.epoch)
+            order = torch.randperm(n, generator=generator)
+        elif self.num_replicas > 1:
+            order = torch.arange(n)
+        else:
+            return None
+        if self.num_replicas > 1:
+            order = order[:self.num_samples * self.num_replicas][self.rank::self.num_replicas]
+        return order
+
+    def __iter__(self):
+        images, labels = self.dataset.images, self.dataset.labels
+        order = self._order()
+
+        for batch_idx in range(len(self)):
+            start = batch_idx * self.batch_size
+            end = min(start + self.batch_size, self.num_samples)
+            if order is None:
+                yield self.dataset._prepare(images[start:end]), labels[start:end]
+            else:
+                index = order[start:end]
+                yield self.dataset._prepare(images[index]), labels[index]
+
+
+def get_data_loader(train=True, batch_size=64, shuffle=False, data_mode='tensor', root='./data',
+                    dataset=None, num_replicas=1, rank=0, seed=0,
+                    num_workers=0, pin_memory=False, prefetch_factor=None, **dataset_kwargs):
+    """Build an MNIST loader for `data_mode` 'tensor' (cached tensors) or 'torchvision' (per-sample transforms).
+
+    `num_replicas`/`rank` shard the data for distributed training. The worker
+    and prefetch settings only apply to the 'torchvision' DataLoader; tensor
+    batches are already built by a single indexing op. Pass a prebuilt
+    `dataset` to reuse tensors that are already loaded (e.g. shared memory).
+    """
+    if data_mode == 'tensor':
+        if dataset is None:
+            dataset = MNISTTensorDataset(root, train=train, **dataset_kwargs)
+        return dataset.batches(batch_size, shuffle=shuffle, num_replicas=num_replicas, rank=rank, seed=seed)
+    if data_mode == 'torchvision':
+        if dataset is None:
+            dataset = datasets.MNIST(root, train=train, download=True, transform=mnist_transform())
+        sampler = None
+        if num_replicas > 1:
+            sampler = torch.utils.data.distributed.DistributedSampler(
+                dataset, num_replicas=num_replicas, rank=rank, shuffle=shuffle, seed=seed, drop_last=True
+            )
+        return torch.utils.data.DataLoader(
+            dataset,
+            batch_size=batch_size,
+            shuffle=shuffle and sampler is None,
+            sampler=sampler,
+            num_workers=num_workers,
+            pin_memory=pin_memory,
+            prefetch_factor=prefetch_factor if num_workers > 0 else None,
+            persistent_workers=num_workers > 0,
+        )
+    raise ValueError(f"Unknown data_mode {data_mode!r}, expected 'tensor' or 'torchvision'")
@@ -0,0 +1,192 @@
+import argparse
+import copy
+import time
+import torch
+import torch.nn as nn
+from torch.ao import quantization
+from src.checkpoint import load_model
+from src.data import MNISTTensorDataset
+
+# Conv2d + ReLU pairs in MNISTModel.features that can be fused into one op
+FUSE_PATTERNS = [['0', '1'], ['3', '4']]
+
+VARIANTS = ['eager', 'torchscript', 'compile', 'dynamic_int8', 'static_int8']
+
+# Quantized engines to use for static int8, most preferred first
+QUANTIZED_ENGINES = ['x86', 'fbgemm', 'onednn', 'qnnpack']
+
+
+class QuantizableMNIST(nn.Module):
+    """MNISTModel with quant/dequant stubs around it, for eager-mode static quantization."""
+
+    def __init__(self, model):
+        super(QuantizableMNIST, self).__init__()
+        self.quant = quantization.QuantStub()
+        self.features = model.features
+        self.classifier = model.classifier
+        self.dequant = quantization.DeQuantStub()
+
+    def forward(self, x):
+        x = self.quant(x)
+        x = self.features(x)
+        x = self.classifier(x)
+        return self.dequant(x)
+
+
+def fuse_model(model):
+    """Return an eval-mode copy of `model` with its Conv2d+ReLU pairs fused."""
+    model = copy.deepcopy(model).eval()
+    model.features = quantization.fuse_modules(model.features, FUSE_PATTERNS)
+    return model
+
+
+def to_torchscript(model, example):
+    """Trace, freeze and optimize the fused model for inference."""
+    traced = torch.jit.trace(fuse_model(model), example)
+    return torch.jit.optimize_for_inference(torch.jit.freeze(traced))
+
+
+def to_compiled(model):
+    """Wrap the fused model with `torch.compile` (compiled lazily on the first call)."""
+    return torch.compile(fuse_model(model))
+
+
+def quantize_dynamic(model):
+    """Dynamic int8 quantization; only the Linear classifier has a dynamic kernel."""
+    return quantization.quantize_dynamic(fuse_model(model), {nn.Linear}, dtype=torch.qint8)
+
+
+def select_quantized_engine(backend=None):
+    """`backend` if this build of torch supports it, else the first supported of `QUANTIZED_ENGINES`."""
+    supported = torch.backends.quantized.supported_engines
+    if backend is not None:
+        if backend not in supported:
+            raise ValueError(f"Quantized engine {backend!r} is not supported here, expected one of {supported}")
+        return backend
+    for engine in QUANTIZED_ENGINES:
+        if engine in supported:
+            return engine
+    raise RuntimeError(f"No quantized engine available, torch supports {supported}")
+
+
+def quantize_static(model, calibration_batches, backend=None):
+    """Static int8 quantization of the whole network, calibrated on `calibration_batches`.
+
+    The global quantized engine is switched to `backend` (see
+    `select_quantized_engine`) only while the model is prepared and converted.
+    """
+    backend = select_quantized_engine(backend)
+    previous = torch.backends.quantized.engine
+    torch.backends.quantized.engine = backend
+    try:
+        quantizable = QuantizableMNIST(fuse_model(model)).eval()
+        quantizable.qconfig = quantization.get_default_qconfig(backend)
+        prepared = quantization.prepare(quantizable)
+        with torch.inference_mode():
+            for images in calibration_batches:
+                prepared(images)
+        return quantization.convert(prepared)
+    finally:
+        torch.backends.quantized.engine = previous
+
+
+def build_variant(name, model, example, calibration_batches=None):
+    """Build one inference variant of `model` by name (see `VARIANTS`)."""
+    if name == 'eager':
+        return copy.deepcopy(model).eval()
+    if name == 'torchscript':
+        return to_torchscript(model, example)
+    if name == 'compile':
+        return to_compiled(model)
+    if name == 'dynamic_int8':
+        return quantize_dynamic(model)
+    if name == 'static_int8':
+        if calibration_batches is None:
+            raise ValueError("static_int8 needs calibration_batches")
+        return quantize_static(model, calibration_batches)
+    raise ValueError(f"Unknown variant {name!r}, expected one of {VARIANTS}")
+
+
+def measure(variant, images, labels, batch_size=256, warmup=2, repeat=5):
+    """Return accuracy and per-batch/per-image latency of `variant` on `images`."""
+    batches = list(zip(images.split(batch_size), labels.split(batch_size)))
+    with torch.inference_mode():
+        for data, _ in batches[:warmup]:
+            variant(data)
+
+        correct = 0
+        for data, target in batches:
+            correct += (variant(data).argmax(1) == target).sum().item()
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for data, _ in batches:
+                variant(data)
+            timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    return {
+        'accuracy': correct / len(labels),
+        'batch_latency_ms': 1000 * best / len(batches),
+        'image_latency_us': 1e6 * best / len(labels),
+    }
+
+
+def benchmark_variants(model, images, labels, variants=VARIANTS, batch_size=256, calibration_images=None,
+                       calibration_batches=8, **kwargs):
+    """Build and measure each variant; variants that fail to build are reported with an error.
+
+    static_int8 is calibrated on the first `calibration_batches` batches of
+    `calibration_images`, which should not overlap the evaluation `images`
+    (e.g. a slice of the training set); without them it is reported as an error.
+    """
+    calibration = None
+    if calibration_images is not None:
+        calibration = list(calibration_images[:calibration_batches * batch_size].split(batch_size))
+    example = images[:batch_size]
+    results = {}
+    for name in variants:
+        try:
+            variant = build_variant(name, model, example, calibration)
+            results[name] = measure(variant, images, labels, batch_size=batch_size, **kwargs)
+        except Exception as e:  # e.g. torch.compile without a working compiler toolchain
+            results[name] = {'error': f'{type(e).__name__}: {e}'}
+    return results
+
+
+def select_backend(results, accuracy_floor=0.95):
+    """Name of the fastest variant whose accuracy is above `accuracy_floor`, or None."""
+    eligible = [(r['image_latency_us'], name) for name, r in results.items()
+                if 'error' not in r and r['accuracy'] > accuracy_floor]
+    return min(eligible)[1] if eligible else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare compiled and quantized MNISTModel inference variants.')
+    parser.add_argument('checkpoint', help='A model_*.pth state dict saved by train()')
+    parser.add_argument('--variants', nargs='+', default=VARIANTS, choices=VARIANTS)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--accuracy-floor', type=float, default=0.95)
+    args = parser.parse_args()
+
+    model = load_model(args.checkpoint)
+    test_set = MNISTTensorDataset(train=False)
+    # Calibrate static quantization on training images, never on the ones it is evaluated on
+    train_set = MNISTTensorDataset(train=True)
+    results = benchmark_variants(model, test_set.images, test_set.labels, args.variants, args.batch_size,
+                                 calibration_images=train_set.images)
+
+    print(f"{'variant':<14} {'accuracy':>9} {'ms/batch':>10} {'us/image':>10}")
+    for name, result in results.items():
+        if 'error' in result:
+            print(f"{name:<14} failed: {result['error']}")
+        else:
+            print(f"{name:<14} {result['accuracy']:>9.4f} {result['batch_latency_ms']:>10.3f} "
+                  f"{result['image_latency_us']:>10.2f}")
+    print(f"\nFastest variant with accuracy > {args.accuracy_floor}: "
+          f"{select_backend(results, args.accuracy_floor)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import json
+import time
+import torch
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from src.model import MNISTModel
+from src.checkpoint import load_model
+from src.serve import LatencyStats, MicroBatchPredictor
+
+
+def http_predict(url):
+    """Return a predict(image) function that POSTs to a running src.serve server."""
+    def predict(image):
+        body = json.dumps({'image': image.flatten().tolist()}).encode('utf-8')
+        request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read())
+    return predict
+
+
+def run_load(predict, images, num_requests=2000, concurrency=32):
+    """Send `num_requests` single-image requests from `concurrency` client threads.
+
+    Returns client-side p50/p99 latency (ms) and throughput (requests/s).
+    """
+    stats = LatencyStats()
+
+    def client(worker):
+        for i in range(worker, num_requests, concurrency):
+            start = time.perf_counter()
+            predict(images[i % len(images)])
+            stats.record_batch([time.perf_counter() - start])
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client, range(concurrency)))
+    summary = stats.summary()
+    summary.pop('mean_batch_size', None)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline load generator for the micro-batching MNIST predictor.')
+    parser.add_argument('--checkpoint', default=None, help='State dict to load (default: randomly initialized model)')
+    parser.add_argument('--url', default=None, help='Target a running server, e.g. http://127.0.0.1:8000/predict')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--max-batch-sizes', type=int, nargs='+', default=[1, 8, 32, 64])
+    parser.add_argument('--max-wait-ms', type=float, default=5.0)
+    args = parser.parse_args()
+
+    # Random normalized images: the load pattern, not the predictions, is what is measured
+    images = torch.randn(256, 1, 28, 28)
+
+    if args.url:
+        print(json.dumps(run_load(http_predict(args.url), images, args.requests, args.concurrency), indent=2))
+        return
+
+    model = load_model(args.checkpoint) if args.checkpoint else MNISTModel().eval()
+    print(f"{'max_batch':>9} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>9} {'mean batch':>10}")
+    for max_batch_size in args.max_batch_sizes:
+        with MicroBatchPredictor(model, max_batch_size, args.max_wait_ms) as predictor:
+            client = run_load(predictor.predict, images, args.requests, args.concurrency)
+            server = predictor.stats.summary()
+        print(f"{max_batch_size:>9} {client['p50_ms']:>8.2f} {client['p99_ms']:>8.2f} "
+              f"{client['throughput_rps']:>9.0f} {server['mean_batch_size']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
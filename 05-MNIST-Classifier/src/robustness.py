@@ -0,0 +1,140 @@
+import argparse
+import math
+import torch
+import torch.nn.functional as F
+
+# Default severity grids; the first entry of each is the unperturbed baseline
+ROTATION_ANGLES = [0, -15, 15, -30, 30]
+NOISE_STDS = [0.0, 0.1, 0.3, 0.5]
+BLUR_SIGMAS = [0.0, 1.0, 2.0]
+
+
+def rotate(images, angle, fill=0.0, mode='nearest'):
+    """Rotate a batch of images counter-clockwise by `angle` degrees with one `grid_sample`.
+
+    `fill` is the value of uncovered corners (0, like `TF.rotate` on tensors).
+    """
+    if angle == 0:
+        return images
+    radians = math.radians(angle)
+    cos, sin = math.cos(radians), math.sin(radians)
+    theta = torch.tensor([[cos, -sin, 0.0], [sin, cos, 0.0]], dtype=images.dtype)
+    grid = F.affine_grid(theta.expand(images.size(0), 2, 3), images.shape, align_corners=False)
+    rotated = F.grid_sample(images - fill, grid, mode=mode, padding_mode='zeros', align_corners=False)
+    return rotated + fill
+
+
+def add_gaussian_noise(images, std, generator=None, clamp=3.0):
+    """Add N(0, std) noise to the whole batch and clamp to a reasonable normalized range."""
+    if std == 0:
+        return images
+    noise = torch.randn(images.shape, generator=generator, dtype=images.dtype) * std
+    return torch.clamp(images + noise, -clamp, clamp)
+
+
+def gaussian_kernel(sigma, kernel_size=5, dtype=torch.float32):
+    x = torch.arange(kernel_size, dtype=dtype) - (kernel_size - 1) / 2
+    kernel = torch.exp(-0.5 * (x / sigma) ** 2)
+    return kernel / kernel.sum()
+
+
+def gaussian_blur(images, sigma, kernel_size=5):
+    """Separable Gaussian blur of a (N, 1, H, W) batch with two conv2d calls (reflect padding, like `GaussianBlur`)."""
+    if sigma == 0:
+        return images
+    kernel = gaussian_kernel(sigma, kernel_size, images.dtype)
+    pad = kernel_size // 2
+    blurred = F.pad(images, (pad, pad, pad, pad), mode='reflect')
+    blurred = F.conv2d(blurred, kernel.view(1, 1, 1, -1))
+    return F.conv2d(blurred, kernel.view(1, 1, -1, 1))
+
+
+PERTURBATIONS = {
+    'rotation': lambda images, severity, generator: rotate(images, severity),
+    'gaussian_noise': lambda images, severity, generator: add_gaussian_noise(images, severity, generator),
+    'blur': lambda images, severity, generator: gaussian_blur(images, severity),
+}
+
+
+def predict(model, images, batch_size=2000):
+    """Predicted labels for a whole tensor of images, in large batches."""
+    model.eval()
+    with torch.inference_mode():
+        return torch.cat([model(batch).argmax(1) for batch in images.split(batch_size)])
+
+
+def evaluate_robustness(model, images, labels, grids=None, batch_size=2000, seed=42):
+    """Accuracy of `model` for every (perturbation, severity) in `grids`.
+
+    Each severity is applied to the whole image tensor as one batched op and
+    predicted in large batches. Returns a list of dicts with `perturbation`,
+    `severity` and `accuracy` keys.
+    """
+    if grids is None:
+        grids = {'rotation': ROTATION_ANGLES, 'gaussian_noise': NOISE_STDS, 'blur': BLUR_SIGMAS}
+    generator = torch.Generator().manual_seed(seed)
+
+    rows = []
+    for name, severities in grids.items():
+        perturb = PERTURBATIONS[name]
+        for severity in severities:
+            predicted = predict(model, perturb(images, severity, generator), batch_size)
+            rows.append({
+                'perturbation': name,
+                'severity': severity,
+                'accuracy': (predicted == labels).float().mean().item(),
+            })
+    return rows
+
+
+def format_table(rows):
+    """Render evaluation rows as an accuracy-vs-severity text table."""
+    lines = [f"{'perturbation':<16} {'severity':>9} {'accuracy':>9}", '-' * 36]
+    for row in rows:
+        lines.append(f"{row['perturbation']:<16} {row['severity']:>9} {row['accuracy']:>9.4f}")
+    return '\n'.join(lines)
+
+
+def save_examples(model, images, labels, perturbation, severities, path, generator=None):
+    """Save a grid figure of a few samples under each severity (imports matplotlib lazily).
+
+    `perturbation` is one name for every column, or a list with one name per
+    severity to put several perturbations side by side.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    names = [perturbation] * len(severities) if isinstance(perturbation, str) else list(perturbation)
+    columns = [PERTURBATIONS[name](images, severity, generator) for name, severity in zip(names, severities)]
+    predictions = [predict(model, column) for column in columns]
+
+    plt.figure(figsize=(5 * len(severities), 5 * len(images)))
+    for row in range(len(images)):
+        for col, severity in enumerate(severities):
+            plt.subplot(len(images), len(severities), row * len(severities) + col + 1)
+            plt.imshow(columns[col][row].squeeze(), cmap='gray')
+            plt.title(f'Sample {row + 1}\n{names[col]}: {severity}\n'
+                      f'True: {labels[row].item()}, Pred: {predictions[col][row].item()}')
+            plt.axis('off')
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Accuracy vs. severity of rotation, noise and blur on the MNIST test set.')
+    parser.add_argument('checkpoint', help='A model_*.pth state dict saved by train()')
+    parser.add_argument('--batch-size', type=int, default=2000)
+    args = parser.parse_args()
+
+    from src.checkpoint import load_model
+    from src.data import MNISTTensorDataset
+
+    model = load_model(args.checkpoint)
+    test_set = MNISTTensorDataset(train=False)
+    print(format_table(evaluate_robustness(model, test_set.images, test_set.labels, batch_size=args.batch_size)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import argparse
+import json
+import queue
+import threading
+import time
+import torch
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.checkpoint import load_model
+
+
+class LatencyStats:
+    """Thread-safe record of request latencies and completed requests."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = []
+        self._batch_sizes = []
+        self._started = time.perf_counter()
+
+    def record_batch(self, latencies):
+        with self._lock:
+            self._latencies.extend(latencies)
+            self._batch_sizes.append(len(latencies))
+
+    def reset(self):
+        with self._lock:
+            self._latencies = []
+            self._batch_sizes = []
+            self._started = time.perf_counter()
+
+    def summary(self):
+        """p50/p99 latency (ms), throughput (requests/s) and mean batch size since the last reset."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            batch_sizes = list(self._batch_sizes)
+            elapsed = time.perf_counter() - self._started
+        if not latencies:
+            return {'requests': 0}
+
+        def percentile(p):
+            return 1000 * latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))]
+
+        return {
+            'requests': len(latencies),
+            'p50_ms': percentile(50),
+            'p99_ms': percentile(99),
+            'throughput_rps': len(latencies) / elapsed,
+            'mean_batch_size': sum(batch_sizes) / len(batch_sizes),
+        }
+
+
+class MicroBatchPredictor:
+    """Collect concurrent single-image requests into micro-batches for one forward pass.
+
+    A batch is run as soon as `max_batch_size` requests are waiting, or
+    `max_wait_ms` after the first request of the batch arrived, whichever
+    comes first.
+    """
+
+    def __init__(self, model, max_batch_size=32, max_wait_ms=5.0):
+        self.model = model.eval()
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.stats = LatencyStats()
+        self._requests = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, image):
+        """Queue a (1, 28, 28) or (28, 28) normalized image; returns a Future of the prediction."""
+        future = Future()
+        # Under the lock, so nothing can be queued behind the stop sentinel put by close()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('Predictor is closed')
+            self._requests.put((image.reshape(1, 28, 28), future, time.perf_counter()))
+        return future
+
+    def predict(self, image, timeout=None):
+        return self.submit(image).result(timeout)
+
+    def _collect(self):
+        first = self._requests.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self._requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                self._requests.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self):
+        try:
+            self._serve_batches()
+        finally:
+            self._fail_pending()
+
+    def _fail_pending(self):
+        """Fail whatever is still queued once the worker has stopped, so no caller waits forever."""
+        while True:
+            try:
+                request = self._requests.get_nowait()
+            except queue.Empty:
+                return
+            if request is not None:
+                request[1].set_exception(RuntimeError('Predictor is closed'))
+
+    def _serve_batches(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            try:
+                images = torch.stack([image for image, _, _ in batch])
+                with torch.inference_mode():
+                    probabilities = torch.softmax(self.model(images), dim=1)
+                labels = probabilities.argmax(1).tolist()
+                probabilities = probabilities.tolist()
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            done = time.perf_counter()
+            self.stats.record_batch([done - submitted for _, _, submitted in batch])
+            for (_, future, _), label, probs in zip(batch, labels, probabilities):
+                future.set_result({'label': label, 'probabilities': probs})
+
+    def close(self):
+        """Finish the queued requests and stop the batching thread."""
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._requests.put(None)
+        self._worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def make_handler(predictor):
+    class PredictionHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if self.path != '/predict':
+                return self._send_json(404, {'error': 'not found'})
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                image = torch.tensor(payload['image'], dtype=torch.float32)
+                if image.numel() != 28 * 28:
+                    raise ValueError(f'expected 784 pixel values, got {image.numel()}')
+            except (KeyError, ValueError, TypeError) as e:
+                return self._send_json(400, {'error': str(e)})
+            try:
+                prediction = predictor.predict(image)
+            except Exception as e:  # the model failed, or the predictor is shutting down
+                return self._send_json(500, {'error': f'{type(e).__name__}: {e}'})
+            self._send_json(200, prediction)
+
+        def do_GET(self):
+            if self.path != '/metrics':
+                return self._send_json(404, {'error': 'not found'})
+            self._send_json(200, predictor.stats.summary())
+
+        def log_message(self, format, *args):
+            pass
+
+    return PredictionHandler
+
+
+def create_server(predictor, host='127.0.0.1', port=8000):
+    """HTTP server with POST /predict ({"image": 784 normalized pixels}) and GET /metrics."""
+    return ThreadingHTTPServer((host, port), make_handler(predictor))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve MNISTModel predictions with dynamic micro-batching.')
+    parser.add_argument('--checkpoint', default=None, help='State dict to serve (default: latest model_*.pth)')
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    with MicroBatchPredictor(load_model(args.checkpoint), args.max_batch_size, args.max_wait_ms) as predictor:
+        server = create_server(predictor, args.host, args.port)
+        print(f'Serving on http://{args.host}:{args.port} (POST /predict, GET /metrics)')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
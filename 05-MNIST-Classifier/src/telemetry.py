@@ -0,0 +1,173 @@
+import contextlib
+import csv
+import json
+import os
+import time
+import torch
+
+try:
+    import psutil
+except ImportError:  # fall back to the peak RSS from getrusage
+    psutil = None
+
+PHASES = ['data', 'forward', 'backward', 'optimizer']
+
+
+def current_rss():
+    """Resident set size of this process in bytes (peak RSS if psutil isn't installed, 0 if neither works)."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        import resource  # Unix only
+    except ImportError:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Monitor:
+    """No-op instrumentation hooks called by `train_epochs` and `evaluate_model`.
+
+    The loop calls `start()` once, then per step `data_ready()` when the batch
+    has arrived, `phase(name)` around forward/backward/optimizer work and
+    `end_step(samples)`, and finally `stop()`. Subclass it to record anything.
+    """
+
+    _null_phase = contextlib.nullcontext()
+
+    def start(self):
+        pass
+
+    def data_ready(self):
+        pass
+
+    def phase(self, name):
+        return self._null_phase
+
+    def end_step(self, samples):
+        pass
+
+    def stop(self):
+        pass
+
+
+class Telemetry(Monitor):
+    """Per-step timings split into data/forward/backward/optimizer, throughput and RSS.
+
+    'data' is the time spent waiting for the loader between the end of one
+    step and the arrival of the next batch. RSS is sampled every
+    `memory_every` steps. With `profile_steps=(start, stop)` a
+    `torch.profiler` run records steps `start` to `stop - 1` and is written
+    as a Chrome trace to `profiler_trace`.
+    """
+
+    def __init__(self, name='train', memory_every=10, profile_steps=None, profiler_trace=None):
+        self.name = name
+        self.memory_every = memory_every
+        self.profile_steps = profile_steps
+        self.profiler_trace = profiler_trace
+        self.steps = []
+        self._profiler = None
+        self._started = None
+        self._elapsed = None
+
+    def start(self):
+        self._started = self._mark = time.perf_counter()
+        self._rss_start = current_rss()
+        if self.profile_steps:
+            start, stop = self.profile_steps
+            warmup = min(start, 1)  # one untraced warmup step when there is room for it
+            self._profiler = torch.profiler.profile(
+                activities=[torch.profiler.ProfilerActivity.CPU],
+                schedule=torch.profiler.schedule(wait=start - warmup, warmup=warmup, active=stop - start, repeat=1),
+                on_trace_ready=self._save_profile,
+                record_shapes=True,
+            )
+            self._profiler.start()
+
+    def _save_profile(self, profiler):
+        if self.profiler_trace:
+            profiler.export_chrome_trace(self.profiler_trace)
+
+    def data_ready(self):
+        now = time.perf_counter()
+        self._step = {'step': len(self.steps), 'start': now - self._started, 'data': now - self._mark}
+        for phase in PHASES[1:]:
+            self._step[phase] = 0.0
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            with torch.profiler.record_function(name):
+                yield
+        finally:
+            self._step[name] += time.perf_counter() - start
+
+    def end_step(self, samples):
+        now = time.perf_counter()
+        step = self._step
+        step['samples'] = samples
+        step['seconds'] = step['data'] + (now - self._started - step['start'])
+        step['samples_per_second'] = samples / step['seconds'] if step['seconds'] else 0.0
+        step['rss_bytes'] = current_rss() if step['step'] % self.memory_every == 0 else None
+        self.steps.append(step)
+        self._mark = now
+        if self._profiler is not None:
+            self._profiler.step()
+
+    def stop(self):
+        self._elapsed = time.perf_counter() - self._started
+        if self._profiler is not None:
+            self._profiler.stop()
+            self._profiler = None
+
+    def summary(self):
+        """Totals per phase, overall throughput and RSS growth over the run."""
+        samples = sum(step['samples'] for step in self.steps)
+        elapsed = self._elapsed or sum(step['seconds'] for step in self.steps)
+        rss = [step['rss_bytes'] for step in self.steps if step['rss_bytes'] is not None]
+        summary = {
+            'name': self.name,
+            'steps': len(self.steps),
+            'samples': samples,
+            'seconds': elapsed,
+            'samples_per_second': samples / elapsed if elapsed else 0.0,
+        }
+        for phase in PHASES:
+            total = sum(step[phase] for step in self.steps)
+            summary[f'{phase}_seconds'] = total
+            summary[f'{phase}_fraction'] = total / elapsed if elapsed else 0.0
+        if rss:
+            summary['rss_peak_bytes'] = max(rss)
+            summary['rss_growth_bytes'] = rss[-1] - self._rss_start
+        return summary
+
+    def to_json(self, path):
+        with open(path, 'w') as f:
+            json.dump({'summary': self.summary(), 'steps': self.steps}, f, indent=2)
+
+    def to_csv(self, path):
+        fields = ['step', 'start', 'samples', 'seconds', 'samples_per_second', *PHASES, 'rss_bytes']
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(self.steps)
+
+    def to_chrome_trace(self, path):
+        """Write each step's phases, laid out back to back, as Chrome trace events (chrome://tracing or Perfetto)."""
+        events = []
+        for step in self.steps:
+            ts = (step['start'] - step['data']) * 1e6
+            for phase in PHASES:
+                events.append({'name': phase, 'cat': self.name, 'ph': 'X', 'pid': os.getpid(), 'tid': 0,
+                               'ts': ts, 'dur': step[phase] * 1e6, 'args': {'step': step['step']}})
+                ts += step[phase] * 1e6
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+    def export(self, directory):
+        """Write `{name}.json`, `{name}.csv` and `{name}_trace.json` to `directory`."""
+        os.makedirs(directory, exist_ok=True)
+        self.to_json(os.path.join(directory, f'{self.name}.json'))
+        self.to_csv(os.path.join(directory, f'{self.name}.csv'))
+        self.to_chrome_trace(os.path.join(directory, f'{self.name}_trace.json'))
@@ -1,47 +1,315 @@
+import argparse
+import contextlib
+import socket
+import time
 import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
 import torch.nn as nn
 import torch.optim as optim
-from torchvision import datasets, transforms
+from torch.nn.parallel import DistributedDataParallel
+from torchvision import datasets
+from src.checkpoint import AsyncCheckpointer, load_training_state, rng_state, set_rng_state, training_state
+from src.data import MNISTTensorDataset, get_data_loader
 from src.model import MNISTModel
+from src.telemetry import PHASES, Monitor, Telemetry
 from datetime import datetime
 import os
 
-def train():
-    # Set device
-    device = torch.device('cpu')
-    
-    # Data loading
-    transform = transforms.Compose([
-        transforms.ToTensor(),
-        transforms.Normalize((0.1307,), (0.3081,))
-    ])
-    
-    train_dataset = datasets.MNIST('./data', train=True, download=True, transform=transform)
-    train_loader = torch.utils.data.DataLoader(train_dataset, batch_size=64, shuffle=True)
-    
-    # Model, loss, optimizer
-    model = MNISTModel().to(device)
-    criterion = nn.CrossEntropyLoss()
-    optimizer = optim.Adam(model.parameters(), lr=0.001)
-    
-    # Training
+def configure_threads(num_threads=None, num_interop_threads=None):
+    """Set intra-op and inter-op thread counts for this process."""
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    if num_interop_threads:
+        try:
+            torch.set_num_interop_threads(num_interop_threads)
+        except RuntimeError:
+            # Can only be set once, before any inter-op parallel work has started
+            print(f'Could not set inter-op threads to {num_interop_threads}; keeping {torch.get_num_interop_threads()}')
+
+def train_epochs(model, train_loader, optimizer, criterion, device, epochs=1, accumulation_steps=1,
+                 log_interval=100, verbose=True, checkpointer=None, checkpoint_every=100, resume_state=None,
+                 monitor=None):
+    """Run the training loop and return the number of samples processed.
+
+    Gradients are accumulated over `accumulation_steps` batches before each
+    optimizer step; under DDP the all-reduce is skipped on the batches that
+    don't step. With a `checkpointer` the training state is saved every
+    `checkpoint_every` optimizer steps and once more at the end. A
+    `resume_state` from such a checkpoint continues right after its last
+    batch: the epoch's shuffle is redrawn from the saved RNG state and the
+    batches already trained are skipped. A `monitor` (see `src.telemetry`)
+    is told when each batch arrives and timed around the forward, backward
+    and optimizer phases.
+    """
+    monitor = monitor or Monitor()
     model.train()
-    for batch_idx, (data, target) in enumerate(train_loader):
-        data, target = data.to(device), target.to(device)
+    samples = 0
+    start_epoch, skip_batches, done = 0, 0, 0
+    if resume_state is not None:
+        start_epoch, skip_batches, done = resume_state['epoch'], resume_state['batch'], resume_state['samples']
+    optimizer_steps = 0
+    monitor.start()
+    for epoch in range(start_epoch, epochs):
+        # Reshuffle per epoch (and keep shards consistent across ranks)
+        sampler = getattr(train_loader, 'sampler', train_loader)
+        if hasattr(sampler, 'set_epoch'):
+            sampler.set_epoch(epoch)
+        resuming = resume_state is not None and epoch == start_epoch
+        if resuming:
+            set_rng_state(resume_state['epoch_rng_state'])
+        epoch_rng_state = rng_state()
+
         optimizer.zero_grad()
-        output = model(data)
-        loss = criterion(output, target)
-        loss.backward()
-        optimizer.step()
-        
-        if batch_idx % 100 == 0:
-            print(f'Batch {batch_idx}/{len(train_loader)}, Loss: {loss.item():.4f}')
-    
+        for batch_idx, (data, target) in enumerate(train_loader):
+            if resuming and batch_idx < skip_batches:
+                if batch_idx + 1 == skip_batches:
+                    set_rng_state(resume_state['rng_state'])
+                continue
+            data, target = data.to(device, non_blocking=True), target.to(device, non_blocking=True)
+            monitor.data_ready()
+            step = (batch_idx + 1) % accumulation_steps == 0 or batch_idx + 1 == len(train_loader)
+            sync = model.no_sync() if isinstance(model, DistributedDataParallel) and not step else contextlib.nullcontext()
+            with sync:
+                with monitor.phase('forward'):
+                    output = model(data)
+                    loss = criterion(output, target) / accumulation_steps
+                with monitor.phase('backward'):
+                    loss.backward()
+            if step:
+                with monitor.phase('optimizer'):
+                    optimizer.step()
+                    optimizer.zero_grad()
+                optimizer_steps += 1
+            samples += target.size(0)
+            monitor.end_step(target.size(0))
+
+            if step and checkpointer is not None and optimizer_steps % checkpoint_every == 0:
+                if batch_idx + 1 == len(train_loader):
+                    position = (epoch + 1, 0, rng_state())
+                else:
+                    position = (epoch, batch_idx + 1, epoch_rng_state)
+                checkpointer.save(training_state(model, optimizer, position[0], position[1],
+                                                 done + samples, position[2]))
+
+            if verbose and batch_idx % log_interval == 0:
+                print(f'Epoch {epoch + 1}/{epochs}, Batch {batch_idx}/{len(train_loader)}, '
+                      f'Loss: {loss.item() * accumulation_steps:.4f}')
+
+    monitor.stop()
+    if checkpointer is not None:
+        checkpointer.save(training_state(model, optimizer, epochs, 0, done + samples, rng_state()))
+    return samples
+
+def _loader_kwargs(config):
+    return {
+        'batch_size': config['batch_size'],
+        'data_mode': config['data_mode'],
+        'num_workers': config['num_workers'],
+        'pin_memory': config['pin_memory'],
+        'prefetch_factor': config['prefetch_factor'],
+    }
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def _restore(model, optimizer, resume_from):
+    """Load model and optimizer state from `resume_from` (if given) and return the training state."""
+    if not resume_from:
+        return None
+    state = load_training_state(resume_from)
+    model.load_state_dict(state['model'])
+    optimizer.load_state_dict(state['optimizer'])
+    return state
+
+def _checkpointer(config, enabled=True):
+    if config['checkpoint_dir'] and enabled:
+        return AsyncCheckpointer(config['checkpoint_dir'])
+    return contextlib.nullcontext()
+
+def _telemetry(config):
+    """A `Telemetry` monitor when `telemetry_dir` is set, with the profiler trace written beside its exports."""
+    if not config['telemetry_dir']:
+        return None
+    trace = os.path.join(config['telemetry_dir'], 'profiler_trace.json') if config['profile_steps'] else None
+    os.makedirs(config['telemetry_dir'], exist_ok=True)
+    return Telemetry('train', profile_steps=config['profile_steps'], profiler_trace=trace)
+
+def _distributed_worker(rank, world_size, port, dataset, config, save_path, results):
+    os.environ['MASTER_ADDR'] = '127.0.0.1'
+    os.environ['MASTER_PORT'] = str(port)
+    dist.init_process_group('gloo', rank=rank, world_size=world_size)
+    try:
+        configure_threads(config['num_threads'], config['num_interop_threads'])
+        torch.manual_seed(config['seed'])
+
+        train_loader = get_data_loader(train=True, shuffle=True, dataset=dataset, num_replicas=world_size,
+                                       rank=rank, seed=config['seed'], **_loader_kwargs(config))
+        model = MNISTModel()
+        criterion = nn.CrossEntropyLoss()
+        optimizer = optim.Adam(model.parameters(), lr=config['lr'])
+        resume_state = _restore(model, optimizer, config['resume_from'])
+        model = DistributedDataParallel(model)
+
+        # Every rank holds the same weights, so only rank 0 writes checkpoints and telemetry
+        monitor = _telemetry(config) if rank == 0 else None
+        with _checkpointer(config, enabled=rank == 0) as checkpointer:
+            samples = train_epochs(model, train_loader, optimizer, criterion, torch.device('cpu'),
+                                   epochs=config['epochs'], accumulation_steps=config['accumulation_steps'],
+                                   verbose=rank == 0, checkpointer=checkpointer,
+                                   checkpoint_every=config['checkpoint_every'], resume_state=resume_state,
+                                   monitor=monitor)
+        if rank == 0:
+            torch.save(model.module.state_dict(), save_path)
+            if monitor:
+                monitor.export(config['telemetry_dir'])
+            results.put((samples * world_size, monitor.summary() if monitor else None))
+    finally:
+        dist.destroy_process_group()
+
+def train_with_stats(data_mode='tensor', epochs=1, batch_size=64, lr=0.001, accumulation_steps=1,
+                     num_threads=None, num_interop_threads=None, num_workers=0, pin_memory=False,
+                     prefetch_factor=None, world_size=1, seed=0, checkpoint_dir=None, checkpoint_every=100,
+                     resume_from=None, telemetry_dir=None, profile_steps=None):
+    """Train `MNISTModel` and return `(save_path, stats)`.
+
+    With `world_size > 1` training runs as DistributedDataParallel over that
+    many local CPU processes on the gloo backend, each using `num_threads`
+    intra-op threads (default: the available threads split between them).
+    In 'tensor' mode the dataset is loaded once and shared with the workers.
+
+    With `checkpoint_dir` the model, optimizer and RNG state are saved to
+    `checkpoint_dir/latest.pt` every `checkpoint_every` optimizer steps on a
+    background thread; `resume_from` (that file or its directory) continues
+    an interrupted run. `samples` counts only the samples trained by this call.
+
+    With `telemetry_dir` per-step phase timings, throughput and RSS are
+    exported there as JSON, CSV and a Chrome trace (rank 0 only under DDP),
+    and their summary is returned as `stats['telemetry']`. `profile_steps`
+    `(start, stop)` additionally captures those steps with `torch.profiler`
+    and needs a `telemetry_dir` to write the trace to.
+    """
+    if profile_steps and not telemetry_dir:
+        raise ValueError('profile_steps needs a telemetry_dir to write the profiler trace to')
+    config = {
+        'data_mode': data_mode, 'epochs': epochs, 'batch_size': batch_size, 'lr': lr,
+        'accumulation_steps': accumulation_steps, 'num_threads': num_threads,
+        'num_interop_threads': num_interop_threads, 'num_workers': num_workers, 'pin_memory': pin_memory,
+        'prefetch_factor': prefetch_factor, 'seed': seed, 'checkpoint_dir': checkpoint_dir,
+        'checkpoint_every': checkpoint_every, 'resume_from': resume_from,
+        'telemetry_dir': telemetry_dir, 'profile_steps': profile_steps,
+    }
+
     # Save model with timestamp
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     save_path = f'model_{timestamp}.pth'
-    torch.save(model.state_dict(), save_path)
+    start = time.perf_counter()
+
+    if world_size > 1:
+        config['num_threads'] = num_threads or max(1, torch.get_num_threads() // world_size)
+        # Load (or download) the data once in the parent before starting workers
+        if data_mode == 'tensor':
+            dataset = MNISTTensorDataset(train=True)
+            dataset.images.share_memory_()
+            dataset.labels.share_memory_()
+        else:
+            datasets.MNIST('./data', train=True, download=True)
+            dataset = None
+        results = mp.get_context('spawn').SimpleQueue()
+        mp.spawn(_distributed_worker, args=(world_size, _free_port(), dataset, config, save_path, results),
+                 nprocs=world_size, join=True)
+        samples, telemetry = results.get()
+    else:
+        # Set device
+        device = torch.device('cpu')
+        configure_threads(num_threads, num_interop_threads)
+        torch.manual_seed(seed)
+
+        # Data loading ('tensor' serves cached tensors, 'torchvision' the per-sample pipeline)
+        train_loader = get_data_loader(train=True, shuffle=True, seed=seed, **_loader_kwargs(config))
+
+        # Model, loss, optimizer
+        model = MNISTModel().to(device)
+        criterion = nn.CrossEntropyLoss()
+        optimizer = optim.Adam(model.parameters(), lr=lr)
+        resume_state = _restore(model, optimizer, resume_from)
+        monitor = _telemetry(config)
+
+        # Training
+        with _checkpointer(config) as checkpointer:
+            samples = train_epochs(model, train_loader, optimizer, criterion, device,
+                                   epochs=epochs, accumulation_steps=accumulation_steps, checkpointer=checkpointer,
+                                   checkpoint_every=checkpoint_every, resume_state=resume_state, monitor=monitor)
+        torch.save(model.state_dict(), save_path)
+        telemetry = None
+        if monitor:
+            monitor.export(telemetry_dir)
+            telemetry = monitor.summary()
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        'world_size': world_size,
+        'samples': samples,
+        'seconds': elapsed,
+        'samples_per_second': samples / elapsed,
+    }
+    if telemetry:
+        stats['telemetry'] = telemetry
+    print(f'Trained on {samples} samples in {elapsed:.1f}s ({stats["samples_per_second"]:.0f} samples/s, '
+          f'world_size={world_size})')
+    if telemetry:
+        print('Step time: ' + ', '.join(f'{phase} {100 * telemetry[f"{phase}_fraction"]:.0f}%' for phase in PHASES))
+    return save_path, stats
+
+def train(**kwargs):
+    """Train `MNISTModel` and return the saved checkpoint path (see `train_with_stats`)."""
+    save_path, _ = train_with_stats(**kwargs)
     return save_path
 
+def main():
+    parser = argparse.ArgumentParser(description='Train MNISTModel on CPU.')
+    parser.add_argument('--data-mode', default='tensor', choices=['tensor', 'torchvision'])
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--lr', type=float, default=0.001)
+    parser.add_argument('--accumulation-steps', type=int, default=1, help='Batches per optimizer step')
+    parser.add_argument('--threads', type=int, default=None, help='Intra-op threads per process')
+    parser.add_argument('--interop-threads', type=int, default=None, help='Inter-op threads per process')
+    parser.add_argument('--workers', type=int, default=0, help='DataLoader workers (torchvision mode)')
+    parser.add_argument('--pin-memory', action='store_true', help='Pin DataLoader batches (torchvision mode)')
+    parser.add_argument('--prefetch-factor', type=int, default=None, help='Batches prefetched per DataLoader worker')
+    parser.add_argument('--world-size', type=int, default=1, help='Local DDP processes (gloo backend)')
+    parser.add_argument('--checkpoint-dir', default=None, help='Save resumable checkpoints to this directory')
+    parser.add_argument('--checkpoint-every', type=int, default=100, help='Optimizer steps between checkpoints')
+    parser.add_argument('--resume', default=None, help='Checkpoint file or directory to resume from')
+    parser.add_argument('--telemetry-dir', default=None, help='Export per-step timings/RSS (JSON, CSV, Chrome trace)')
+    parser.add_argument('--profile-steps', type=int, nargs=2, default=None, metavar=('START', 'STOP'),
+                        help='Capture steps START..STOP-1 with torch.profiler (needs --telemetry-dir)')
+    parser.add_argument('--scaling', type=int, nargs='+', help='Train once per world size and report the speedup')
+    args = parser.parse_args()
+
+    kwargs = dict(data_mode=args.data_mode, epochs=args.epochs, batch_size=args.batch_size, lr=args.lr,
+                  accumulation_steps=args.accumulation_steps, num_threads=args.threads,
+                  num_interop_threads=args.interop_threads, num_workers=args.workers,
+                  pin_memory=args.pin_memory, prefetch_factor=args.prefetch_factor,
+                  telemetry_dir=args.telemetry_dir, profile_steps=args.profile_steps)
+
+    if args.checkpoint_dir or args.resume:
+        kwargs.update(checkpoint_dir=args.checkpoint_dir, checkpoint_every=args.checkpoint_every,
+                      resume_from=args.resume)
+
+    if not args.scaling:
+        train(world_size=args.world_size, **kwargs)
+        return
+
+    baseline = None
+    for world_size in args.scaling:
+        _, stats = train_with_stats(world_size=world_size, **kwargs)
+        baseline = baseline or stats['samples_per_second']
+        print(f'world_size={world_size}: {stats["samples_per_second"]:.0f} samples/s, '
+              f'speedup {stats["samples_per_second"] / baseline:.2f}x')
+
 if __name__ == "__main__":
-    train() 
\ No newline at end of file
+    main()
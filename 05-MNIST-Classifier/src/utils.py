@@ -1,28 +1,29 @@
 import torch
-from torchvision import datasets, transforms
+from src.data import get_data_loader
+from src.telemetry import Monitor
 
 def count_parameters(model):
     return sum(p.numel() for p in model.parameters() if p.requires_grad)
 
-def evaluate_model(model, device='cpu'):
-    transform = transforms.Compose([
-        transforms.ToTensor(),
-        transforms.Normalize((0.1307,), (0.3081,))
-    ])
-    
-    test_dataset = datasets.MNIST('./data', train=False, download=True, transform=transform)
-    test_loader = torch.utils.data.DataLoader(test_dataset, batch_size=64)
+def evaluate_model(model, device='cpu', data_mode='tensor', batch_size=64, monitor=None):
+    test_loader = get_data_loader(train=False, batch_size=batch_size, data_mode=data_mode)
+    monitor = monitor or Monitor()
     
     model.eval()
     correct = 0
     total = 0
     
+    monitor.start()
     with torch.no_grad():
         for data, target in test_loader:
             data, target = data.to(device), target.to(device)
-            output = model(data)
-            _, predicted = torch.max(output.data, 1)
+            monitor.data_ready()
+            with monitor.phase('forward'):
+                output = model(data)
+                _, predicted = torch.max(output.data, 1)
             total += target.size(0)
             correct += (predicted == target).sum().item()
+            monitor.end_step(target.size(0))
+    monitor.stop()
     
     return correct / total 
\ No newline at end of file
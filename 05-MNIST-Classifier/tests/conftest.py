@@ -0,0 +1,33 @@
+import os
+import shutil
+import struct
+import torch
+import pytest
+
+def write_idx(path, tensor):
+    magic = 0x0800 | {1: 0x01, 3: 0x03}[tensor.dim()]
+    with open(path, 'wb') as f:
+        f.write(struct.pack('>I', magic))
+        f.write(struct.pack('>' + 'I' * tensor.dim(), *tensor.shape))
+        f.write(tensor.numpy().tobytes())
+
+@pytest.fixture(scope="module")
+def fake_mnist_root(tmp_path_factory):
+    """A tiny MNIST directory in torchvision's raw layout, so the tests run offline."""
+    root = tmp_path_factory.mktemp("mnist")
+    raw = root / "MNIST" / "raw"
+    os.makedirs(raw)
+    generator = torch.Generator().manual_seed(0)
+    for prefix, n in [('train', 200), ('t10k', 70)]:
+        images = torch.randint(0, 256, (n, 28, 28), dtype=torch.uint8, generator=generator)
+        labels = torch.randint(0, 10, (n,), dtype=torch.uint8, generator=generator)
+        write_idx(raw / f'{prefix}-images-idx3-ubyte', images)
+        write_idx(raw / f'{prefix}-labels-idx1-ubyte', labels)
+    return str(root)
+
+@pytest.fixture
+def workdir(fake_mnist_root, tmp_path, monkeypatch):
+    """Run training in a scratch directory whose ./data is the fake MNIST set."""
+    shutil.copytree(fake_mnist_root, tmp_path / 'data')
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
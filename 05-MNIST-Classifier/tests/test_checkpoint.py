@@ -0,0 +1,86 @@
+import os
+import pytest
+import torch
+import torch.nn as nn
+import torch.optim as optim
+from src.checkpoint import AsyncCheckpointer, ModelRegistry, load_training_state, snapshot
+from src.data import get_data_loader
+from src.model import MNISTModel
+from src.train import train_epochs, train_with_stats
+
+class CrashingLoss(nn.CrossEntropyLoss):
+    """Raises on the `crash_at`-th call, like a run killed mid-epoch."""
+
+    def __init__(self, crash_at):
+        super(CrashingLoss, self).__init__()
+        self.calls = 0
+        self.crash_at = crash_at
+
+    def forward(self, output, target):
+        self.calls += 1
+        if self.calls == self.crash_at:
+            raise KeyboardInterrupt
+        return super(CrashingLoss, self).forward(output, target)
+
+def run(criterion, checkpointer=None, resume_from=None):
+    torch.manual_seed(0)
+    loader = get_data_loader(train=True, batch_size=32, shuffle=True)
+    model = MNISTModel()
+    optimizer = optim.Adam(model.parameters(), lr=0.001)
+    resume_state = None
+    if resume_from:
+        resume_state = load_training_state(resume_from)
+        model.load_state_dict(resume_state['model'])
+        optimizer.load_state_dict(resume_state['optimizer'])
+    train_epochs(model, loader, optimizer, criterion, 'cpu', epochs=2, accumulation_steps=2, verbose=False,
+                 checkpointer=checkpointer, checkpoint_every=2, resume_state=resume_state)
+    return model
+
+def test_resume_mid_epoch_matches_uninterrupted_run(workdir):
+    expected = run(nn.CrossEntropyLoss())
+
+    # 7 batches per epoch: crash in epoch 2, after the checkpoint at its 4th batch
+    with AsyncCheckpointer('checkpoints') as checkpointer:
+        with pytest.raises(KeyboardInterrupt):
+            run(CrashingLoss(crash_at=13), checkpointer)
+    state = load_training_state('checkpoints')
+    assert (state['epoch'], state['batch'], state['samples']) == (1, 4, 200 + 4 * 32)
+
+    resumed = run(nn.CrossEntropyLoss(), resume_from='checkpoints')
+    for a, b in zip(expected.state_dict().values(), resumed.state_dict().values()):
+        assert torch.equal(a, b)
+
+def test_train_with_stats_resumes_from_checkpoint_dir(workdir):
+    train_with_stats(epochs=1, batch_size=32, checkpoint_dir='checkpoints', checkpoint_every=3)
+    assert load_training_state('checkpoints')['epoch'] == 1
+    _, stats = train_with_stats(epochs=2, batch_size=32, resume_from='checkpoints')
+    assert stats['samples'] == 200
+
+def test_checkpointer_snapshots_state_before_returning(tmp_path):
+    tensor = torch.zeros(3)
+    with AsyncCheckpointer(str(tmp_path)) as checkpointer:
+        checkpointer.save(snapshot({'weights': tensor, 'step': 1}))
+        tensor.add_(1)  # training keeps mutating the live tensors
+        checkpointer.wait()
+        assert checkpointer.saves == 1
+    saved = torch.load(os.path.join(tmp_path, 'latest.pt'))
+    assert torch.equal(saved['weights'], torch.zeros(3)) and saved['step'] == 1
+    assert not os.path.exists(os.path.join(tmp_path, 'latest.pt.tmp'))
+
+def test_registry_loads_each_checkpoint_once(tmp_path):
+    path = str(tmp_path / 'model_1.pth')
+    model = MNISTModel()
+    torch.save(model.state_dict(), path)
+    registry = ModelRegistry()
+
+    first = registry.get(path)
+    assert registry.get(path) is first and registry.loads == 1
+    assert not first.training
+    x = torch.randn(2, 1, 28, 28)
+    with torch.no_grad():
+        assert torch.equal(first(x), model.eval()(x))
+
+    # Rewriting the file invalidates the cached instance
+    torch.save({'model': MNISTModel().state_dict()}, path)
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+    assert registry.get(path) is not first and registry.loads == 2
@@ -0,0 +1,34 @@
+import os
+import torch
+from src.data import MNISTTensorDataset, get_data_loader, mnist_transform
+from torchvision import datasets
+
+def test_tensor_dataset_matches_torchvision_transform(fake_mnist_root):
+    reference = datasets.MNIST(fake_mnist_root, train=False, download=False, transform=mnist_transform())
+    for dtype in (torch.float32, torch.uint8):
+        dataset = MNISTTensorDataset(fake_mnist_root, train=False, download=False, dtype=dtype)
+        assert len(dataset) == len(reference)
+        for idx in (0, 13, len(reference) - 1):
+            image, label = dataset[idx]
+            expected_image, expected_label = reference[idx]
+            assert torch.allclose(image, expected_image, atol=1e-6)
+            assert label.item() == expected_label
+
+def test_tensor_loader_batches(fake_mnist_root):
+    loader = get_data_loader(train=True, batch_size=64, shuffle=True, root=fake_mnist_root, download=False)
+    assert len(loader) == 4
+    batches = list(loader)
+    assert [len(labels) for _, labels in batches] == [64, 64, 64, 8]
+    assert batches[0][0].shape == (64, 1, 28, 28) and batches[0][0].dtype == torch.float32
+
+    # A shuffled epoch still visits every sample exactly once
+    dataset = loader.dataset
+    seen = torch.cat([images for images, _ in batches])
+    assert torch.allclose(seen.sum(0), dataset.images.sum(0), atol=1e-2)
+
+def test_tensor_cache_round_trip(fake_mnist_root, tmp_path):
+    first = MNISTTensorDataset(fake_mnist_root, train=True, download=False, cache_dir=str(tmp_path))
+    assert os.path.exists(tmp_path / 'mnist_train_float32.pt')
+    cached = MNISTTensorDataset('./missing', train=True, download=False, cache_dir=str(tmp_path))
+    assert torch.equal(first.images, cached.images)
+    assert torch.equal(first.labels, cached.labels)
@@ -0,0 +1,62 @@
+import torch
+import torch.nn as nn
+from src.model import MNISTModel
+from src.inference import benchmark_variants, build_variant, fuse_model, quantize_static, select_backend
+
+def make_inputs(n=128):
+    torch.manual_seed(0)
+    return torch.randn(n, 1, 28, 28), torch.randint(0, 10, (n,))
+
+def test_fused_model_matches_eager():
+    model = MNISTModel().eval()
+    images, _ = make_inputs()
+    fused = fuse_model(model)
+    assert not any(isinstance(m, nn.ReLU) for m in fused.features)
+    with torch.no_grad():
+        assert torch.allclose(fused(images), model(images), atol=1e-5)
+
+def test_variants_agree_with_eager():
+    model = MNISTModel().eval()
+    images, _ = make_inputs()
+    with torch.no_grad():
+        expected = model(images)
+        scripted = build_variant('torchscript', model, images[:8])
+        assert torch.allclose(scripted(images), expected, atol=1e-4)
+        for name in ('dynamic_int8', 'static_int8'):
+            variant = build_variant(name, model, images[:8], list(images.split(32)))
+            output = variant(images)
+            assert output.shape == (128, 10)
+            agreement = (output.argmax(1) == expected.argmax(1)).float().mean().item()
+            assert agreement > 0.8, f"{name} agrees with eager on only {agreement:.2%} of inputs"
+
+def test_quantize_static_restores_the_quantized_engine():
+    model = MNISTModel().eval()
+    images, _ = make_inputs(64)
+    previous = torch.backends.quantized.engine
+    quantized = quantize_static(model, list(images.split(32)))
+    assert torch.backends.quantized.engine == previous
+    with torch.no_grad():
+        assert quantized(images).shape == (64, 10)
+
+def test_static_int8_needs_separate_calibration_images():
+    images, labels = make_inputs(128)
+    calibration, _ = make_inputs(64)
+    results = benchmark_variants(MNISTModel(), images, labels, variants=['static_int8'], batch_size=64, repeat=1)
+    assert 'calibration_batches' in results['static_int8']['error']
+    results = benchmark_variants(MNISTModel(), images, labels, variants=['static_int8'], batch_size=64,
+                                 calibration_images=calibration, repeat=1)
+    assert 0 <= results['static_int8']['accuracy'] <= 1
+
+def test_benchmark_and_select_backend():
+    images, labels = make_inputs(256)
+    results = benchmark_variants(MNISTModel(), images, labels, variants=['eager', 'torchscript', 'dynamic_int8'],
+                                 batch_size=64, repeat=1)
+    for result in results.values():
+        assert 0 <= result['accuracy'] <= 1 and result['image_latency_us'] > 0
+
+    fake = {'eager': {'accuracy': 0.99, 'image_latency_us': 10.0},
+            'static_int8': {'accuracy': 0.97, 'image_latency_us': 4.0},
+            'dynamic_int8': {'accuracy': 0.90, 'image_latency_us': 2.0},
+            'compile': {'error': 'RuntimeError'}}
+    assert select_backend(fake, accuracy_floor=0.95) == 'static_int8'
+    assert select_backend(fake, accuracy_floor=0.995) is None
@@ -2,14 +2,14 @@ import torch
 import pytest
 from src.model import MNISTModel
 from src.utils import count_parameters, evaluate_model
+from src.checkpoint import load_model
+from src.data import MNISTTensorDataset
+from src.robustness import evaluate_robustness, format_table, save_examples
 from torchvision import datasets, transforms
 import random
 import matplotlib.pyplot as plt
 import os
-import torchvision.transforms.functional as TF
 import numpy as np
-import glob
-from torchvision.transforms import GaussianBlur 
 
 def test_model_parameters():
     model = MNISTModel()
@@ -29,13 +29,12 @@ def test_input_output_shape():
     assert output.shape == (1, 10), f"Output shape is {output.shape}, should be (1, 10)"
 
 def test_model_accuracy():
-    model = MNISTModel()
     # Train the model first
     from src.train import train
     model_path = train()
     
-    # Load the trained model
-    model.load_state_dict(torch.load(model_path))
+    # Load the trained model (cached for the tests below)
+    model = load_model(model_path)
     
     # Evaluate
     accuracy = evaluate_model(model)
@@ -45,14 +44,8 @@ def test_model_accuracy():
     assert accuracy > 0.95, f"Model accuracy is {accuracy}, should be > 0.95"
 
 def test_inference_on_samples():
-    # Load model
-    model = MNISTModel()
-    # Get the latest trained model file (using the timestamp suffix)
-    import glob
-    model_files = glob.glob('model_*.pth')
-    latest_model = max(model_files)  # Gets the most recent model file
-    model.load_state_dict(torch.load(latest_model))
-    model.eval()
+    # Load the latest trained model file (using the timestamp suffix)
+    model = load_model()
 
     # Load test dataset
     transform = transforms.Compose([
@@ -110,189 +103,55 @@ def test_inference_on_samples():
     print(f"\nSample images have been saved to: test_samples/sample_inputs.png") 
 
 def test_rotation_robustness():
-    # Load model
-    model = MNISTModel()
-    model_files = glob.glob('model_*.pth')
-    latest_model = max(model_files)
-    model.load_state_dict(torch.load(latest_model))
-    model.eval()
+    model = load_model()
 
-    # Load test dataset
-    transform = transforms.Compose([
-        transforms.ToTensor(),
-        transforms.Normalize((0.1307,), (0.3081,))
-    ])
-    test_dataset = datasets.MNIST('./data', train=False, download=True, transform=transform)
-    
-    # Select 3 random images
-    random.seed(42)  # for reproducibility
-    sample_indices = random.sample(range(len(test_dataset)), 3)
-    
-    # Create output directory for rotated samples
-    os.makedirs('test_samples/rotation_test', exist_ok=True)
-    
-    # Test rotation angles
+    # Evaluate every rotation over the full test set in one batched pass
+    test_set = MNISTTensorDataset(train=False)
     rotation_angles = [-15, 0, 15]  # degrees
-    
-    # Create a figure for each sample with its rotations
-    plt.figure(figsize=(15, 15))
-    
-    results = []
-    
-    for sample_idx, idx in enumerate(sample_indices):
-        image, true_label = test_dataset[idx]
-        
-        # Create subplot row for this sample
-        for angle_idx, angle in enumerate(rotation_angles):
-            plt.subplot(3, 3, sample_idx * 3 + angle_idx + 1)
-            
-            # Rotate image
-            rotated_image = TF.rotate(image, angle)
-            
-            # Display rotated image
-            plt.imshow(rotated_image.squeeze(), cmap='gray')
-            
-            # Make prediction
-            with torch.no_grad():
-                output = model(rotated_image.unsqueeze(0))
-                _, predicted = torch.max(output.data, 1)
-                predicted_label = predicted.item()
-            
-            results.append({
-                'sample': sample_idx + 1,
-                'angle': angle,
-                'true_label': true_label,
-                'predicted_label': predicted_label,
-                'correct': true_label == predicted_label
-            })
-            
-            plt.title(f'Sample {sample_idx + 1}\nRotation: {angle}°\nTrue: {true_label}, Pred: {predicted_label}')
-            plt.axis('off')
-    
-    # Save the figure
-    plt.tight_layout()
-    plt.savefig('test_samples/rotation_test/rotated_samples.png')
-    plt.close()
-    
-    # Print results
+    results = evaluate_robustness(model, test_set.images, test_set.labels, grids={'rotation': rotation_angles})
+
     print("\nRotation Robustness Results:")
     print("-" * 50)
-    for result in results:
-        print(f"Sample {result['sample']}, "
-              f"Rotation {result['angle']:>3}°: "
-              f"True={result['true_label']}, "
-              f"Predicted={result['predicted_label']} "
-              f"({'✓' if result['correct'] else '✗'})")
-    
-    # Calculate accuracy for each rotation
-    for angle in rotation_angles:
-        angle_results = [r for r in results if r['angle'] == angle]
-        correct = sum(1 for r in angle_results if r['correct'])
-        print(f"\nAccuracy at {angle}° rotation: {correct}/{len(angle_results)}")
-    
+    print(format_table(results))
+
+    # Save a figure of 3 random samples (off the evaluation path)
+    random.seed(42)  # for reproducibility
+    sample_indices = random.sample(range(len(test_set)), 3)
+    os.makedirs('test_samples/rotation_test', exist_ok=True)
+    save_examples(model, test_set.images[sample_indices], test_set.labels[sample_indices], 'rotation',
+                  rotation_angles, 'test_samples/rotation_test/rotated_samples.png')
+
     # Assertions for robustness
     # At least 2 out of 3 predictions should be correct for each rotation angle
-    for angle in rotation_angles:
-        angle_results = [r for r in results if r['angle'] == angle]
-        correct = sum(1 for r in angle_results if r['correct'])
-        assert correct >= 2, f"Poor performance at {angle}° rotation: only {correct}/3 correct"
-    
+    for result in results:
+        assert result['accuracy'] >= 2 / 3, f"Poor performance at {result['severity']}° rotation: accuracy {result['accuracy']:.4f}"
+
     print(f"\nRotated sample images have been saved to: test_samples/rotation_test/rotated_samples.png")
 
 def test_noise_and_blur_robustness():
-    # Load model
-    model = MNISTModel()
-    model_files = glob.glob('model_*.pth')
-    latest_model = max(model_files)
-    model.load_state_dict(torch.load(latest_model))
-    model.eval()
+    model = load_model()
+
+    # Evaluate each perturbation over the full test set in one batched pass
+    test_set = MNISTTensorDataset(train=False)
+    grids = {'gaussian_noise': [0.0, 0.1], 'blur': [2.0]}
+    results = evaluate_robustness(model, test_set.images, test_set.labels, grids=grids)
 
-    # Load test dataset
-    transform = transforms.Compose([
-        transforms.ToTensor(),
-        transforms.Normalize((0.1307,), (0.3081,))
-    ])
-    test_dataset = datasets.MNIST('./data', train=False, download=True, transform=transform)
-    
-    # Select 3 random images
-    random.seed(42)  # for reproducibility
-    sample_indices = random.sample(range(len(test_dataset)), 3)
-    
-    # Create output directory
-    os.makedirs('test_samples/perturbation_test', exist_ok=True)
-    
-    # Create a figure
-    plt.figure(figsize=(15, 15))
-    
-    results = []
-    
-    # Define perturbation types
-    perturbations = [
-        ('original', lambda x: x),
-        ('gaussian_noise', lambda x: x + torch.randn_like(x) * 0.1),
-        ('blur', lambda x: GaussianBlur(kernel_size=5, sigma=(2.0, 2.0))(x.unsqueeze(0)).squeeze(0))
-    ]
-    
-    for sample_idx, idx in enumerate(sample_indices):
-        image, true_label = test_dataset[idx]
-        
-        # Apply each perturbation type
-        for pert_idx, (pert_name, pert_func) in enumerate(perturbations):
-            plt.subplot(3, 3, sample_idx * 3 + pert_idx + 1)
-            
-            # Apply perturbation
-            perturbed_image = pert_func(image)
-            
-            # Ensure pixel values are in valid range
-            if pert_name == 'gaussian_noise':
-                perturbed_image = torch.clamp(perturbed_image, -3, 3)  # Reasonable range for normalized data
-            
-            # Display perturbed image
-            plt.imshow(perturbed_image.squeeze(), cmap='gray')
-            
-            # Make prediction
-            with torch.no_grad():
-                output = model(perturbed_image.unsqueeze(0))
-                _, predicted = torch.max(output.data, 1)
-                predicted_label = predicted.item()
-            
-            results.append({
-                'sample': sample_idx + 1,
-                'perturbation': pert_name,
-                'true_label': true_label,
-                'predicted_label': predicted_label,
-                'correct': true_label == predicted_label
-            })
-            
-            plt.title(f'Sample {sample_idx + 1}\n{pert_name}\nTrue: {true_label}, Pred: {predicted_label}')
-            plt.axis('off')
-    
-    # Save the figure
-    plt.tight_layout()
-    plt.savefig('test_samples/perturbation_test/perturbed_samples.png')
-    plt.close()
-    
-    # Print results
     print("\nNoise and Blur Robustness Results:")
     print("-" * 50)
-    for result in results:
-        print(f"Sample {result['sample']}, "
-              f"Perturbation: {result['perturbation']:<15} "
-              f"True={result['true_label']}, "
-              f"Predicted={result['predicted_label']} "
-              f"({'✓' if result['correct'] else '✗'})")
-    
-    # Calculate accuracy for each perturbation type
-    for pert_name, _ in perturbations:
-        pert_results = [r for r in results if r['perturbation'] == pert_name]
-        correct = sum(1 for r in pert_results if r['correct'])
-        print(f"\nAccuracy with {pert_name}: {correct}/{len(pert_results)}")
-    
+    print(format_table(results))
+
+    # Save a figure of 3 random samples (off the evaluation path)
+    random.seed(42)  # for reproducibility
+    sample_indices = random.sample(range(len(test_set)), 3)
+    os.makedirs('test_samples/perturbation_test', exist_ok=True)
+    # Columns: original, gaussian noise, blur
+    save_examples(model, test_set.images[sample_indices], test_set.labels[sample_indices],
+                  ['gaussian_noise', 'gaussian_noise', 'blur'], [0.0, 0.1, 2.0],
+                  'test_samples/perturbation_test/perturbed_samples.png')
+
     # Assertions for robustness
     # At least 2 out of 3 predictions should be correct for each perturbation type
-    for pert_name, _ in perturbations:
-        pert_results = [r for r in results if r['perturbation'] == pert_name]
-        correct = sum(1 for r in pert_results if r['correct'])
-        assert correct >= 2, f"Poor performance with {pert_name}: only {correct}/3 correct"
-    
-    print(f"\nPerturbed sample images have been saved to: test_samples/perturbation_test/perturbed_samples.png")
\ No newline at end of file
+    for result in results:
+        assert result['accuracy'] >= 2 / 3, f"Poor performance with {result['perturbation']}: accuracy {result['accuracy']:.4f}"
+
+    print(f"\nPerturbed sample images have been saved to: test_samples/perturbation_test/perturbed_samples.png")
@@ -0,0 +1,37 @@
+import torch
+import torchvision.transforms.functional as TF
+from torchvision.transforms import GaussianBlur
+from src.model import MNISTModel
+from src.robustness import add_gaussian_noise, evaluate_robustness, format_table, gaussian_blur, rotate, save_examples
+
+def test_batched_rotation_matches_tf_rotate():
+    images = torch.randn(8, 1, 28, 28)
+    for angle in (-15, 15, 30):
+        expected = torch.stack([TF.rotate(image, angle) for image in images])
+        assert torch.allclose(rotate(images, angle), expected, atol=1e-6)
+
+def test_batched_blur_matches_gaussian_blur():
+    images = torch.randn(8, 1, 28, 28)
+    expected = torch.stack([GaussianBlur(kernel_size=5, sigma=(2.0, 2.0))(image.unsqueeze(0)).squeeze(0) for image in images])
+    assert torch.allclose(gaussian_blur(images, 2.0), expected, atol=1e-5)
+
+def test_noise_is_clamped():
+    noisy = add_gaussian_noise(torch.zeros(4, 1, 28, 28), 5.0)
+    assert noisy.abs().max() <= 3.0 and noisy.std() > 1.0
+
+def test_evaluate_robustness_table(tmp_path):
+    torch.manual_seed(0)
+    model = MNISTModel()
+    images, labels = torch.randn(300, 1, 28, 28), torch.randint(0, 10, (300,))
+    grids = {'rotation': [0, 15], 'gaussian_noise': [0.0, 0.1], 'blur': [1.0]}
+    rows = evaluate_robustness(model, images, labels, grids=grids, batch_size=128)
+    assert [(r['perturbation'], r['severity']) for r in rows] == [
+        ('rotation', 0), ('rotation', 15), ('gaussian_noise', 0.0), ('gaussian_noise', 0.1), ('blur', 1.0)]
+    assert rows[0]['accuracy'] == rows[2]['accuracy']
+    assert 'gaussian_noise' in format_table(rows)
+
+    save_examples(model, images[:3], labels[:3], 'rotation', [-15, 0, 15], tmp_path / 'rotated.png')
+    assert (tmp_path / 'rotated.png').exists()
+    save_examples(model, images[:3], labels[:3], ['gaussian_noise', 'gaussian_noise', 'blur'], [0.0, 0.1, 2.0],
+                  tmp_path / 'perturbed.png')
+    assert (tmp_path / 'perturbed.png').exists()
@@ -0,0 +1,71 @@
+import json
+import threading
+import pytest
+import torch
+import urllib.error
+import urllib.request
+from src.model import MNISTModel
+from src.loadgen import http_predict, run_load
+from src.serve import MicroBatchPredictor, create_server
+
+def test_micro_batches_match_direct_inference():
+    torch.manual_seed(0)
+    model = MNISTModel().eval()
+    images = torch.randn(64, 1, 28, 28)
+    with torch.no_grad():
+        expected = model(images).argmax(1).tolist()
+
+    with MicroBatchPredictor(model, max_batch_size=16, max_wait_ms=50) as predictor:
+        futures = [predictor.submit(image) for image in images]
+        results = [future.result(timeout=10) for future in futures]
+        stats = predictor.stats.summary()
+
+    assert [r['label'] for r in results] == expected
+    assert all(abs(sum(r['probabilities']) - 1) < 1e-4 for r in results)
+    assert stats['requests'] == 64
+    assert 1 < stats['mean_batch_size'] <= 16
+    assert stats['p50_ms'] <= stats['p99_ms']
+
+def test_http_server_and_load_generator():
+    with MicroBatchPredictor(MNISTModel(), max_batch_size=8, max_wait_ms=2) as predictor:
+        server = create_server(predictor, port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        url = f'http://127.0.0.1:{server.server_address[1]}'
+        try:
+            summary = run_load(http_predict(url + '/predict'), torch.randn(16, 1, 28, 28),
+                               num_requests=40, concurrency=4)
+            assert summary['requests'] == 40 and summary['throughput_rps'] > 0
+            with urllib.request.urlopen(url + '/metrics') as response:
+                assert json.loads(response.read())['requests'] == 40
+        finally:
+            server.shutdown()
+            server.server_close()
+
+class FailingModel(MNISTModel):
+    def forward(self, x):
+        raise RuntimeError('model exploded')
+
+def test_submit_after_close_raises():
+    predictor = MicroBatchPredictor(MNISTModel())
+    assert predictor.predict(torch.randn(28, 28), timeout=10)['label'] in range(10)
+    predictor.close()
+    predictor.close()
+    with pytest.raises(RuntimeError, match='closed'):
+        predictor.submit(torch.randn(28, 28))
+
+def test_model_errors_are_returned_as_500():
+    with MicroBatchPredictor(FailingModel(), max_wait_ms=1) as predictor:
+        server = create_server(predictor, port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        request = urllib.request.Request(f'http://127.0.0.1:{server.server_address[1]}/predict',
+                                         data=json.dumps({'image': [0.0] * 784}).encode('utf-8'), method='POST')
+        try:
+            with pytest.raises(urllib.error.HTTPError) as error:
+                urllib.request.urlopen(request, timeout=10)
+            assert error.value.code == 500
+            assert 'model exploded' in json.loads(error.value.read())['error']
+        finally:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,49 @@
+import csv
+import json
+import os
+import sys
+import pytest
+from src.model import MNISTModel
+from src import telemetry as telemetry_module
+from src.telemetry import PHASES, Telemetry, current_rss
+from src.train import train_with_stats
+from src.utils import evaluate_model
+
+def test_training_telemetry_exports(workdir):
+    _, stats = train_with_stats(epochs=1, batch_size=32, accumulation_steps=2, telemetry_dir='telemetry',
+                                profile_steps=(1, 3))
+    telemetry = stats['telemetry']
+    assert telemetry['steps'] == 7 and telemetry['samples'] == 200
+    assert telemetry['samples_per_second'] > 0 and telemetry['rss_peak_bytes'] > 0
+    assert all(telemetry[f'{phase}_seconds'] > 0 for phase in PHASES)
+    assert sum(telemetry[f'{phase}_fraction'] for phase in PHASES) <= 1.0
+
+    with open('telemetry/train.json') as f:
+        steps = json.load(f)['steps']
+    # Optimizer steps only run on every second batch (and the last one)
+    assert [step['optimizer'] > 0 for step in steps] == [False, True, False, True, False, True, True]
+    with open('telemetry/train.csv') as f:
+        assert len(list(csv.DictReader(f))) == 7
+    with open('telemetry/train_trace.json') as f:
+        assert len(json.load(f)['traceEvents']) == 7 * len(PHASES)
+    with open('telemetry/profiler_trace.json') as f:
+        assert any(event.get('name') == 'forward' for event in json.load(f)['traceEvents'])
+
+def test_evaluate_model_with_monitor(workdir):
+    monitor = Telemetry('eval', memory_every=1)
+    evaluate_model(MNISTModel(), batch_size=32, monitor=monitor)
+    summary = monitor.summary()
+    assert summary['steps'] == 3 and summary['samples'] == 70
+    assert summary['backward_seconds'] == 0 and summary['forward_seconds'] > 0
+    monitor.export('telemetry')
+    assert sorted(os.listdir('telemetry')) == ['eval.csv', 'eval.json', 'eval_trace.json']
+
+def test_current_rss_without_psutil(monkeypatch):
+    monkeypatch.setattr(telemetry_module, 'psutil', None)
+    assert current_rss() > 0
+    monkeypatch.setitem(sys.modules, 'resource', None)  # e.g. Windows, where there is no resource module
+    assert current_rss() == 0
+
+def test_profile_steps_without_telemetry_dir_raises():
+    with pytest.raises(ValueError, match='telemetry_dir'):
+        train_with_stats(epochs=1, profile_steps=(1, 3))
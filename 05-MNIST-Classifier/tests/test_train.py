@@ -0,0 +1,26 @@
+import os
+import torch
+import pytest
+from src.model import MNISTModel
+from src.train import train_with_stats
+
+def load(path):
+    model = MNISTModel()
+    model.load_state_dict(torch.load(path))
+    return model
+
+@pytest.mark.parametrize("data_mode", ['tensor', 'torchvision'])
+def test_train_with_accumulation_and_threads(workdir, data_mode):
+    loader_kwargs = {'num_workers': 1, 'prefetch_factor': 2} if data_mode == 'torchvision' else {}
+    save_path, stats = train_with_stats(data_mode=data_mode, epochs=2, batch_size=32, accumulation_steps=2,
+                                        num_threads=2, num_interop_threads=2, **loader_kwargs)
+    assert os.path.exists(save_path)
+    assert stats['samples'] == 400
+    assert stats['samples_per_second'] > 0
+    load(save_path)
+
+def test_train_distributed_ddp(workdir):
+    save_path, stats = train_with_stats(epochs=1, batch_size=25, world_size=2)
+    assert stats['world_size'] == 2
+    assert stats['samples'] == 200
+    load(save_path)
@@ -1,6 +1,12 @@
+import functools
 import gradio as gr
 import json
 
+from bpe import encode
+from fast_decode import VectorDecoder, parse_token_ids
+from highlight import TokenHighlighter
+from model_format import load_tokenizer
+
 # Load token-to-color mappings from JSON
 def load_token_colors(filename):
     with open(filename, "r") as file:
@@ -10,92 +16,52 @@ def load_token_colors(filename):
 token_colors = load_token_colors("token_colors.json")
 
 
-def get_stats(ids):
-    counts = {}
-    for pair in zip(ids, ids[1:]):
-        counts[pair] = counts.get(pair, 0) + 1
-    return counts
-
-
-def load_merges(filename):
-    with open(filename, "r") as file:
-        loaded_data = json.load(file)
-        return {eval(key): value for key, value in loaded_data.items()}
-
-
-def merge(ids, pair, idx):
-    newids = []
-    i = 0
-    while i < len(ids):
-        if i < len(ids) - 1 and ids[i] == pair[0] and ids[i + 1] == pair[1]:
-            newids.append(idx)
-            i += 2
-        else:
-            newids.append(ids[i])
-            i += 1
-    return newids
-
-
-def encode(text, merges):
-    tokens = list(text.encode("utf-8"))
-    
-    while len(tokens) >= 2:
-        stats = get_stats(tokens)
-        pair = min(stats, key=lambda p: merges.get(p, float("inf")))
-        
-        if pair not in merges:
-            break
-        
-        idx = merges[pair]
-        tokens = merge(tokens, pair, idx)
-    
-    return tokens
+# Uses hindi_bpe.bin when present (see model_format.py), else hindi_bpe.json
+merges, vocab = load_tokenizer("hindi_bpe.bin", "hindi_bpe.json")
+decoder = VectorDecoder.from_vocab(vocab)
+highlighter = TokenHighlighter(token_colors, vocab_size=len(vocab))
 
+# Tokens rendered per page of highlighted output
+PAGE_SIZE = 2000
 
-def decode(ids, vocab):
-    tokens = b"".join(vocab[idx] for idx in ids)
-    text = tokens.decode("utf-8", errors="replace")
-    return text
 
+# Keeps recent encodings so paging through a long text does not re-encode it
+@functools.lru_cache(maxsize=16)
+def encode_cached(text):
+    return tuple(encode(text, merges))
 
-merges = load_merges("hindi_bpe.json")
 
-vocab = {idx: bytes([idx]) for idx in range(256)}
-for (p0, p1), idx in merges.items():
-    vocab[idx] = vocab[p0] + vocab[p1]
+def render_tokens(tokens, page=1):
+    highlighted_text, num_pages = highlighter.render_page(tokens, page, PAGE_SIZE)
+    if num_pages > 1:
+        highlighted_text += f"<p>Page {min(max(1, int(page or 1)), num_pages)} of {num_pages} ({len(tokens)} tokens)</p>"
+    return highlighted_text
 
 
-def encode_and_highlight(text):
-    tokens = encode(text, merges)
-    highlighted_text = ""
-    
-    for token in tokens:
-        color = token_colors.get(str(token), "#E0E0E0")
-        highlighted_text += f'<span style="background-color: {color}; padding: 2px; border-radius: 5px; margin: 2px">{token}</span> '
-    
-    return highlighted_text
+def encode_and_highlight(text, page=1):
+    return render_tokens(encode_cached(text), page)
 
 
 def decode_tokens(token_string):
     try:
-        token_ids = list(map(int, token_string.split(',')))
-        return decode(token_ids, vocab)
+        return decoder.decode(parse_token_ids(token_string))
     except Exception as e:
         return f"Error decoding tokens: {e}"
 
 
-def app_interface():
+def app_interface(encode_fn=encode_and_highlight, decode_fn=decode_tokens):
     with gr.Blocks() as demo:
         gr.Markdown("## Byte Pair Encoder & Decoder App")
         gr.Markdown("Enter text and see encoded tokenized output, or decode a list of tokens back to text!")
         
         with gr.Tab("Encode & Highlight"):
             text_input = gr.Textbox(label="Input Text")
+            page_input = gr.Number(label="Page", value=1, precision=0)
             output_box = gr.HTML(label="Tokenized Output")
             submit_button = gr.Button("Highlight Tokens")
             submit_button.click(
-                fn=encode_and_highlight,
-                inputs=text_input,
+                fn=encode_fn,
+                inputs=[text_input, page_input],
                 outputs=output_box
             )
         
@@ -104,7 +70,7 @@ def app_interface():
             decoded_output = gr.Textbox(label="Decoded Text")
             decode_button = gr.Button("Decode Tokens")
             decode_button.click(
-                fn=decode_tokens,
+                fn=decode_fn,
                 inputs=token_input,
                 outputs=decoded_output
             )
@@ -112,7 +78,9 @@ def app_interface():
     return demo
 
 
-app = app_interface()
-app.launch()
+if __name__ == "__main__":
+    # See serve.py for the multi-process, queue-backed serving mode
+    app = app_interface()
+    app.launch()
 
 # Now the app dynamically loads token colors from token_colors.json! 🚀
@@ -0,0 +1,151 @@
+import argparse
+import codecs
+import collections
+import multiprocessing
+import re
+import sys
+from array import array
+
+from bpe import CachedEncoder, load_merges
+
+# Matches "non-space then space" in a reversed buffer, i.e. the last whitespace
+# character that is followed by a word in the original buffer.
+_REVERSED_WORD_BOUNDARY = re.compile(r"\S\s")
+
+_worker_encoder = None
+
+
+def _init_worker(merges, cache_size):
+    global _worker_encoder
+    _worker_encoder = CachedEncoder(merges, maxsize=cache_size)
+
+
+def _encode_text(text):
+    return _worker_encoder.encode(text)
+
+
+def _encode_to_array(text):
+    return to_uint16_array(_worker_encoder.encode(text))
+
+
+def to_uint16_array(tokens):
+    """Pack token IDs into a compact `array('H')`."""
+    try:
+        return array("H", tokens)
+    except OverflowError:
+        raise ValueError("Token IDs must fit in uint16 for array('H') output")
+
+
+def _last_word_boundary(buffer):
+    match = _REVERSED_WORD_BOUNDARY.search(buffer[::-1])
+    if match is None:
+        return 0
+    return len(buffer) - match.start() - 2
+
+
+def iter_text_chunks(file_obj, chunk_size=1 << 20):
+    """Yield text chunks of roughly `chunk_size` that end on a word boundary.
+
+    Works with both text and binary file objects; binary input is decoded
+    incrementally so a UTF-8 sequence split across reads is never broken.
+    Each chunk is cut just before the whitespace that precedes a word, which
+    is where `pretokenize()` would start a new chunk anyway, so encoding the
+    pieces gives the same IDs as encoding the whole text with `CachedEncoder`.
+    """
+    decoder = None
+    pending = ""
+    while True:
+        raw = file_obj.read(chunk_size)
+        block = raw
+        if isinstance(raw, bytes):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder("utf-8")()
+            block = decoder.decode(raw, final=not raw)
+        if not raw:
+            pending += block
+            break
+        if not block:
+            # Only part of a multi-byte sequence so far; the decoder holds it until the rest arrives
+            continue
+
+        buffer = pending + block
+        cut = _last_word_boundary(buffer)
+        if cut <= 0:
+            # A single word longer than the buffer; keep reading until it ends
+            pending = buffer
+            continue
+        yield buffer[:cut]
+        pending = buffer[cut:]
+
+    if pending:
+        yield pending
+
+
+def encode_batch(texts, merges, processes=None, chunksize=16, cache_size=65536):
+    """Encode a list of texts across a process pool, preserving order."""
+    if processes == 1:
+        encoder = CachedEncoder(merges, maxsize=cache_size)
+        return [encoder.encode(text) for text in texts]
+
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(merges, cache_size)) as pool:
+        return pool.map(_encode_text, texts, chunksize=chunksize)
+
+
+def encode_stream(file_obj, merges, processes=None, chunk_size=1 << 20, max_pending=None, cache_size=65536):
+    """Encode a file object chunk by chunk, yielding one `array('H')` per chunk.
+
+    At most `max_pending` chunks (default: twice the pool size) are in flight
+    at once, so memory stays bounded regardless of the input size.
+    """
+    chunks = iter_text_chunks(file_obj, chunk_size)
+
+    if processes == 1:
+        encoder = CachedEncoder(merges, maxsize=cache_size)
+        for chunk in chunks:
+            yield to_uint16_array(encoder.encode(chunk))
+        return
+
+    processes = processes or multiprocessing.cpu_count()
+    max_pending = max_pending or 2 * processes
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(merges, cache_size)) as pool:
+        in_flight = collections.deque()
+        for chunk in chunks:
+            in_flight.append(pool.apply_async(_encode_to_array, (chunk,)))
+            if len(in_flight) >= max_pending:
+                yield in_flight.popleft().get()
+        while in_flight:
+            yield in_flight.popleft().get()
+
+
+def encode_file(src_path, dst_path, merges, **kwargs):
+    """Encode a UTF-8 text file into a flat little-endian uint16 token file.
+
+    The output can be read back with `array('H')` or
+    `numpy.memmap(dst_path, dtype="<u2")`. Returns the number of tokens written.
+    """
+    total = 0
+    with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+        for tokens in encode_stream(src, merges, **kwargs):
+            if sys.byteorder == "big":
+                tokens.byteswap()
+            tokens.tofile(dst)
+            total += len(tokens)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encode a large UTF-8 text file into uint16 token IDs.")
+    parser.add_argument("input", help="UTF-8 text file to encode")
+    parser.add_argument("output", help="Destination file for the uint16 token IDs")
+    parser.add_argument("--merges", default="hindi_bpe.json", help="Merge table to encode with")
+    parser.add_argument("--processes", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=1 << 20, help="Bytes read per chunk")
+    args = parser.parse_args()
+
+    merges = load_merges(args.merges)
+    total = encode_file(args.input, args.output, merges, processes=args.processes, chunk_size=args.chunk_size)
+    print(f"Wrote {total} tokens to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
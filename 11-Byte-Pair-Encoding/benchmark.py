@@ -0,0 +1,248 @@
+import argparse
+import cProfile
+import io
+import json
+import math
+import os
+import platform
+import pstats
+import random
+import time
+import tracemalloc
+
+from bpe import CachedEncoder, build_vocab, decode, encode, encode_naive, get_stats, load_merges, merge
+import fast_pairs
+from fast_decode import VectorDecoder
+from highlight import TokenHighlighter
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SAMPLE_TEXT = (
+    "भारत एक विशाल देश है। यहाँ अनेक भाषाएँ बोली जाती हैं और हर क्षेत्र की अपनी संस्कृति है। "
+    "हिंदी भारत की राजभाषा है और इसे देवनागरी लिपि में लिखा जाता है। "
+    "दिल्ली देश की राजधानी है, जबकि मुंबई को आर्थिक राजधानी कहा जाता है। "
+    "The tokenizer should handle mixed Hindi and English text, numbers like 2024 and punctuation! "
+)
+
+# Byte sizes from 1 KB to 100 MB; the default run stops at 1 MB
+ALL_SIZES = [1 << 10, 10 << 10, 100 << 10, 1 << 20, 10 << 20, 100 << 20]
+DEFAULT_SIZES = ALL_SIZES[:4]
+
+
+def make_text(size, kind="sample", seed=0, source=SAMPLE_TEXT):
+    """Build roughly `size` bytes of text.
+
+    "sample" repeats the source text; "synthetic" shuffles its words so the
+    merge patterns are less repetitive.
+    """
+    if kind == "sample":
+        repeats = size // len(source.encode("utf-8")) + 1
+        text = source * repeats
+    else:
+        rng = random.Random(seed)
+        words = source.split()
+        parts = []
+        total = 0
+        while total < size:
+            word = rng.choice(words)
+            parts.append(word)
+            total += len(word.encode("utf-8")) + 1
+        text = " ".join(parts)
+    return text.encode("utf-8")[:size].decode("utf-8", errors="ignore")
+
+
+class Context:
+    """Tokenizer tables shared by every benchmark."""
+
+    def __init__(self, merges_path, colors_path):
+        self.merges = load_merges(merges_path)
+        self.vocab = build_vocab(self.merges)
+        self.decoder = VectorDecoder.from_vocab(self.vocab)
+        with open(colors_path, "r") as file:
+            self.highlighter = TokenHighlighter(json.load(file), vocab_size=len(self.vocab))
+
+
+# Each benchmark takes (context, text, tokens) and returns (callable, work units).
+# Work units are tokens for everything except the byte-level get_stats/merge.
+def _bench_encode(ctx, text, tokens):
+    return (lambda: encode(text, ctx.merges)), len(tokens)
+
+
+def _bench_encode_naive(ctx, text, tokens):
+    return (lambda: encode_naive(text, ctx.merges)), len(tokens)
+
+
+def _bench_encode_cached(ctx, text, tokens):
+    return (lambda: CachedEncoder(ctx.merges).encode(text)), len(tokens)
+
+
+def _bench_get_stats(ctx, text, tokens):
+    ids = list(text.encode("utf-8"))
+    return (lambda: get_stats(ids)), len(ids)
+
+
+def _bench_merge(ctx, text, tokens):
+    ids = list(text.encode("utf-8"))
+    pair = max(get_stats(ids).items(), key=lambda item: item[1])[0] if len(ids) > 1 else (0, 0)
+    return (lambda: merge(ids, pair, 256)), len(ids)
+
+
+def _bench_get_stats_array(ctx, text, tokens):
+    ids = fast_pairs.as_token_array(list(text.encode("utf-8")))
+    return (lambda: fast_pairs.get_stats_array(ids)), len(ids)
+
+
+def _bench_merge_array(ctx, text, tokens):
+    ids = fast_pairs.as_token_array(list(text.encode("utf-8")))
+    pair = max(get_stats(ids).items(), key=lambda item: item[1])[0] if len(ids) > 1 else (0, 0)
+    return (lambda: fast_pairs.merge_array(ids, pair, 256)), len(ids)
+
+
+def _bench_decode(ctx, text, tokens):
+    return (lambda: decode(tokens, ctx.vocab)), len(tokens)
+
+
+def _bench_decode_vector(ctx, text, tokens):
+    return (lambda: ctx.decoder.decode(tokens)), len(tokens)
+
+
+def _bench_highlight(ctx, text, tokens):
+    return (lambda: ctx.highlighter.render(tokens)), len(tokens)
+
+
+def _bench_highlight_page(ctx, text, tokens):
+    return (lambda: ctx.highlighter.render_page(tokens, page=1, page_size=2000)), len(tokens)
+
+
+# name -> (benchmark, largest input size in bytes it is run on, or None for no limit)
+BENCHMARKS = {
+    "encode": (_bench_encode, None),
+    "encode_naive": (_bench_encode_naive, 100 << 10),
+    "encode_cached": (_bench_encode_cached, None),
+    "get_stats": (_bench_get_stats, None),
+    "merge": (_bench_merge, None),
+    "decode": (_bench_decode, None),
+    "decode_vector": (_bench_decode_vector, None),
+    "highlight": (_bench_highlight, None),
+    "highlight_page": (_bench_highlight_page, None),
+}
+if fast_pairs.np is not None:
+    BENCHMARKS["get_stats_array"] = (_bench_get_stats_array, None)
+    BENCHMARKS["merge_array"] = (_bench_merge_array, None)
+
+
+def measure(fn, repeat=3, memory=False, profile=False):
+    """Time `fn` (best of `repeat`), optionally tracing peak memory and profiling one run."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    result = {"seconds": min(timings), "mean_seconds": sum(timings) / len(timings)}
+
+    if memory:
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["peak_memory_bytes"] = peak
+
+    if profile:
+        profiler = cProfile.Profile()
+        profiler.runcall(fn)
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(15)
+        result["profile"] = stream.getvalue()
+    return result
+
+
+def scaling_exponent(points):
+    """Slope of log(time) vs log(size): ~1 is linear, ~2 quadratic."""
+    points = [(size, seconds) for size, seconds in points if seconds > 0]
+    if len(points) < 2:
+        return None
+    xs = [math.log(size) for size, _ in points]
+    ys = [math.log(seconds) for _, seconds in points]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    denominator = sum((x - mean_x) ** 2 for x in xs)
+    if not denominator:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / denominator
+
+
+def run(names=None, sizes=DEFAULT_SIZES, kinds=("sample", "synthetic"), repeat=3, memory=False, profile=False,
+        merges_path=os.path.join(HERE, "hindi_bpe.json"), colors_path=os.path.join(HERE, "token_colors.json")):
+    """Run the benchmarks and return a JSON-serializable report."""
+    ctx = Context(merges_path, colors_path)
+    names = names or list(BENCHMARKS)
+    results = []
+    for kind in kinds:
+        for size in sizes:
+            text = make_text(size, kind)
+            tokens = encode(text, ctx.merges)
+            for name in names:
+                bench, max_size = BENCHMARKS[name]
+                if max_size is not None and size > max_size:
+                    continue
+                fn, units = bench(ctx, text, tokens)
+                result = measure(fn, repeat=repeat, memory=memory, profile=profile)
+                result.update(
+                    name=name,
+                    kind=kind,
+                    size_bytes=size,
+                    units=units,
+                    units_per_second=units / result["seconds"] if result["seconds"] else None,
+                )
+                results.append(result)
+                print(f"{name:<15} {kind:<9} {size:>10} B  {result['seconds'] * 1000:10.2f} ms  "
+                      f"{result['units_per_second'] or 0:14,.0f} tokens/s")
+
+    scaling = {}
+    for kind in kinds:
+        for name in names:
+            points = [(r["size_bytes"], r["seconds"]) for r in results if r["name"] == name and r["kind"] == kind]
+            scaling[f"{name}/{kind}"] = {"points": points, "exponent": scaling_exponent(points)}
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "merges": len(ctx.merges),
+        "repeat": repeat,
+        "results": results,
+        "scaling": scaling,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the BPE encoder, decoder and highlight renderers.")
+    parser.add_argument("--bench", nargs="+", choices=list(BENCHMARKS), help="Benchmarks to run (default: all)")
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help="Input sizes in bytes")
+    parser.add_argument("--full", action="store_true", help="Run every size from 1 KB to 100 MB")
+    parser.add_argument("--kinds", nargs="+", default=["sample", "synthetic"], choices=["sample", "synthetic"])
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark (best is reported)")
+    parser.add_argument("--memory", action="store_true", help="Measure peak memory with tracemalloc")
+    parser.add_argument("--profile", action="store_true", help="Attach cProfile output to each result")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON report")
+    args = parser.parse_args()
+
+    report = run(
+        names=args.bench,
+        sizes=ALL_SIZES if args.full else args.sizes,
+        kinds=args.kinds,
+        repeat=args.repeat,
+        memory=args.memory,
+        profile=args.profile,
+    )
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+
+    print("\nScaling exponents (1 = linear, 2 = quadratic):")
+    for key, curve in report["scaling"].items():
+        if curve["exponent"] is not None:
+            print(f"  {key:<28} {curve['exponent']:.2f}")
+    print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
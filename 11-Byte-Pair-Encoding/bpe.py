@@ -0,0 +1,205 @@
+import functools
+import heapq
+import json
+import re
+
+import fast_pairs
+
+
+# GPT-style pre-tokenization: an optional leading space followed by a run of
+# Devanagari (letters, matras and digits, but not the danda punctuation), other
+# letters, digits or punctuation; whitespace runs keep their last space for the
+# word that follows.
+DEVANAGARI = r"\u0900-\u0963\u0966-\u097F\uA8E0-\uA8FF"
+PRETOKENIZE_PATTERN = re.compile(
+    rf" ?[{DEVANAGARI}]+"
+    r"| ?[^\W\d_]+"
+    r"| ?\d+"
+    rf"| ?(?:[^\s\w{DEVANAGARI}]|_)+"
+    r"|\s+(?!\S)"
+    r"|\s+"
+)
+
+
+def _use_arrays(ids):
+    np = fast_pairs.np
+    return np is not None and (isinstance(ids, np.ndarray) or len(ids) >= fast_pairs.MIN_ARRAY_LENGTH)
+
+
+# Counts the occurrences of consecutive pairs of elements in the ids list and returns a dictionary with these pairs as keys and their counts as values.
+# NumPy arrays and long lists are counted by `fast_pairs` (same dict, same order).
+def get_stats(ids):
+    if _use_arrays(ids):
+        return fast_pairs.get_stats_dict(ids)
+    counts = {}
+    for pair in zip(ids, ids[1:]):
+        counts[pair] = counts.get(pair, 0) + 1
+    return counts
+
+
+def load_merges(filename):
+    """Load the merges dictionary from a JSON file."""
+    with open(filename, "r") as file:
+        loaded_data = json.load(file)
+        return {tuple(map(int, key.strip("()").split(","))): value for key, value in loaded_data.items()}
+
+
+def save_merges(merges, filename):
+    """Save a merges dictionary in the JSON format read by `load_merges`."""
+    with open(filename, "w") as file:
+        json.dump({str(pair): idx for pair, idx in merges.items()}, file)
+
+
+def build_vocab(merges):
+    """Build the token ID -> bytes table from a merge table."""
+    vocab = {idx: bytes([idx]) for idx in range(256)}
+    for (p0, p1), idx in merges.items():
+        vocab[idx] = vocab[p0] + vocab[p1]
+    return vocab
+
+
+def merge(ids, pair, idx):
+    """Merge consecutive pairs of elements in the list.
+
+    NumPy arrays (returned as uint32 arrays) and long lists are merged by
+    `fast_pairs.merge_array`.
+    """
+    if _use_arrays(ids):
+        merged = fast_pairs.merge_array(ids, pair, idx)
+        return merged if isinstance(ids, fast_pairs.np.ndarray) else merged.tolist()
+    newids = []
+    i = 0
+    while i < len(ids):
+        if i < len(ids) - 1 and ids[i] == pair[0] and ids[i + 1] == pair[1]:
+            newids.append(idx)
+            i += 2
+        else:
+            newids.append(ids[i])
+            i += 1
+    return newids
+
+
+def encode_naive(text, merges):
+    """Reference encoder: rescan all pairs and rebuild the list for every merge."""
+    tokens = list(text.encode("utf-8"))
+
+    while len(tokens) >= 2:
+        stats = get_stats(tokens)
+        pair = min(stats, key=lambda p: merges.get(p, float("inf")))
+
+        if pair not in merges:
+            break
+
+        idx = merges[pair]
+        tokens = merge(tokens, pair, idx)
+
+    return tokens
+
+
+def encode_ids(ids, merges):
+    """Apply a merge table to a list of token IDs in a single pass.
+
+    Symbols live in a doubly linked list (index arrays) and candidate pairs in a
+    heap keyed by (rank, position). Popping the lowest rank first, left to right,
+    applies merges in exactly the order `encode_naive` does, but each merge only
+    touches its two neighbours instead of rescanning the whole sequence.
+    """
+    n = len(ids)
+    if n < 2:
+        return list(ids)
+
+    symbols = list(ids)
+    prev = list(range(-1, n - 1))
+    nxt = list(range(1, n + 1))
+    nxt[-1] = -1
+
+    heap = []
+    for i in range(n - 1):
+        rank = merges.get((symbols[i], symbols[i + 1]))
+        if rank is not None:
+            heap.append((rank, i, symbols[i], symbols[i + 1]))
+    heapq.heapify(heap)
+
+    while heap:
+        rank, i, left, right = heapq.heappop(heap)
+        j = nxt[i]
+        # Skip entries invalidated by an earlier merge at this position
+        if symbols[i] != left or j == -1 or symbols[j] != right:
+            continue
+
+        symbols[i] = rank
+        symbols[j] = None
+        k = nxt[j]
+        nxt[i] = k
+        if k != -1:
+            prev[k] = i
+
+        p = prev[i]
+        if p != -1:
+            new_rank = merges.get((symbols[p], rank))
+            if new_rank is not None:
+                heapq.heappush(heap, (new_rank, p, symbols[p], rank))
+        if k != -1:
+            new_rank = merges.get((rank, symbols[k]))
+            if new_rank is not None:
+                heapq.heappush(heap, (new_rank, i, rank, symbols[k]))
+
+    tokens = []
+    i = 0
+    while i != -1:
+        tokens.append(symbols[i])
+        i = nxt[i]
+    return tokens
+
+
+def encode(text, merges):
+    """Encode a string into tokens using a merge table."""
+    return encode_ids(list(text.encode("utf-8")), merges)
+
+
+def decode(ids, vocab):
+    """Decode a list of token IDs back into a string."""
+    tokens = b"".join(vocab[idx] for idx in ids)
+    text = tokens.decode("utf-8", errors="replace")
+    return text
+
+
+def pretokenize(text, pattern=PRETOKENIZE_PATTERN):
+    """Split text into word chunks (whitespace, Devanagari clusters, punctuation)."""
+    return pattern.findall(text)
+
+
+class CachedEncoder:
+    """Pre-tokenizing encoder with a bounded LRU cache of encoded word chunks.
+
+    Merges never cross chunk boundaries, so the output can differ from
+    `encode()` on the raw text, but repeated words are only merged once.
+    """
+
+    def __init__(self, merges, maxsize=65536, pattern=PRETOKENIZE_PATTERN):
+        self.merges = merges
+        self.pattern = pattern
+        self._encode_chunk = functools.lru_cache(maxsize=maxsize)(self._encode_chunk_uncached)
+
+    def _encode_chunk_uncached(self, chunk):
+        return tuple(encode(chunk, self.merges))
+
+    def encode(self, text):
+        """Encode a string chunk by chunk, reusing cached chunk encodings."""
+        tokens = []
+        for chunk in pretokenize(text, self.pattern):
+            tokens.extend(self._encode_chunk(chunk))
+        return tokens
+
+    def cache_info(self):
+        """Return the underlying `functools.lru_cache` statistics."""
+        return self._encode_chunk.cache_info()
+
+    @property
+    def hit_rate(self):
+        info = self.cache_info()
+        lookups = info.hits + info.misses
+        return info.hits / lookups if lookups else 0.0
+
+    def cache_clear(self):
+        self._encode_chunk.cache_clear()
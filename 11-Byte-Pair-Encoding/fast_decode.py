@@ -0,0 +1,122 @@
+import codecs
+from array import array
+
+from model_format import BlobVocab
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; fall back to a per-token table lookup
+    np = None
+
+
+def pack_vocab(vocab):
+    """Pack a token ID -> bytes dict into an offsets table and a contiguous byte blob."""
+    if isinstance(vocab, BlobVocab):
+        return vocab.offsets, vocab.blob
+    tokens = [vocab.get(idx, b"") for idx in range(max(vocab) + 1)]
+    offsets = array("I", [0])
+    total = 0
+    for token in tokens:
+        total += len(token)
+        offsets.append(total)
+    return offsets, b"".join(tokens)
+
+
+def parse_token_ids(token_string):
+    """Parse a comma-separated string of token IDs into an integer buffer."""
+    parts = token_string.split(",")
+    try:
+        if np is not None:
+            return np.array(parts, dtype=np.int64)
+        return array("q", map(int, parts))
+    except OverflowError:
+        raise ValueError("Token IDs must fit in a signed 64-bit integer") from None
+
+
+class VectorDecoder:
+    """Decode token ID buffers by gathering from a vocab byte blob and offsets table.
+
+    With NumPy, IDs (a list, `array('H')` or ndarray) are turned into byte
+    indices with vectorized `repeat`/`cumsum` and gathered straight into one
+    preallocated bytearray, `block_size` tokens at a time to bound the size of
+    the temporary index arrays.
+    """
+
+    def __init__(self, offsets, blob, block_size=1 << 16):
+        self.vocab_size = len(offsets) - 1
+        self.block_size = block_size
+        if np is not None:
+            self._offsets = np.frombuffer(memoryview(offsets).cast("B"), dtype=np.uint32).astype(np.int64)
+            self._blob = np.frombuffer(blob, dtype=np.uint8)
+        else:
+            self._tokens = [bytes(blob[offsets[idx]:offsets[idx + 1]]) for idx in range(self.vocab_size)]
+
+    @classmethod
+    def from_vocab(cls, vocab, **kwargs):
+        """Build a decoder from a vocab dict or a `BlobVocab` (no copy of the blob)."""
+        offsets, blob = pack_vocab(vocab)
+        return cls(offsets, blob, **kwargs)
+
+    @classmethod
+    def from_model(cls, model, **kwargs):
+        """Build a decoder over a memory-mapped `BPEModel`."""
+        return cls(model.offsets, model.blob, **kwargs)
+
+    def _check_ids(self, low, high):
+        if low < 0 or high >= self.vocab_size:
+            raise ValueError(f"Token IDs must be in [0, {self.vocab_size}), got {low if low < 0 else high}")
+
+    def decode_bytes(self, ids):
+        """Decode token IDs into a single bytearray."""
+        if np is None:
+            if len(ids):
+                self._check_ids(min(ids), max(ids))
+            return bytearray(b"".join(map(self._tokens.__getitem__, ids)))
+
+        ids = np.asarray(ids).ravel().astype(np.int64, copy=False)
+        if not ids.size:
+            return bytearray()
+        self._check_ids(int(ids.min()), int(ids.max()))
+
+        starts = self._offsets[ids]
+        lengths = self._offsets[ids + 1] - starts
+        out = bytearray(int(lengths.sum()))
+        if not out:
+            return out
+        out_view = np.frombuffer(out, dtype=np.uint8)
+
+        pos = 0
+        for block in range(0, ids.size, self.block_size):
+            block_starts = starts[block:block + self.block_size]
+            block_lengths = lengths[block:block + self.block_size]
+            ends = np.cumsum(block_lengths)
+            size = int(ends[-1])
+            # Blob index of output byte k = k + (token start - token output start)
+            shift = np.repeat(block_starts - (ends - block_lengths), block_lengths)
+            out_view[pos:pos + size] = self._blob[shift + np.arange(size)]
+            pos += size
+        return out
+
+    def decode(self, ids, errors="replace"):
+        """Decode token IDs into a string."""
+        return self.decode_bytes(ids).decode("utf-8", errors=errors)
+
+    def stream(self, errors="replace"):
+        """Return a `StreamDecoder` for decoding IDs chunk by chunk."""
+        return StreamDecoder(self, errors=errors)
+
+
+class StreamDecoder:
+    """Incremental decoder that keeps UTF-8 sequences split across chunks intact."""
+
+    def __init__(self, decoder, errors="replace"):
+        self._decoder = decoder
+        self._utf8 = codecs.getincrementaldecoder("utf-8")(errors=errors)
+
+    def feed(self, ids):
+        """Decode the next chunk of IDs, holding back any incomplete UTF-8 sequence."""
+        return self._utf8.decode(self._decoder.decode_bytes(ids))
+
+    def flush(self):
+        """Return whatever is left once the stream has ended."""
+        return self._utf8.decode(b"", final=True)
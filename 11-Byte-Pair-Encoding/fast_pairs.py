@@ -0,0 +1,85 @@
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; `bpe.get_stats`/`bpe.merge` keep their pure-Python loops
+    np = None
+
+# Below this many IDs the pure-Python loops win over converting to and from an array
+MIN_ARRAY_LENGTH = 512
+# Pairs are counted with a dense `bincount` while the vocab is at most this big (a 4M-entry table)
+# and the table has at most `BINCOUNT_TABLE_RATIO` entries per ID; otherwise with `np.unique`
+MAX_BINCOUNT_VOCAB = 2048
+BINCOUNT_TABLE_RATIO = 8
+
+
+def as_token_array(ids):
+    """View or copy token IDs (list, `array`, ndarray) as a uint32 NumPy array."""
+    if isinstance(ids, list):
+        return np.fromiter(ids, dtype=np.uint32, count=len(ids))
+    return np.asarray(ids, dtype=np.uint32)
+
+
+def get_stats_array(ids, ordered=False):
+    """Count adjacent pairs of a token array; returns `(pairs, counts)` arrays of shape (K, 2) and (K,).
+
+    Each pair is packed into one uint64 key (left << 32 | right). Small vocabs
+    (up to `MAX_BINCOUNT_VOCAB`, e.g. raw bytes) over long inputs are counted
+    with `bincount` over a dense key table, the rest with `np.unique`. Pairs come sorted by
+    key, or by first occurrence with `ordered=True` (the order of `get_stats`).
+    """
+    ids = as_token_array(ids)
+    if len(ids) < 2:
+        return np.empty((0, 2), dtype=np.uint32), np.empty(0, dtype=np.int64)
+    left = ids[:-1].astype(np.uint64)
+    right = ids[1:].astype(np.uint64)
+    vocab_size = int(ids.max()) + 1
+
+    if vocab_size <= MAX_BINCOUNT_VOCAB and vocab_size * vocab_size <= BINCOUNT_TABLE_RATIO * len(ids):
+        dense = left * vocab_size + right
+        counts = np.bincount(dense, minlength=vocab_size * vocab_size)
+        keys = np.flatnonzero(counts)
+        if ordered:
+            first = np.full(len(counts), len(dense), dtype=np.int64)
+            np.minimum.at(first, dense, np.arange(len(dense)))
+            keys = keys[np.argsort(first[keys], kind="stable")]
+        pairs = np.stack([keys // vocab_size, keys % vocab_size], axis=1).astype(np.uint32)
+        return pairs, counts[keys]
+
+    keys, first, counts = np.unique((left << 32) | right, return_index=True, return_counts=True)
+    if ordered:
+        order = np.argsort(first, kind="stable")
+        keys, counts = keys[order], counts[order]
+    pairs = np.stack([keys >> 32, keys & 0xFFFFFFFF], axis=1).astype(np.uint32)
+    return pairs, counts
+
+
+def get_stats_dict(ids):
+    """`bpe.get_stats` over a token array: the same dict, in the same (first occurrence) order."""
+    pairs, counts = get_stats_array(ids, ordered=True)
+    return dict(zip(map(tuple, pairs.tolist()), counts.tolist()))
+
+
+def merge_array(ids, pair, idx):
+    """Replace non-overlapping occurrences of `pair` with `idx`, left to right, like `bpe.merge`.
+
+    Matches are found with one vectorized comparison. They can only overlap
+    when both halves of the pair are the same token; in a run of such matches
+    (e.g. "aaaa" for ("a", "a")) the left-to-right scan takes every other one,
+    counted from the start of the run.
+    """
+    ids = as_token_array(ids)
+    if len(ids) < 2:
+        return ids.copy()
+    matches = (ids[:-1] == pair[0]) & (ids[1:] == pair[1])
+    if pair[0] == pair[1]:
+        positions = np.arange(len(matches))
+        run_starts = matches & ~np.concatenate(([False], matches[:-1]))
+        run_start = np.maximum.accumulate(np.where(run_starts, positions, 0))
+        matches &= (positions - run_start) % 2 == 0
+    starts = np.flatnonzero(matches)
+    if len(starts) == 0:
+        return ids.copy()
+    merged = ids.copy()
+    merged[starts] = idx
+    keep = np.ones(len(ids), dtype=bool)
+    keep[starts + 1] = False
+    return merged[keep]
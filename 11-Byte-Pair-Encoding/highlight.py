@@ -0,0 +1,74 @@
+import html
+import itertools
+
+DEFAULT_COLOR = "#E0E0E0"
+SPAN_OPEN = '<span style="background-color: {color}; padding: 2px; border-radius: 5px; margin: 2px">'
+SPAN_CLOSE = "</span>"
+
+
+class TokenHighlighter:
+    """Render token IDs as colored HTML spans from tables precomputed per token ID.
+
+    Every ID's full span (prefix, escaped label, close tag and separator) is
+    built once, so rendering is a single `"".join` over list lookups instead of
+    growing a string and formatting a span for every token.
+    """
+
+    def __init__(self, token_colors, vocab_size=None, label=str, separator=" ", default_color=DEFAULT_COLOR):
+        if vocab_size is None:
+            vocab_size = max(int(key) for key in token_colors) + 1
+        self.label = label
+        self.separator = separator
+        self.default_color = default_color
+        self.token_colors = token_colors
+
+        colors = [token_colors.get(str(idx), default_color) for idx in range(vocab_size)]
+        self.labels = [html.escape(label(idx)) for idx in range(vocab_size)]
+        self.prefixes = [SPAN_OPEN.format(color=color) for color in colors]
+        suffix = SPAN_CLOSE + separator
+        self.spans = [prefix + text + suffix for prefix, text in zip(self.prefixes, self.labels)]
+
+    def _span(self, idx):
+        if 0 <= idx < len(self.spans):
+            return self.spans[idx]
+        color = self.token_colors.get(str(idx), self.default_color)
+        return SPAN_OPEN.format(color=color) + html.escape(self.label(idx)) + SPAN_CLOSE + self.separator
+
+    def render(self, ids, coalesce=False):
+        """Render token IDs as HTML; `coalesce` merges adjacent same-color tokens into one span."""
+        if coalesce:
+            return self._render_coalesced(ids)
+        if not hasattr(ids, "__len__"):
+            ids = list(ids)
+        # Negative IDs would index from the end of the table, so they take the checked path too
+        if min(ids, default=0) >= 0:
+            try:
+                return "".join(map(self.spans.__getitem__, ids))
+            except IndexError:
+                pass
+        return "".join(map(self._span, ids))
+
+    def _render_coalesced(self, ids):
+        parts = []
+        in_range = len(self.spans)
+        for prefix, run in itertools.groupby(ids, key=lambda idx: self.prefixes[idx] if 0 <= idx < in_range else None):
+            run = list(run)
+            if prefix is None:
+                parts.extend(map(self._span, run))
+                continue
+            parts.append(prefix)
+            parts.append(self.separator.join(map(self.labels.__getitem__, run)))
+            parts.append(SPAN_CLOSE + self.separator)
+        return "".join(parts)
+
+    def render_page(self, ids, page=1, page_size=1000, coalesce=False):
+        """Render only one window of `page_size` tokens.
+
+        Returns `(html, num_pages)`; `page` is 1-based and clamped to the
+        valid range (None, e.g. a cleared number box, is page 1), so the cost
+        depends on the page size, not the document.
+        """
+        num_pages = max(1, -(-len(ids) // page_size))
+        page = min(max(1, int(page or 1)), num_pages)
+        start = (page - 1) * page_size
+        return self.render(ids[start:start + page_size], coalesce=coalesce), num_pages
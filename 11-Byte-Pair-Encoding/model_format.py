@@ -0,0 +1,246 @@
+import argparse
+import bisect
+import functools
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+
+from bpe import build_vocab, load_merges
+
+# File layout (all integers little-endian; uint32 unless noted):
+#   header   MAGIC, VERSION, num_merges, vocab_size, blob_size, 3 reserved words
+#   keys     num_merges uint64 pair keys (p0 << 32 | p1), sorted   (version 2)
+#   ranks    num_merges merge IDs, in the order of `keys`           (version 2)
+#   merges   num_merges rows of (p0, p1, idx), in merge order
+#   offsets  vocab_size + 1 byte offsets into the blob
+#   blob     the concatenated bytes of every token, in ID order
+# Version 1 files lack `keys`/`ranks`; those are built in memory when loading one.
+MAGIC = b"BPEB"
+VERSION = 2
+HEADER = struct.Struct("<4s7I")
+
+
+def _int_view(buffer, typecode="I"):
+    if sys.byteorder == "big":
+        # The file is little-endian; fall back to a byte-swapped copy
+        values = array(typecode, buffer.tobytes())
+        values.byteswap()
+        return memoryview(values)
+    return buffer.cast(typecode)
+
+
+def _to_le_bytes(values, typecode="I"):
+    packed = array(typecode, values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def pair_key(p0, p1):
+    return (p0 << 32) | p1
+
+
+class MergeRanks(Mapping):
+    """Read-only `{(p0, p1): idx}` merge table over sorted uint64 pair keys.
+
+    Lookups binary-search the (memory-mapped) key array, so loading parses and
+    copies nothing; each process only keeps an LRU cache of up to
+    `cache_size` pairs it has actually looked up. Iteration is in key order.
+    """
+
+    def __init__(self, keys, ranks, cache_size=1 << 16):
+        self.keys = keys
+        self.ranks = ranks
+        self._lookup = functools.lru_cache(maxsize=cache_size)(self._lookup_uncached)
+
+    def _lookup_uncached(self, pair):
+        p0, p1 = pair
+        if not (0 <= p0 < 1 << 32 and 0 <= p1 < 1 << 32):
+            return None
+        key = pair_key(p0, p1)
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.ranks[i]
+        return None
+
+    def get(self, pair, default=None):
+        rank = self._lookup(pair)
+        return default if rank is None else rank
+
+    def __getitem__(self, pair):
+        rank = self._lookup(pair)
+        if rank is None:
+            raise KeyError(pair)
+        return rank
+
+    def __contains__(self, pair):
+        return isinstance(pair, tuple) and len(pair) == 2 and self._lookup(pair) is not None
+
+    def __iter__(self):
+        return ((key >> 32, key & 0xFFFFFFFF) for key in self.keys)
+
+    def __len__(self):
+        return len(self.keys)
+
+
+class BlobVocab:
+    """Read-only token ID -> bytes mapping backed by a byte blob and offsets table."""
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __getitem__(self, idx):
+        if not 0 <= idx < len(self):
+            raise KeyError(idx)
+        return self.blob[self.offsets[idx]:self.offsets[idx + 1]].tobytes()
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __contains__(self, idx):
+        return isinstance(idx, int) and 0 <= idx < len(self)
+
+
+class BPEModel:
+    """A tokenizer model loaded from the binary format, without per-entry parsing.
+
+    The file is memory-mapped read-only, so every process that loads the same
+    model shares its pages. `ranks` (what the encoders use), `merge_table`,
+    `offsets` and `blob` are zero-copy views into the mapping.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(self._mmap)
+        self._views = [buffer]
+
+        if len(buffer) < HEADER.size:
+            raise ValueError(f"{path} is not a binary BPE model")
+        magic, version, num_merges, vocab_size, blob_size, *_ = HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a binary BPE model")
+        if version not in (1, VERSION):
+            raise ValueError(f"Unsupported BPE model version {version}")
+        key_bytes = 12 * num_merges if version >= 2 else 0
+        expected = HEADER.size + key_bytes + 12 * num_merges + 4 * (vocab_size + 1) + blob_size
+        if len(buffer) < expected:
+            raise ValueError(f"{path} is truncated: {len(buffer)} bytes, the header implies {expected}")
+
+        start = HEADER.size
+        if version >= 2:
+            keys = self._view(buffer[start:start + 8 * num_merges], "Q")
+            start += 8 * num_merges
+            ranks = self._view(buffer[start:start + 4 * num_merges], "I")
+            start += 4 * num_merges
+        end = start + 12 * num_merges
+        self.merge_table = self._view(buffer[start:end], "I")
+        start, end = end, end + 4 * (vocab_size + 1)
+        self.offsets = self._view(buffer[start:end], "I")
+        self.blob = self._view(buffer[end:end + blob_size])
+        self.vocab = BlobVocab(self.offsets, self.blob)
+        if version < 2:
+            # No sorted key section: build one (a private copy) from the merge rows
+            keys, ranks = _sorted_keys(self.merge_table)
+        self.ranks = MergeRanks(keys, ranks)
+
+    def _view(self, view, typecode=None):
+        self._views.append(view)
+        if typecode is not None:
+            view = _int_view(view, typecode)
+            self._views.append(view)
+        return view
+
+    @functools.cached_property
+    def merges(self):
+        """The merges as a `{(p0, p1): idx}` dict in merge order, as returned by `load_merges`.
+
+        A compatibility shim (e.g. for re-exporting to JSON): it builds a
+        private dict of every merge, which is what the format avoids. Encode
+        with `ranks` instead.
+        """
+        table = self.merge_table
+        return dict(zip(zip(table[0::3], table[1::3]), table[2::3]))
+
+    def close(self):
+        """Release the views and unmap the file; the model is unusable afterwards."""
+        self.merge_table = self.offsets = self.blob = self.vocab = self.ranks = None
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _sorted_keys(merge_table):
+    rows = sorted((pair_key(p0, p1), idx) for p0, p1, idx in zip(merge_table[0::3], merge_table[1::3],
+                                                                  merge_table[2::3]))
+    return array("Q", [key for key, _ in rows]), array("I", [idx for _, idx in rows])
+
+
+def save_model(merges, path):
+    """Write a merges dictionary, and the vocab it implies, in the binary format."""
+    vocab = build_vocab(merges)
+    vocab_size = max(vocab) + 1
+
+    offsets = [0]
+    for idx in range(vocab_size):
+        offsets.append(offsets[-1] + len(vocab.get(idx, b"")))
+    blob = b"".join(vocab.get(idx, b"") for idx in range(vocab_size))
+    table = [value for (p0, p1), idx in merges.items() for value in (p0, p1, idx)]
+    keys, ranks = _sorted_keys(table)
+
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(merges), vocab_size, len(blob), 0, 0, 0))
+        file.write(_to_le_bytes(keys, "Q"))
+        file.write(_to_le_bytes(ranks))
+        file.write(_to_le_bytes(table))
+        file.write(_to_le_bytes(offsets))
+        file.write(blob)
+
+
+def load_model(path):
+    """Memory-map a binary model written by `save_model`."""
+    return BPEModel(path)
+
+
+def load_tokenizer(model_path="hindi_bpe.bin", json_path="hindi_bpe.json"):
+    """Return `(merges, vocab)`, preferring the binary model when it exists.
+
+    From the binary model, `merges` is its mmap-backed `MergeRanks`, not a dict.
+    """
+    if os.path.exists(model_path):
+        model = load_model(model_path)
+        return model.ranks, model.vocab
+    merges = load_merges(json_path)
+    return merges, build_vocab(merges)
+
+
+def convert_json(json_path, model_path):
+    """Convert a merges JSON file (e.g. hindi_bpe.json) to the binary format."""
+    merges = load_merges(json_path)
+    save_model(merges, model_path)
+    return len(merges)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a merges JSON file to the binary model format.")
+    parser.add_argument("input", nargs="?", default="hindi_bpe.json", help="Merges JSON file")
+    parser.add_argument("output", nargs="?", default="hindi_bpe.bin", help="Binary model to write")
+    args = parser.parse_args()
+
+    count = convert_json(args.input, args.output)
+    print(f"Wrote {count} merges to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import asyncio
+import functools
+from typing import List
+
+import gradio as gr
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+import app as ui
+from fast_decode import parse_token_ids
+from tokenizer_pool import QueueFull, TokenizerPool
+
+
+class EncodeRequest(BaseModel):
+    text: str
+
+
+class DecodeRequest(BaseModel):
+    tokens: List[int]
+
+
+def create_app(pool, concurrency=4, queue_size=64):
+    """Build a FastAPI app serving the JSON API at /api and the Gradio UI at /."""
+    api = FastAPI(title="BPE Tokenizer")
+
+    @api.post("/api/encode")
+    async def api_encode(request: EncodeRequest):
+        try:
+            tokens = await asyncio.wrap_future(pool.encode(request.text))
+        except QueueFull as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        return {"tokens": tokens, "count": len(tokens)}
+
+    @api.post("/api/decode")
+    async def api_decode(request: DecodeRequest):
+        try:
+            text = await asyncio.wrap_future(pool.decode(request.tokens))
+        except QueueFull as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except (ValueError, OverflowError) as e:  # unknown IDs, or IDs too large for int64
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"text": text}
+
+    # Keeps recent encodings so paging through a long text does not re-encode it
+    @functools.lru_cache(maxsize=16)
+    def encode_remote(text):
+        return tuple(pool.encode(text).result())
+
+    def encode_and_highlight(text, page=1):
+        try:
+            return ui.render_tokens(encode_remote(text), page)
+        except QueueFull as e:
+            raise gr.Error(str(e))
+
+    def decode_tokens(token_string):
+        try:
+            return pool.decode(parse_token_ids(token_string)).result()
+        except QueueFull as e:
+            raise gr.Error(str(e))
+        except Exception as e:
+            return f"Error decoding tokens: {e}"
+
+    demo = ui.app_interface(encode_fn=encode_and_highlight, decode_fn=decode_tokens)
+    demo.queue(default_concurrency_limit=concurrency, max_size=queue_size)
+    return gr.mount_gradio_app(api, demo, path="/")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the BPE tokenizer UI and JSON API from a worker pool.")
+    parser.add_argument("--workers", type=int, default=None, help="Tokenizer worker processes (default: all cores)")
+    parser.add_argument("--concurrency", type=int, default=4, help="UI events processed at once")
+    parser.add_argument("--queue-size", type=int, default=64, help="Maximum queued UI events")
+    parser.add_argument("--max-pending", type=int, default=64, help="Maximum distinct jobs queued on the worker pool")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7860)
+    args = parser.parse_args()
+
+    with TokenizerPool(workers=args.workers, max_pending=args.max_pending) as pool:
+        server = create_app(pool, concurrency=args.concurrency, queue_size=args.queue_size)
+        uvicorn.run(server, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import io
+import os
+from array import array
+
+import pytest
+
+from batch_encode import encode_batch, encode_file, encode_stream, iter_text_chunks
+from bpe import CachedEncoder, load_merges
+
+MERGES_PATH = os.path.join(os.path.dirname(__file__), "..", "hindi_bpe.json")
+
+TEXT = (
+    "भारत एक विशाल देश है। यहाँ अनेक भाषाएँ बोली जाती हैं।\n"
+    "हिंदी भारत की राजभाषा है   और इसे देवनागरी लिपि में लिखा जाता है।\n"
+    "Mixed text: दिल्ली is the capital, मुंबई is the financial hub. 123!  \n"
+) * 20
+
+
+@pytest.fixture(scope="module")
+def merges():
+    return load_merges(MERGES_PATH)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 1000])
+def test_chunks_split_on_word_boundaries(chunk_size):
+    chunks = list(iter_text_chunks(io.BytesIO(TEXT.encode("utf-8")), chunk_size))
+    assert "".join(chunks) == TEXT
+    for chunk in chunks[1:]:
+        assert chunk[0].isspace() and not chunk[1].isspace()
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_encode_stream_matches_whole_text(merges, processes):
+    expected = CachedEncoder(merges).encode(TEXT)
+    tokens = array("H")
+    for part in encode_stream(io.BytesIO(TEXT.encode("utf-8")), merges, processes=processes, chunk_size=50):
+        tokens.extend(part)
+    assert tokens.tolist() == expected
+
+
+def test_encode_batch_preserves_order(merges):
+    texts = TEXT.splitlines()
+    encoder = CachedEncoder(merges)
+    assert encode_batch(texts, merges, processes=2, chunksize=4) == [encoder.encode(text) for text in texts]
+
+
+def test_encode_file_writes_uint16(merges, tmp_path):
+    src = tmp_path / "input.txt"
+    dst = tmp_path / "tokens.bin"
+    src.write_text(TEXT, encoding="utf-8")
+    total = encode_file(src, dst, merges, processes=1, chunk_size=128)
+
+    tokens = array("H")
+    tokens.frombytes(dst.read_bytes())
+    assert len(tokens) == total == os.path.getsize(dst) // 2
+    assert tokens.tolist() == CachedEncoder(merges).encode(TEXT)
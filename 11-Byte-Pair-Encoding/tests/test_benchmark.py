@@ -0,0 +1,23 @@
+import json
+
+from benchmark import BENCHMARKS, make_text, run, scaling_exponent
+
+
+def test_make_text_sizes():
+    for kind in ("sample", "synthetic"):
+        text = make_text(1000, kind)
+        assert 990 <= len(text.encode("utf-8")) <= 1000
+
+
+def test_scaling_exponent():
+    assert abs(scaling_exponent([(1, 1.0), (10, 10.0), (100, 100.0)]) - 1.0) < 1e-9
+    assert abs(scaling_exponent([(1, 1.0), (10, 100.0)]) - 2.0) < 1e-9
+    assert scaling_exponent([(1, 1.0)]) is None
+
+
+def test_run_emits_json_report():
+    report = run(sizes=[256, 512], kinds=("sample",), repeat=1, memory=True)
+    assert {r["name"] for r in report["results"]} == set(BENCHMARKS)
+    assert all(r["units_per_second"] and r["peak_memory_bytes"] > 0 for r in report["results"])
+    assert report["scaling"]["encode/sample"]["exponent"] is not None
+    json.dumps(report)
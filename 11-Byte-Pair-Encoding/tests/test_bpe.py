@@ -0,0 +1,57 @@
+import os
+import random
+
+import pytest
+
+from bpe import CachedEncoder, build_vocab, decode, encode, encode_naive, load_merges, pretokenize
+
+MERGES_PATH = os.path.join(os.path.dirname(__file__), "..", "hindi_bpe.json")
+
+SAMPLE_TEXTS = [
+    "",
+    "क",
+    "नमस्ते, आप कैसे हैं?",
+    "भारत एक विशाल देश है। यहाँ अनेक भाषाएँ बोली जाती हैं।",
+    "हिंदी भारत की राजभाषा है और इसे देवनागरी लिपि में लिखा जाता है।",
+    "Mixed text: दिल्ली is the capital, मुंबई is the financial hub. 123!",
+    "aaaaaaa बबबबबब    \n\t  ",
+]
+
+
+@pytest.fixture(scope="module")
+def merges():
+    return load_merges(MERGES_PATH)
+
+
+@pytest.mark.parametrize("text", SAMPLE_TEXTS)
+def test_encode_matches_naive(merges, text):
+    assert encode(text, merges) == encode_naive(text, merges)
+
+
+def test_encode_matches_naive_on_random_text(merges):
+    random.seed(42)
+    alphabet = "कखगघचछजझटठडढणतथदधनपफबभमयरलवशसहािीुूेैोौंँ्ः।  ,.abc"
+    for _ in range(20):
+        text = "".join(random.choice(alphabet) for _ in range(random.randint(1, 300)))
+        assert encode(text, merges) == encode_naive(text, merges)
+
+
+def test_encode_round_trip(merges):
+    vocab = build_vocab(merges)
+    for text in SAMPLE_TEXTS:
+        assert decode(encode(text, merges), vocab) == text
+
+
+@pytest.mark.parametrize("text", SAMPLE_TEXTS + ["snake_case __init__ ²³ é́"])
+def test_pretokenize_covers_input(text):
+    assert "".join(pretokenize(text)) == text
+
+
+def test_cached_encoder_matches_chunk_encoding(merges):
+    encoder = CachedEncoder(merges, maxsize=128)
+    text = " ".join(SAMPLE_TEXTS) * 3
+    expected = [t for chunk in pretokenize(text) for t in encode(chunk, merges)]
+    assert encoder.encode(text) == expected
+    assert decode(encoder.encode(text), build_vocab(merges)) == text
+    assert encoder.cache_info().hits > 0
+    assert 0.0 < encoder.hit_rate < 1.0
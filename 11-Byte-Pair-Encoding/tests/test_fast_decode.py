@@ -0,0 +1,68 @@
+import os
+from array import array
+
+import pytest
+
+from bpe import build_vocab, decode, encode, load_merges
+import fast_decode
+from fast_decode import VectorDecoder, parse_token_ids
+from model_format import load_model, save_model
+
+MERGES_PATH = os.path.join(os.path.dirname(__file__), "..", "hindi_bpe.json")
+TEXT = "भारत एक विशाल देश है। यहाँ अनेक भाषाएँ बोली जाती हैं। Mixed text, 123! " * 50
+
+
+@pytest.fixture(scope="module")
+def merges():
+    return load_merges(MERGES_PATH)
+
+
+@pytest.fixture(scope="module")
+def vocab(merges):
+    return build_vocab(merges)
+
+
+def test_vector_decode_matches_decode(merges, vocab):
+    ids = encode(TEXT, merges)
+    decoder = VectorDecoder.from_vocab(vocab, block_size=100)
+    assert decoder.decode(ids) == decode(ids, vocab) == TEXT
+    assert decoder.decode(array("H", ids)) == TEXT
+    assert decoder.decode([]) == ""
+
+
+def test_vector_decode_without_numpy(merges, vocab, monkeypatch):
+    monkeypatch.setattr(fast_decode, "np", None)
+    ids = encode(TEXT, merges)
+    assert VectorDecoder.from_vocab(vocab).decode(ids) == TEXT
+    assert list(parse_token_ids("1, 2,300")) == [1, 2, 300]
+
+
+def test_vector_decode_from_binary_model(merges, tmp_path):
+    path = tmp_path / "hindi_bpe.bin"
+    save_model(merges, path)
+    with load_model(path) as model:
+        decoder = VectorDecoder.from_model(model)
+        assert decoder.decode(encode(TEXT, merges)) == TEXT
+        del decoder
+
+
+def test_vector_decode_rejects_unknown_ids(vocab):
+    decoder = VectorDecoder.from_vocab(vocab)
+    with pytest.raises(ValueError):
+        decoder.decode([1, len(vocab)])
+    with pytest.raises(ValueError):
+        decoder.decode([-1])
+
+
+def test_stream_decoder_handles_split_utf8(vocab):
+    # Byte-level IDs split every Devanagari character across chunks
+    ids = list("नमस्ते दुनिया".encode("utf-8"))
+    stream = VectorDecoder.from_vocab(vocab).stream()
+    text = "".join(stream.feed(ids[i:i + 2]) for i in range(0, len(ids), 2)) + stream.flush()
+    assert text == "नमस्ते दुनिया"
+
+
+def test_parse_token_ids():
+    assert list(parse_token_ids("1, 2,300")) == [1, 2, 300]
+    with pytest.raises(ValueError):
+        parse_token_ids("1, 99999999999999999999")
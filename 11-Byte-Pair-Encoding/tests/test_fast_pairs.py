@@ -0,0 +1,59 @@
+import random
+
+import numpy as np
+import pytest
+
+import bpe
+import fast_pairs
+from fast_pairs import get_stats_array, get_stats_dict, merge_array
+
+TEXT = "भारत एक विशाल देश है। यहाँ अनेक भाषाएँ बोली जाती हैं। aaaa bbbbb " * 40
+
+
+def reference(monkeypatch, fn, *args):
+    """The pure-Python `bpe` implementation of `fn`."""
+    with monkeypatch.context() as patch:
+        patch.setattr(fast_pairs, "np", None)
+        return fn(*args)
+
+
+def random_ids(rng, n, vocab_size):
+    # Few distinct tokens, so pairs repeat and same-token runs (overlapping matches) are common
+    return [rng.randrange(vocab_size) for _ in range(n)]
+
+
+@pytest.mark.parametrize("vocab_size", [3, 256, 5000, 70000])
+def test_get_stats_matches_python_including_order(monkeypatch, vocab_size):
+    rng = random.Random(vocab_size)
+    for n in [0, 1, 2, 3, 600, 5000]:
+        ids = random_ids(rng, n, vocab_size)
+        expected = reference(monkeypatch, bpe.get_stats, ids)
+        assert list(get_stats_dict(ids).items()) == list(expected.items())
+        assert list(bpe.get_stats(np.array(ids, dtype=np.uint32)).items()) == list(expected.items())
+        pairs, counts = get_stats_array(ids)
+        assert dict(zip(map(tuple, pairs.tolist()), counts.tolist())) == expected
+
+
+@pytest.mark.parametrize("vocab_size", [2, 5, 300])
+def test_merge_matches_python_on_overlapping_pairs(monkeypatch, vocab_size):
+    rng = random.Random(vocab_size)
+    for n in [0, 1, 2, 7, 1000]:
+        ids = random_ids(rng, n, vocab_size)
+        for pair in [(0, 0), (1, 1), (0, 1), (1, 0), (vocab_size + 1, 0)]:
+            expected = reference(monkeypatch, bpe.merge, ids, pair, 9999)
+            assert merge_array(ids, pair, 9999).tolist() == expected
+    assert merge_array([7, 7, 7, 7, 7, 1, 7, 7], (7, 7), 8).tolist() == [8, 8, 7, 1, 8]
+
+
+def test_bpe_functions_dispatch_to_arrays_with_identical_results(monkeypatch):
+    ids = list(TEXT.encode("utf-8"))
+    assert len(ids) >= fast_pairs.MIN_ARRAY_LENGTH
+    stats = bpe.get_stats(ids)
+    assert list(stats.items()) == list(reference(monkeypatch, bpe.get_stats, ids).items())
+    assert all(type(key[0]) is int and type(count) is int for key, count in stats.items())
+
+    pair = max(stats, key=stats.get)
+    merged = bpe.merge(ids, pair, 256)
+    assert type(merged) is list and merged == reference(monkeypatch, bpe.merge, ids, pair, 256)
+    merged_array = bpe.merge(np.array(ids, dtype=np.uint32), pair, 256)
+    assert merged_array.dtype == np.uint32 and merged_array.tolist() == merged
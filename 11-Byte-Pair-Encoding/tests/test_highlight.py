@@ -0,0 +1,64 @@
+import json
+import os
+
+import pytest
+
+from highlight import TokenHighlighter
+
+COLORS_PATH = os.path.join(os.path.dirname(__file__), "..", "token_colors.json")
+IDS = [300, 301, 301, 72, 105, 0, 4863, 5000]
+
+
+@pytest.fixture(scope="module")
+def token_colors():
+    with open(COLORS_PATH, "r") as file:
+        return json.load(file)
+
+
+def reference_render(ids, token_colors):
+    highlighted_text = ""
+    for token in ids:
+        color = token_colors.get(str(token), "#E0E0E0")
+        highlighted_text += f'<span style="background-color: {color}; padding: 2px; border-radius: 5px; margin: 2px">{token}</span> '
+    return highlighted_text
+
+
+def test_render_matches_reference(token_colors):
+    highlighter = TokenHighlighter(token_colors, vocab_size=4864)
+    assert highlighter.render(IDS) == reference_render(IDS, token_colors)
+    assert highlighter.render([]) == ""
+
+
+def test_render_escapes_labels(token_colors):
+    highlighter = TokenHighlighter(token_colors, vocab_size=256, label=chr, separator="")
+    assert ">&lt;</span>" in highlighter.render([ord("<")])
+
+
+def test_coalesce_merges_same_color_runs():
+    highlighter = TokenHighlighter({"1": "#111111", "2": "#111111", "3": "#333333"}, vocab_size=4)
+    rendered = highlighter.render([1, 2, 3, 1], coalesce=True)
+    assert rendered.count("<span") == 3
+    assert "#111111; padding: 2px; border-radius: 5px; margin: 2px\">1 2</span>" in rendered
+
+
+def test_render_page_only_renders_window(token_colors):
+    highlighter = TokenHighlighter(token_colors)
+    ids = list(range(1000)) * 10
+    rendered, num_pages = highlighter.render_page(ids, page=3, page_size=400)
+    assert num_pages == 25
+    assert rendered == highlighter.render(ids[800:1200])
+    assert highlighter.render_page(ids, page=99, page_size=400)[0] == highlighter.render(ids[9600:])
+
+
+def test_negative_ids_are_not_read_from_the_end_of_the_table(token_colors):
+    highlighter = TokenHighlighter(token_colors, vocab_size=4864)
+    ids = [300, -1, 72]
+    assert highlighter.render(ids) == reference_render(ids, token_colors)
+    assert highlighter.render(iter(ids)) == reference_render(ids, token_colors)
+    assert ">-1</span>" in highlighter.render(ids, coalesce=True)
+
+
+def test_cleared_page_number_shows_the_first_page(token_colors):
+    highlighter = TokenHighlighter(token_colors, vocab_size=4864)
+    ids = list(range(1000))
+    assert highlighter.render_page(ids, page=None, page_size=400) == highlighter.render_page(ids, 1, 400)
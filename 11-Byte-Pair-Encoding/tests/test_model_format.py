@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from bpe import build_vocab, decode, encode, load_merges
+from model_format import HEADER, MAGIC, MergeRanks, _to_le_bytes, load_model, load_tokenizer, save_model
+
+MERGES_PATH = os.path.join(os.path.dirname(__file__), "..", "hindi_bpe.json")
+
+
+@pytest.fixture(scope="module")
+def merges():
+    return load_merges(MERGES_PATH)
+
+
+def test_load_merges_parses_pair_keys(merges):
+    assert merges[(224, 164)] == 256
+    assert all(isinstance(p0, int) and isinstance(p1, int) for p0, p1 in merges)
+
+
+def test_binary_model_round_trip(merges, tmp_path):
+    path = tmp_path / "hindi_bpe.bin"
+    save_model(merges, path)
+
+    with load_model(path) as model:
+        assert model.merges == merges
+        vocab = build_vocab(merges)
+        assert len(model.vocab) == len(vocab)
+        assert all(model.vocab[idx] == token for idx, token in vocab.items())
+
+        text = "हिंदी भारत की राजभाषा है।"
+        assert decode(encode(text, model.merges), model.vocab) == text
+
+
+def test_ranks_encode_from_the_mapping_without_a_dict(merges, tmp_path):
+    path = tmp_path / "hindi_bpe.bin"
+    save_model(merges, path)
+
+    with load_model(path) as model:
+        ranks = model.ranks
+        assert isinstance(ranks, MergeRanks) and "merges" not in vars(model)
+        assert len(ranks) == len(merges) and dict(ranks.items()) == merges
+        assert ranks.get((224, 164)) == 256 and (224, 164) in ranks
+        assert ranks.get((1 << 33, 0)) is None and (0, -1) not in ranks and ranks.get((0, 0), -1) == -1
+        with pytest.raises(KeyError):
+            ranks[(0, 0)]
+        text = "भारत एक विशाल देश है। Mixed text, 123!"
+        assert encode(text, ranks) == encode(text, merges)
+        assert "merges" not in vars(model)
+
+    loaded, _ = load_tokenizer(path, MERGES_PATH)
+    assert isinstance(loaded, MergeRanks)
+
+
+def test_version_1_models_still_load(merges, tmp_path):
+    vocab = build_vocab(merges)
+    offsets = [0]
+    for idx in range(len(vocab)):
+        offsets.append(offsets[-1] + len(vocab[idx]))
+    blob = b"".join(vocab[idx] for idx in range(len(vocab)))
+    table = [value for (p0, p1), idx in merges.items() for value in (p0, p1, idx)]
+    path = tmp_path / "v1.bin"
+    path.write_bytes(HEADER.pack(MAGIC, 1, len(merges), len(vocab), len(blob), 0, 0, 0)
+                     + _to_le_bytes(table) + _to_le_bytes(offsets) + blob)
+
+    with load_model(path) as model:
+        assert model.merges == merges and dict(model.ranks.items()) == merges
+
+
+def test_truncated_model_raises(merges, tmp_path):
+    path = tmp_path / "hindi_bpe.bin"
+    save_model(merges, path)
+    data = path.read_bytes()
+    for size in [10, HEADER.size + 100, len(data) - 1]:
+        path.write_bytes(data[:size])
+        with pytest.raises(ValueError):
+            load_model(path)
+
+
+def test_load_model_rejects_other_files(tmp_path):
+    path = tmp_path / "not_a_model.bin"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        load_model(path)
+
+
+def test_load_tokenizer_falls_back_to_json(merges, tmp_path):
+    loaded_merges, vocab = load_tokenizer(tmp_path / "missing.bin", MERGES_PATH)
+    assert loaded_merges == merges
+    assert vocab == build_vocab(merges)
@@ -0,0 +1,25 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from serve import create_app
+from tokenizer_pool import TokenizerPool
+
+MERGES_PATH = os.path.join(os.path.dirname(__file__), "..", "hindi_bpe.json")
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TokenizerPool(workers=1, model_path="missing.bin", json_path=MERGES_PATH) as pool:
+        yield TestClient(create_app(pool))
+
+
+def test_api_round_trip(client):
+    tokens = client.post("/api/encode", json={"text": "हिंदी भारत"}).json()["tokens"]
+    assert client.post("/api/decode", json={"tokens": tokens}).json() == {"text": "हिंदी भारत"}
+
+
+def test_api_decode_rejects_token_ids_too_large_for_int64(client):
+    response = client.post("/api/decode", json={"tokens": [1, 2 ** 70]})
+    assert response.status_code == 400
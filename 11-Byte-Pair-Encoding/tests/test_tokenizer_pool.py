@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+from bpe import encode, load_merges
+from tokenizer_pool import QueueFull, TokenizerPool
+
+MERGES_PATH = os.path.join(os.path.dirname(__file__), "..", "hindi_bpe.json")
+TEXT = "हिंदी भारत की राजभाषा है।"
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with TokenizerPool(workers=2, max_pending=2, model_path="missing.bin", json_path=MERGES_PATH) as pool:
+        yield pool
+
+
+def test_pool_encode_and_decode(pool):
+    tokens = pool.encode(TEXT).result()
+    assert tokens == encode(TEXT, load_merges(MERGES_PATH))
+    assert pool.decode(tokens).result() == TEXT
+
+
+def test_pool_coalesces_identical_requests(pool):
+    text = TEXT * 2000
+    coalesced = pool.coalesced
+    first = pool.encode(text)
+    second = pool.encode(text)
+    assert first is second
+    assert pool.coalesced == coalesced + 1
+    first.result()
+    assert pool.drain(timeout=10)
+    assert pool.pending == 0
+
+
+def test_pool_rejects_when_queue_is_full(pool):
+    assert pool.drain(timeout=10)
+    futures = [pool.encode(TEXT * 2000), pool.encode(TEXT * 2001)]
+    with pytest.raises(QueueFull):
+        pool.encode(TEXT * 2002)
+    for future in futures:
+        future.result()
+
+
+def test_pool_decode_errors_propagate(pool):
+    with pytest.raises(ValueError):
+        pool.decode([10 ** 6]).result()
@@ -0,0 +1,48 @@
+import collections
+
+from bpe import CachedEncoder, build_vocab, decode, get_stats, merge, pretokenize
+from train_bpe import count_words, train
+
+CORPUS = (
+    "भारत एक विशाल देश है। यहाँ अनेक भाषाएँ बोली जाती हैं। "
+    "हिंदी भारत की राजभाषा है और इसे देवनागरी लिपि में लिखा जाता है। "
+    "aaaa aaaaa abab ababab banana bandana "
+) * 5
+
+
+def naive_train(word_counts, vocab_size):
+    words = {word: list(word.encode("utf-8")) for word in word_counts}
+    merges = {}
+    for idx in range(256, vocab_size):
+        stats = collections.Counter()
+        for word, ids in words.items():
+            for pair, count in get_stats(ids).items():
+                stats[pair] += count * word_counts[word]
+        if not stats:
+            break
+        pair = min(stats, key=lambda p: (-stats[p], p))
+        merges[pair] = idx
+        words = {word: merge(ids, pair, idx) for word, ids in words.items()}
+    return merges
+
+
+def test_train_matches_naive_training():
+    word_counts = collections.Counter(pretokenize(CORPUS))
+    assert train(word_counts, 400) == naive_train(word_counts, 400)
+
+
+def test_train_stops_when_no_pairs_remain():
+    merges = train(collections.Counter({"ab": 3}), 1000)
+    assert merges == {(97, 98): 256}
+
+
+def test_trained_merges_round_trip(tmp_path):
+    corpus = tmp_path / "corpus.txt"
+    corpus.write_text(CORPUS, encoding="utf-8")
+    word_counts = count_words([corpus], chunk_size=64)
+    assert word_counts == collections.Counter(pretokenize(CORPUS))
+
+    merges = train(word_counts, 350)
+    assert list(merges.values()) == list(range(256, 256 + len(merges)))
+    encoder = CachedEncoder(merges)
+    assert decode(encoder.encode(CORPUS), build_vocab(merges)) == CORPUS
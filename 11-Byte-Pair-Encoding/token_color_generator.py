@@ -1,6 +1,10 @@
 import gradio as gr
 import json
 
+from bpe import decode, encode
+from highlight import TokenHighlighter
+from model_format import load_tokenizer
+
 # Load token-to-color mappings from a JSON file
 def load_token_colors(filename):
     with open(filename, "r") as file:
@@ -8,76 +12,16 @@ def load_token_colors(filename):
 
 token_colors = load_token_colors("token_colors.json")
 
-# Counts the occurrences of consecutive pairs of elements in the ids list and returns a dictionary with these pairs as keys and their counts as values.
-def get_stats(ids):
-    counts = {}
-    for pair in zip(ids, ids[1:]):
-        counts[pair] = counts.get(pair, 0) + 1
-    return counts
-
-
-def load_merges(filename):
-    """Load the merges dictionary from a JSON file."""
-    with open(filename, "r") as file:
-        loaded_data = json.load(file)
-        return {eval(key): value for key, value in loaded_data.items()}
-
-
-def merge(ids, pair, idx):
-    """Merge consecutive pairs of elements in the list."""
-    newids = []
-    i = 0
-    while i < len(ids):
-        if i < len(ids) - 1 and ids[i] == pair[0] and ids[i + 1] == pair[1]:
-            newids.append(idx)
-            i += 2
-        else:
-            newids.append(ids[i])
-            i += 1
-    return newids
-
-
-def encode(text, merges):
-    """Encode a string into tokens using a merge table."""
-    tokens = list(text.encode("utf-8"))
-    
-    while len(tokens) >= 2:
-        stats = get_stats(tokens)
-        pair = min(stats, key=lambda p: merges.get(p, float("inf")))
-        
-        if pair not in merges:
-            break
-        
-        idx = merges[pair]
-        tokens = merge(tokens, pair, idx)
-    
-    return tokens
-
-
-def decode(ids, vocab):
-    """Decode a list of token IDs back into a string."""
-    tokens = b"".join(vocab[idx] for idx in ids)
-    text = tokens.decode("utf-8", errors="replace")
-    return text
-
-
-merges = load_merges("hindi_bpe.json")
-
-vocab = {idx: bytes([idx]) for idx in range(256)}
-for (p0, p1), idx in merges.items():
-    vocab[idx] = vocab[p0] + vocab[p1]
+# Uses hindi_bpe.bin when present (see model_format.py), else hindi_bpe.json
+merges, vocab = load_tokenizer("hindi_bpe.bin", "hindi_bpe.json")
+highlighter = TokenHighlighter(token_colors, vocab_size=len(vocab))
+decoded_highlighter = TokenHighlighter(token_colors, vocab_size=len(vocab), label=chr, separator="")
 
 
 def encode_and_highlight(text):
     """Encode text and highlight tokens based on ID."""
     tokens = encode(text, merges)
-    highlighted_text = ""
-    
-    for token in tokens:
-        color = token_colors.get(str(token), "#E0E0E0")
-        highlighted_text += f'<span style="background-color: {color}; padding: 2px; border-radius: 5px; margin: 2px">{token}</span> '
-    
-    return highlighted_text
+    return highlighter.render(tokens)
 
 
 def decode_tokens_with_highlight(token_string):
@@ -85,12 +29,7 @@ def decode_tokens_with_highlight(token_string):
     try:
         token_ids = list(map(int, token_string.split(',')))
         decoded_text = decode(token_ids, vocab)
-        highlighted_text = ""
-        
-        for token_id in token_ids:
-            color = token_colors.get(str(token_id), "#E0E0E0")
-            highlighted_text += f'<span style="background-color: {color}; padding: 2px; border-radius: 5px; margin: 2px">{chr(token_id)}</span>'
-        
+        highlighted_text = decoded_highlighter.render(token_ids)
         return highlighted_text if highlighted_text else decoded_text
     except Exception as e:
         return f"Error decoding tokens: {e}"
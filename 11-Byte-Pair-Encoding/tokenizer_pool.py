@@ -0,0 +1,95 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from bpe import encode
+from fast_decode import VectorDecoder
+from model_format import load_tokenizer
+
+_worker_merges = None
+_worker_decoder = None
+
+
+def _init_worker(model_path, json_path):
+    global _worker_merges, _worker_decoder
+    _worker_merges, vocab = load_tokenizer(model_path, json_path)
+    _worker_decoder = VectorDecoder.from_vocab(vocab)
+
+
+def _worker_encode(text):
+    return encode(text, _worker_merges)
+
+
+def _worker_decode(ids):
+    return _worker_decoder.decode(ids)
+
+
+class QueueFull(RuntimeError):
+    """Raised when a request arrives while `max_pending` jobs are already queued."""
+
+
+class TokenizerPool:
+    """Run encode/decode jobs on a pool of worker processes.
+
+    Identical requests that arrive while one is still running share its
+    future instead of being computed again, and at most `max_pending`
+    distinct jobs may be queued or running at once.
+    """
+
+    def __init__(self, workers=None, max_pending=64, model_path="hindi_bpe.bin", json_path="hindi_bpe.json"):
+        self.max_pending = max_pending
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(model_path, json_path)
+        )
+        self._lock = threading.Condition()
+        self._in_flight = {}
+        self.coalesced = 0
+
+    def _submit(self, key, fn, arg):
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            if len(self._in_flight) >= self.max_pending:
+                raise QueueFull(f"Tokenizer queue is full ({self.max_pending} pending jobs)")
+            future = self._executor.submit(fn, arg)
+            self._in_flight[key] = future
+        future.add_done_callback(lambda _: self._finish(key))
+        return future
+
+    def _finish(self, key):
+        with self._lock:
+            self._in_flight.pop(key, None)
+            self._lock.notify_all()
+
+    def drain(self, timeout=None):
+        """Wait until no jobs are pending; returns False if `timeout` seconds pass first.
+
+        A job's future resolves before its done-callback removes it from the
+        pending set, so use this rather than `.result()` to know it is gone.
+        """
+        with self._lock:
+            return self._lock.wait_for(lambda: not self._in_flight, timeout)
+
+    @property
+    def pending(self):
+        with self._lock:
+            return len(self._in_flight)
+
+    def encode(self, text):
+        """Return a future for the token IDs of `text`."""
+        return self._submit(("encode", text), _worker_encode, text)
+
+    def decode(self, ids):
+        """Return a future for the text of the token IDs `ids`."""
+        ids = tuple(ids)
+        return self._submit(("decode", ids), _worker_decode, ids)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
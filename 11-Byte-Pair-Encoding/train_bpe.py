@@ -0,0 +1,98 @@
+import argparse
+import collections
+import heapq
+
+from batch_encode import iter_text_chunks
+from bpe import merge, pretokenize, save_merges
+
+
+def count_words(paths, chunk_size=1 << 20):
+    """Count unique pre-tokenized words across UTF-8 text files."""
+    word_counts = collections.Counter()
+    for path in paths:
+        with open(path, "rb") as file:
+            for chunk in iter_text_chunks(file, chunk_size):
+                word_counts.update(pretokenize(chunk))
+    return word_counts
+
+
+def train(word_counts, vocab_size, verbose=False):
+    """Learn `vocab_size - 256` merges from a word -> frequency mapping.
+
+    Pair counts and a pair -> word-index index are kept up to date after each
+    merge, so a merge only revisits the words that contain the merged pair.
+    The most frequent pair is taken from a lazy max-heap (ties go to the
+    smallest pair) and stale heap entries are skipped when popped.
+    """
+    if vocab_size < 256:
+        raise ValueError(f"vocab_size must be at least 256, got {vocab_size}")
+
+    words = [list(word.encode("utf-8")) for word in word_counts]
+    freqs = list(word_counts.values())
+
+    pair_counts = collections.defaultdict(int)
+    pair_words = collections.defaultdict(set)
+    for w, (word, freq) in enumerate(zip(words, freqs)):
+        for pair in zip(word, word[1:]):
+            pair_counts[pair] += freq
+            pair_words[pair].add(w)
+
+    heap = [(-count, pair) for pair, count in pair_counts.items()]
+    heapq.heapify(heap)
+
+    merges = {}
+    for idx in range(256, vocab_size):
+        while heap:
+            neg_count, pair = heapq.heappop(heap)
+            if pair_counts.get(pair) == -neg_count:
+                break
+        else:
+            break
+
+        merges[pair] = idx
+        changed = set()
+        for w in pair_words.pop(pair):
+            word = words[w]
+            new_word = merge(word, pair, idx)
+            if len(new_word) == len(word):
+                continue
+            freq = freqs[w]
+            for p in zip(word, word[1:]):
+                pair_counts[p] -= freq
+                changed.add(p)
+            for p in zip(new_word, new_word[1:]):
+                pair_counts[p] += freq
+                pair_words[p].add(w)
+                changed.add(p)
+            words[w] = new_word
+
+        for p in changed:
+            count = pair_counts[p]
+            if count > 0:
+                heapq.heappush(heap, (-count, p))
+            else:
+                del pair_counts[p]
+                pair_words.pop(p, None)
+
+        if verbose and (idx - 255) % 1000 == 0:
+            print(f"Merge {idx - 255}/{vocab_size - 256}: {pair} -> {idx} ({-neg_count} occurrences)")
+
+    return merges
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train a byte-level BPE merge table.")
+    parser.add_argument("corpus", nargs="+", help="UTF-8 text files to train on")
+    parser.add_argument("--vocab-size", type=int, default=5000, help="Final vocabulary size, including the 256 bytes")
+    parser.add_argument("--output", default="hindi_bpe.json", help="Where to write the merges JSON")
+    args = parser.parse_args()
+
+    word_counts = count_words(args.corpus)
+    print(f"Counted {len(word_counts)} unique words ({sum(word_counts.values())} total)")
+    merges = train(word_counts, args.vocab_size, verbose=True)
+    save_merges(merges, args.output)
+    print(f"Saved {len(merges)} merges to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
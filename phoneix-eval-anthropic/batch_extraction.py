@@ -0,0 +1,170 @@
+"""Bulk extraction through the Message Batches API, for datasets too large for per-request calls.
+
+Requests are packaged (with ``tool_choice`` forced to the extraction tool) into
+batches of up to ``max_batch_size``, submitted, polled until they end, and their
+JSONL results streamed back into a column in input order by ``custom_id``.
+Cached answers are never resubmitted and new answers are added to the cache.
+"""
+
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import anthropic
+
+from extraction import (
+    DEFAULT_MODEL,
+    build_message_params,
+    system_message as default_system_message,
+    tool_schema as default_tool_schema,
+)
+from response_cache import ResponseCache, cache_key
+
+# The API accepts up to 100,000 requests (and 256 MB) per batch
+MAX_BATCH_SIZE = 10_000
+
+
+class BatchError(RuntimeError):
+    """A batch request that didn't succeed (errored, canceled or expired)."""
+
+    def __init__(self, custom_id: str, result_type: str, detail: Any = None):
+        super().__init__(f"{custom_id}: {result_type} {detail or ''}".strip())
+        self.custom_id = custom_id
+        self.result_type = result_type
+        self.detail = detail
+
+
+def custom_id(index: int) -> str:
+    return f"request-{index}"
+
+
+def batch_request(index: int, params: Dict[str, Any]) -> Dict[str, Any]:
+    return {"custom_id": custom_id(index), "params": params}
+
+
+def chunked(items: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def wait_for_batch(
+    client: anthropic.Anthropic,
+    batch_id: str,
+    poll_interval: float = 5.0,
+    max_poll_interval: float = 60.0,
+    timeout: Optional[float] = None,
+) -> Any:
+    """Poll until the batch has ended, backing off the interval 1.5x per poll up to ``max_poll_interval``."""
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    while True:
+        batch = client.messages.batches.retrieve(batch_id)
+        if batch.processing_status == "ended":
+            return batch
+        if deadline is not None and time.monotonic() + poll_interval > deadline:
+            raise TimeoutError(f"Batch {batch_id} still {batch.processing_status} after {timeout}s")
+        time.sleep(poll_interval)
+        poll_interval = min(max_poll_interval, poll_interval * 1.5)
+
+
+def iter_batch_results(client: anthropic.Anthropic, batch_id: str) -> Iterator[Tuple[str, Any]]:
+    """Stream ``(custom_id, tool input or BatchError)`` pairs from an ended batch's results."""
+    for entry in client.messages.batches.results(batch_id):
+        result = entry.result
+        if result.type == "succeeded":
+            yield entry.custom_id, result.message.content[0].input
+        else:
+            detail = getattr(result, "error", None)
+            yield entry.custom_id, BatchError(entry.custom_id, result.type, getattr(detail, "error", detail))
+
+
+class BatchExtractor:
+    """Run extractions as Message Batches and collect them in input order.
+
+    ``run()`` submits every uncached request (all batches up front, so they
+    are processed in parallel), then waits for each batch and streams its
+    results. Requests that come back errored or expired are resubmitted up to
+    ``max_resubmits`` times; anything still failing is returned as a
+    ``BatchError`` in its place.
+    """
+
+    def __init__(
+        self,
+        client: anthropic.Anthropic,
+        model: str = DEFAULT_MODEL,
+        tool_schema: Dict[str, Any] = default_tool_schema,
+        system_message: str = default_system_message,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        poll_interval: float = 5.0,
+        max_poll_interval: float = 60.0,
+        timeout: Optional[float] = None,
+        max_resubmits: int = 1,
+        cache: Optional[ResponseCache] = None,
+    ):
+        self.client = client
+        self.model = model
+        self.tool_schema = tool_schema
+        self.system_message = system_message
+        self.max_batch_size = max_batch_size
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.timeout = timeout
+        self.max_resubmits = max_resubmits
+        self.cache = cache
+        self.batch_ids: List[str] = []
+
+    def submit(self, requests: Iterable[Dict[str, Any]]) -> List[str]:
+        """Create one batch per ``max_batch_size`` requests; returns their IDs."""
+        batch_ids = []
+        for chunk in chunked(list(requests), self.max_batch_size):
+            batch_ids.append(self.client.messages.batches.create(requests=list(chunk)).id)
+        self.batch_ids.extend(batch_ids)
+        return batch_ids
+
+    def collect(self, batch_ids: Iterable[str]) -> Iterator[Tuple[str, Any]]:
+        for batch_id in batch_ids:
+            wait_for_batch(self.client, batch_id, self.poll_interval, self.max_poll_interval, self.timeout)
+            yield from iter_batch_results(self.client, batch_id)
+
+    def run(
+        self,
+        travel_requests: Sequence[str],
+        on_result: Optional[Callable[[int, Any], None]] = None,
+    ) -> List[Any]:
+        """Extract every request; ``on_result(index, result)`` is called as each result streams in."""
+        results: List[Any] = [None] * len(travel_requests)
+        keys: Dict[int, str] = {}
+        pending: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        for index, travel_request in enumerate(travel_requests):
+            params = build_message_params(travel_request, self.tool_schema, self.system_message, self.model)
+            if self.cache is not None:
+                keys[index] = cache_key(params)
+                cached = self.cache.get(keys[index])
+                if cached is not None:
+                    results[index] = cached
+                    if on_result is not None:
+                        on_result(index, cached)
+                    continue
+            pending[custom_id(index)] = (index, params)
+
+        for attempt in range(self.max_resubmits + 1):
+            if not pending:
+                break
+            batch_ids = self.submit(batch_request(index, params) for index, params in pending.values())
+            failed = {}
+            for result_id, value in self.collect(batch_ids):
+                index, params = pending[result_id]
+                if isinstance(value, BatchError) and value.result_type in ("errored", "expired"):
+                    failed[result_id] = (index, params)
+                    if attempt < self.max_resubmits:
+                        continue
+                results[index] = value
+                if self.cache is not None and not isinstance(value, BatchError):
+                    self.cache.put(keys[index], value)
+                if on_result is not None:
+                    on_result(index, value)
+            pending = failed
+        return results
+
+
+def run_batch_extraction(travel_requests: Sequence[str], client: anthropic.Anthropic, **options: Any) -> List[Any]:
+    """Extract ``travel_requests`` with a ``BatchExtractor`` built from ``options``."""
+    return BatchExtractor(client, **options).run(travel_requests)
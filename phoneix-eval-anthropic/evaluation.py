@@ -0,0 +1,173 @@
+"""Schema validation and per-field scoring of extractions, joined to the traced spans.
+
+Everything works on whole columns so it scales to 100k+ extractions: the tool
+schema is compiled once into vectorized pandas checks (``required``, ``type``
+and ``enum``), and the ``jsonschema`` validator built from the same schema only
+runs on the rows those checks reject, to explain why. Schemas using other
+keywords are validated by the ``jsonschema`` validator alone.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import jsonschema
+import pandas as pd
+
+# Keywords the vectorized checks implement; anything else falls back to jsonschema
+VECTORIZED_KEYWORDS = {"type", "enum", "description"}
+# JSON types the vectorized checks implement; objects and arrays are recognized by the first character of their repr
+JSON_TYPES = {"string": None, "boolean": None, "object": "{", "array": "["}
+# ``infer_dtype`` kinds of columns that can hold strings alongside other values (and support ``.str``)
+MIXED_KINDS = {"mixed", "mixed-integer"}
+
+
+def default_normalizers() -> Dict[str, Callable[[pd.Series], pd.Series]]:
+    """Compare locations by city (text before the first comma), case-insensitively."""
+    # As object dtype, so a column left without strings (all masked as invalid, i.e. NaN floats) still has ``.str``
+    return {"location": lambda column: column.astype(object).str.split(",").str[0].str.strip().str.casefold()}
+
+
+def is_string(column: pd.Series) -> pd.Series:
+    """Element-wise "is a str" without a Python loop; only meaningful where the column is not null.
+
+    ``.str`` predicates yield NaN for non-strings (unlike ``.str.len()``, which
+    also measures lists and dicts). ``.str`` raises on columns without any
+    strings (all integers, all None), so those are ruled out first from the
+    column's inferred dtype.
+    """
+    kind = pd.api.types.infer_dtype(column, skipna=True)
+    if kind == "string":
+        return column.notna()
+    if kind in MIXED_KINDS:
+        return column.str.isspace().notna()
+    return pd.Series(False, index=column.index)
+
+
+def is_json_type(column: pd.Series, json_type: str) -> pd.Series:
+    """Element-wise check against a JSON Schema ``type`` from ``JSON_TYPES``, without a Python loop."""
+    if json_type == "string":
+        return is_string(column)
+    kind = pd.api.types.infer_dtype(column, skipna=True)
+    if kind == "empty":
+        return pd.Series(False, index=column.index)
+    if json_type == "boolean":
+        if kind == "boolean":
+            return column.notna()
+        # ``isin`` alone also matches 1 and 0, the text alone also matches "True"
+        return column.isin([True, False]) & column.astype(str).isin(["True", "False"])
+    if kind not in MIXED_KINDS:
+        return pd.Series(False, index=column.index)
+    return column.astype(str).str[0].eq(JSON_TYPES[json_type]) & ~is_string(column)
+
+
+class CompiledSchema:
+    """A tool ``input_schema`` compiled into column checks plus a reusable jsonschema validator."""
+
+    def __init__(self, tool_schema: Dict[str, Any]):
+        schema = tool_schema.get("input_schema", tool_schema)
+        validator_class = jsonschema.validators.validator_for(schema)
+        validator_class.check_schema(schema)
+        self.schema = schema
+        self.validator = validator_class(schema)
+        self.properties: Dict[str, Dict[str, Any]] = schema.get("properties", {})
+        self.required: List[str] = schema.get("required", [])
+        self.vectorized = set(schema) <= {"type", "properties", "required", "description"} and all(
+            set(spec) <= VECTORIZED_KEYWORDS and spec.get("type", "string") in JSON_TYPES
+            for spec in self.properties.values()
+        )
+
+    def _column_checks(self, frame: pd.DataFrame) -> pd.Series:
+        valid = pd.Series(True, index=frame.index)
+        for field, spec in self.properties.items():
+            if field not in frame:
+                if field in self.required:
+                    valid &= False
+                continue
+            column = frame[field]
+            present = column.notna()
+            ok = present if field in self.required else pd.Series(True, index=frame.index)
+            if "type" in spec:
+                ok &= ~present | is_json_type(column, spec["type"])
+            if "enum" in spec:
+                ok &= ~present | column.isin(spec["enum"])
+            valid &= ok
+        return valid
+
+    def validate(self, records: Sequence[Any], frame: pd.DataFrame) -> Tuple[pd.Series, pd.Series]:
+        """``(valid, errors)`` columns for ``records`` (already loaded into ``frame``).
+
+        The column checks are vectorized; only the "is a JSON object" test of
+        each raw record is a Python loop, part of reading the records in like
+        ``extractions_frame``.
+        """
+        is_object = pd.Series([isinstance(record, dict) for record in records], index=frame.index)
+        if self.vectorized:
+            valid = is_object & self._column_checks(frame)
+        else:
+            valid = pd.Series([self.validator.is_valid(record) for record in records], index=frame.index)
+        errors = pd.Series(None, index=frame.index, dtype=object)
+        for position in valid.index[~valid]:
+            errors[position] = "; ".join(error.message for error in self.validator.iter_errors(records[position]))
+        return valid, errors
+
+
+def extractions_frame(extractions: Sequence[Any]) -> pd.DataFrame:
+    """One row per extraction and one column per field; failed extractions become empty rows.
+
+    Building the frame walks the raw records in Python once; everything after
+    it works on whole columns.
+    """
+    return pd.DataFrame.from_records([record if isinstance(record, dict) else {} for record in extractions])
+
+
+def evaluate_extractions(
+    extractions: Sequence[Any],
+    labels: Sequence[Dict[str, Any]],
+    tool_schema: Dict[str, Any],
+    span_ids: Optional[Sequence[Optional[str]]] = None,
+    normalizers: Optional[Dict[str, Callable[[pd.Series], pd.Series]]] = None,
+) -> pd.DataFrame:
+    """Validate and score ``extractions`` against ``labels``, one row per extraction.
+
+    Columns: each field's prediction, ``valid``/``errors`` from the schema,
+    ``{field}_correct`` per field and ``all_correct``, plus ``span_id`` when
+    given. Predictions and labels go through ``normalizers`` (default:
+    ``default_normalizers()``) before comparison; invalid rows score as wrong.
+    """
+    compiled = CompiledSchema(tool_schema)
+    fields = list(compiled.properties)
+    predictions = extractions_frame(extractions).reindex(columns=fields)
+    truth = pd.DataFrame.from_records(list(labels)).reindex(columns=fields)
+    if len(truth) != len(predictions):
+        raise ValueError(f"{len(predictions)} extractions but {len(truth)} labels")
+    normalizers = default_normalizers() if normalizers is None else normalizers
+
+    results = predictions.copy()
+    if span_ids is not None:
+        results.insert(0, "span_id", list(span_ids))
+    results["valid"], results["errors"] = compiled.validate(extractions, predictions)
+    for field in fields:
+        normalize = normalizers.get(field, lambda column: column)
+        predicted = normalize(predictions[field].where(predictions[field].notna() & results["valid"]))
+        results[f"{field}_correct"] = predicted.eq(normalize(truth[field])).fillna(False).astype(bool)
+    results["all_correct"] = results[[f"{field}_correct" for field in fields]].all(axis=1)
+    return results
+
+
+def field_accuracy(results: pd.DataFrame) -> pd.Series:
+    """Accuracy of each field, of all fields at once and the schema-validity rate."""
+    columns = [column for column in results if column.endswith("_correct")] + ["valid"]
+    accuracy = results[columns].mean()
+    accuracy.index = [column.removesuffix("_correct") for column in columns[:-1]] + ["schema_valid"]
+    return accuracy
+
+
+def join_spans(results: pd.DataFrame, spans: pd.DataFrame) -> pd.DataFrame:
+    """Left-join evaluation rows to a Phoenix spans dataframe on the span ID.
+
+    ``spans`` is ``get_spans_dataframe()`` output, indexed (or keyed) by
+    ``context.span_id``; its columns keep their names and evaluation columns
+    are prefixed with ``eval.``.
+    """
+    spans = spans.reset_index() if "context.span_id" not in spans.columns else spans
+    evaluated = results.add_prefix("eval.").rename(columns={"eval.span_id": "context.span_id"})
+    return evaluated.merge(spans, on="context.span_id", how="left")
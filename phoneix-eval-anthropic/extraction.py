@@ -0,0 +1,208 @@
+"""Dataset, tool schema and prompt for the travel request extraction, shared by main.py and its helpers."""
+
+import statistics
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import anthropic
+
+DEFAULT_MODEL = "claude-3-5-sonnet-20240620"
+
+# Marks the end of the prompt prefix that is identical across requests
+PROMPT_CACHE_CONTROL = {"type": "ephemeral"}
+
+# Extract Structured Data from user query
+travel_requests = [
+    "Can you recommend a luxury hotel in Tokyo with a view of Mount Fuji for a romantic honeymoon?",
+    "I'm looking for a mid-range hotel in London with easy access to public transportation for a solo backpacking trip. Any suggestions?",
+    "I need a budget-friendly hotel in San Francisco close to the Golden Gate Bridge for a family vacation. What do you recommend?",
+    "Can you help me find a boutique hotel in New York City with a rooftop bar for a cultural exploration trip?",
+    "I'm planning a business trip to Tokyo and I need a hotel near the financial district. What options are available?",
+    "I'm traveling to London for a solo vacation and I want to stay in a trendy neighborhood with great shopping and dining options. Any recommendations for hotels?",
+    "I'm searching for a luxury beachfront resort in San Francisco for a relaxing family vacation. Can you suggest any options?",
+    "I need a mid-range hotel in New York City with a fitness center and conference facilities for a business trip. Any suggestions?",
+    "I'm looking for a budget-friendly hotel in Tokyo with easy access to public transportation for a backpacking trip. What do you recommend?",
+    "I'm planning a honeymoon in London and I want a luxurious hotel with a spa and romantic atmosphere. Can you suggest some options?",
+]
+
+# Hand-labeled attributes of travel_requests, for scoring the extractions
+travel_request_labels = [
+    {"location": "Tokyo, Japan", "budget_level": "high", "purpose": "pleasure"},
+    {"location": "London, United Kingdom", "budget_level": "medium", "purpose": "pleasure"},
+    {"location": "San Francisco, California, USA", "budget_level": "low", "purpose": "pleasure"},
+    {"location": "New York City, New York, USA", "budget_level": "not_stated", "purpose": "pleasure"},
+    {"location": "Tokyo, Japan", "budget_level": "not_stated", "purpose": "business"},
+    {"location": "London, United Kingdom", "budget_level": "not_stated", "purpose": "pleasure"},
+    {"location": "San Francisco, California, USA", "budget_level": "high", "purpose": "pleasure"},
+    {"location": "New York City, New York, USA", "budget_level": "medium", "purpose": "business"},
+    {"location": "Tokyo, Japan", "budget_level": "low", "purpose": "pleasure"},
+    {"location": "London, United Kingdom", "budget_level": "high", "purpose": "pleasure"},
+]
+
+# tools to extract/ function calling
+tool_schema = {
+    "name": "record_travel_request_attributes",
+    "description": "Records the attributes of a travel request",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "location": {
+                "type": "string",
+                "description": 'The desired destination location. Use city, state, and country format when possible. If no destination is provided, return "not_stated".',
+            },
+            "budget_level": {
+                "type": "string",
+                "enum": ["low", "medium", "high", "not_stated"],
+                "description": 'The desired budget level. If no budget level is provided, return "not_stated".',
+            },
+            "purpose": {
+                "type": "string",
+                "enum": ["business", "pleasure", "other", "not_stated"],
+                "description": 'The purpose of the trip. If no purpose is provided, return "not_stated".',
+            },
+        },
+        "required": ["location", "budget_level", "purpose"],
+    },
+}
+
+
+system_message = (
+    "You are an assistant that parses and records the attributes of a user's travel request."
+)
+
+def build_message_params(
+    travel_request: str,
+    tool_schema: Dict[str, Any],
+    system_message: str,
+    model: str = DEFAULT_MODEL,
+    prompt_cache: bool = True,
+) -> Dict[str, Any]:
+    """Keyword arguments for ``client.messages.create`` that extract one travel request.
+
+    With ``prompt_cache``, the system message carries a cache breakpoint. The
+    API caches the prompt in the order tools, system, messages, so the tool
+    schema and system message are processed once and read from the cache by
+    later requests (for prefixes above the model's minimum cacheable length).
+    """
+    system: Any = system_message
+    if prompt_cache:
+        system = [{"type": "text", "text": system_message, "cache_control": PROMPT_CACHE_CONTROL}]
+    return dict(
+        model=model,
+        max_tokens=1024,
+        messages=[
+            {"role": "user", "content": travel_request},
+        ],
+        system=system,
+        tools=[tool_schema],
+        # By default, the LLM will choose whether or not to call a function given the conversation context.
+        # The line below forces the LLM to call the function so that the output conforms to the schema.
+        tool_choice={"type": "tool", "name": tool_schema["name"]},
+    )
+
+def extract_raw_travel_request_attributes_string(
+    travel_request: str,
+    tool_schema: Dict[str, Any],
+    system_message: str,
+    client: anthropic.Anthropic,
+    model: str = DEFAULT_MODEL,
+) -> str:
+    response = client.messages.create(
+        **build_message_params(travel_request, tool_schema, system_message, model)
+    )
+    return response.content[0].input
+
+
+async def extract_raw_travel_request_attributes_async(
+    travel_request: str,
+    tool_schema: Dict[str, Any],
+    system_message: str,
+    client: anthropic.AsyncAnthropic,
+    model: str = DEFAULT_MODEL,
+) -> str:
+    response = await client.messages.create(
+        **build_message_params(travel_request, tool_schema, system_message, model)
+    )
+    return response.content[0].input
+
+
+def prompt_cache_usage(usage: Any) -> Dict[str, int]:
+    """Token counts of a response ``usage``, with the input split by prompt cache reads and writes.
+
+    ``input_tokens`` excludes the cached prefix, so the prompt's size is the
+    sum of the three. ``saved_input_tokens`` are the prompt tokens served from
+    the cache instead of being processed again.
+    """
+    read = getattr(usage, "cache_read_input_tokens", None) or 0
+    written = getattr(usage, "cache_creation_input_tokens", None) or 0
+    uncached = usage.input_tokens or 0
+    return {
+        "input_tokens": uncached,
+        "cache_read_input_tokens": read,
+        "cache_creation_input_tokens": written,
+        "prompt_tokens": uncached + read + written,
+        "saved_input_tokens": read,
+        "output_tokens": usage.output_tokens or 0,
+    }
+
+
+def _first_token(event: Any) -> bool:
+    return event.type in ("content_block_start", "content_block_delta")
+
+
+def stream_message(client: anthropic.Anthropic, params: Dict[str, Any]) -> Tuple[Any, float]:
+    """``client.messages.create(**params)`` as a stream; returns the message and its time to first token (s)."""
+    start = time.perf_counter()
+    ttft = None
+    with client.messages.stream(**params) as stream:
+        for event in stream:
+            if ttft is None and _first_token(event):
+                ttft = time.perf_counter() - start
+        message = stream.get_final_message()
+    return message, ttft if ttft is not None else time.perf_counter() - start
+
+
+async def stream_message_async(client: anthropic.AsyncAnthropic, params: Dict[str, Any]) -> Tuple[Any, float]:
+    """Async ``stream_message``."""
+    start = time.perf_counter()
+    ttft = None
+    async with client.messages.stream(**params) as stream:
+        async for event in stream:
+            if ttft is None and _first_token(event):
+                ttft = time.perf_counter() - start
+        message = await stream.get_final_message()
+    return message, ttft if ttft is not None else time.perf_counter() - start
+
+
+class PromptCacheStats:
+    """Running totals of prompt cache reads/writes and time to first token over many requests."""
+
+    def __init__(self):
+        self.requests = 0
+        self.input_tokens = 0
+        self.cache_read_input_tokens = 0
+        self.cache_creation_input_tokens = 0
+        self.output_tokens = 0
+        self.ttfts: List[float] = []
+
+    def add(self, usage: Dict[str, Any], ttft: Optional[float] = None) -> None:
+        self.requests += 1
+        self.input_tokens += usage["input_tokens"]
+        self.cache_read_input_tokens += usage["cache_read_input_tokens"]
+        self.cache_creation_input_tokens += usage["cache_creation_input_tokens"]
+        self.output_tokens += usage["output_tokens"]
+        if ttft is not None:
+            self.ttfts.append(ttft)
+
+    def summary(self) -> Dict[str, Any]:
+        prompt_tokens = self.input_tokens + self.cache_read_input_tokens + self.cache_creation_input_tokens
+        return {
+            "requests": self.requests,
+            "input_tokens": self.input_tokens,
+            "cache_read_input_tokens": self.cache_read_input_tokens,
+            "cache_creation_input_tokens": self.cache_creation_input_tokens,
+            "saved_input_tokens": self.cache_read_input_tokens,
+            "cached_prompt_fraction": self.cache_read_input_tokens / prompt_tokens if prompt_tokens else 0.0,
+            "output_tokens": self.output_tokens,
+            "mean_ttft_ms": 1000 * statistics.fmean(self.ttfts) if self.ttfts else None,
+        }
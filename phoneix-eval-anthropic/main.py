@@ -1,15 +1,21 @@
 # Reference : https://github.com/Arize-ai/phoenix/blob/main/tutorials/tracing/anthropic_tracing_tutorial.ipynb
-# pip install anthropic arize-phoenix jsonschema openinference-instrumentation-anthropic
+# pip install anthropic arize-phoenix jsonschema openinference-instrumentation-anthropic opentelemetry-sdk
 
+import asyncio
+import datetime
 import os
 from getpass import getpass
-from typing import Any, Dict
 import pandas as pd
 import phoenix as px
 import anthropic
 
-from openinference.instrumentation.anthropic import AnthropicInstrumentor
-from phoenix.otel import register
+from extraction import system_message, tool_schema, travel_request_labels, travel_requests
+from batch_extraction import run_batch_extraction
+from evaluation import evaluate_extractions, field_accuracy, join_spans
+from pipeline import ExtractionPipeline
+from response_cache import ResponseCache
+from span_export import export_spans, phoenix_span_source, read_spans
+from tracing import TracingConfig, configure_tracing
 
 pd.set_option("display.max_colwidth", None)
 
@@ -17,100 +23,80 @@ pd.set_option("display.max_colwidth", None)
 if not (anthropic_api_key := os.getenv("ANTHROPIC_API_KEY")):
     anthropic_api_key = getpass("🔑 Enter your Anthropic API key: ")
 
-client = anthropic.Anthropic(api_key=anthropic_api_key)
+# Retries are handled (with jitter) by the extraction pipeline, not the client.
+# ANTHROPIC_BASE_URL can point at `python stub_server.py` for offline runs.
+client = anthropic.AsyncAnthropic(api_key=anthropic_api_key, max_retries=0)
 
 # Instrument Your Anthropic Client
-tracer_provider = register(project_name="anthropic-tools")
-AnthropicInstrumentor().instrument(tracer_provider=tracer_provider)
+# Spans are batched in the background; TRACING_* variables set sampling and limits (see README)
+tracer_provider = configure_tracing(TracingConfig.from_env(project_name="anthropic-tools"))
 
 (session := px.launch_app()).view()
 
-# Extract Structured Data from user query
-travel_requests = [
-    "Can you recommend a luxury hotel in Tokyo with a view of Mount Fuji for a romantic honeymoon?",
-    "I'm looking for a mid-range hotel in London with easy access to public transportation for a solo backpacking trip. Any suggestions?",
-    "I need a budget-friendly hotel in San Francisco close to the Golden Gate Bridge for a family vacation. What do you recommend?",
-    "Can you help me find a boutique hotel in New York City with a rooftop bar for a cultural exploration trip?",
-    "I'm planning a business trip to Tokyo and I need a hotel near the financial district. What options are available?",
-    "I'm traveling to London for a solo vacation and I want to stay in a trendy neighborhood with great shopping and dining options. Any recommendations for hotels?",
-    "I'm searching for a luxury beachfront resort in San Francisco for a relaxing family vacation. Can you suggest any options?",
-    "I need a mid-range hotel in New York City with a fitness center and conference facilities for a business trip. Any suggestions?",
-    "I'm looking for a budget-friendly hotel in Tokyo with easy access to public transportation for a backpacking trip. What do you recommend?",
-    "I'm planning a honeymoon in London and I want a luxurious hotel with a spa and romantic atmosphere. Can you suggest some options?",
-]
-
-# tools to extract/ function calling
-tool_schema = {
-    "name": "record_travel_request_attributes",
-    "description": "Records the attributes of a travel request",
-    "input_schema": {
-        "type": "object",
-        "properties": {
-            "location": {
-                "type": "string",
-                "description": 'The desired destination location. Use city, state, and country format when possible. If no destination is provided, return "not_stated".',
-            },
-            "budget_level": {
-                "type": "string",
-                "enum": ["low", "medium", "high", "not_stated"],
-                "description": 'The desired budget level. If no budget level is provided, return "not_stated".',
-            },
-            "purpose": {
-                "type": "string",
-                "enum": ["business", "pleasure", "other", "not_stated"],
-                "description": 'The purpose of the trip. If no purpose is provided, return "not_stated".',
-            },
-        },
-        "required": ["location", "budget_level", "purpose"],
-    },
-}
-
-
-system_message = (
-    "You are an assistant that parses and records the attributes of a user's travel request."
+# Identical calls are answered from the on-disk cache (cache.hit=true on their spans)
+cache = ResponseCache(
+    os.getenv("EXTRACTION_CACHE", ".extraction_cache.sqlite"),
+    ttl_seconds=float(os.getenv("EXTRACTION_CACHE_TTL", 7 * 24 * 3600)),
+    max_entries=100_000,
 )
 
-def extract_raw_travel_request_attributes_string(
-    travel_request: str,
-    tool_schema: Dict[str, Any],
-    system_message: str,
-    client: client,
-    model: str = "claude-3-5-sonnet-20240620",
-) -> str:
-    response = client.messages.create(
-        model=model,
-        max_tokens=1024,
-        messages=[
-            {"role": "user", "content": travel_request},
-        ],
-        system=system_message,
-        tools=[tool_schema],
-        # By default, the LLM will choose whether or not to call a function given the conversation context.
-        # The line below forces the LLM to call the function so that the output conforms to the schema.
-        tool_choice={"type": "tool", "name": "record_travel_request_attributes"},
+# Run the extractions concurrently, or as Message Batches for large offline jobs
+# (EXTRACTION_MODE=batch); either way results come back in the order of travel_requests
+span_ids = None
+if os.getenv("EXTRACTION_MODE", "concurrent") == "batch":
+    raw_travel_attributes_column = run_batch_extraction(
+        travel_requests,
+        anthropic.Anthropic(api_key=anthropic_api_key),
+        tool_schema=tool_schema,
+        system_message=system_message,
+        poll_interval=float(os.getenv("BATCH_POLL_INTERVAL", "30")),
+        cache=cache,
     )
-    return response.content[0].input
-
-# Run the extractions
-raw_travel_attributes_column = []
+else:
+    pipeline = ExtractionPipeline(
+        client,
+        concurrency=int(os.getenv("EXTRACTION_CONCURRENCY", "8")),
+        requests_per_second=float(os.getenv("EXTRACTION_RPS", "4")),
+        tool_schema=tool_schema,
+        system_message=system_message,
+        cache=cache,
+    )
+    raw_travel_attributes_column = asyncio.run(pipeline.run(travel_requests))
+    span_ids = pipeline.span_ids
+    # The system message and tool schema are a cached prompt prefix; misses report how much it saved
+    print(f"Prompt cache: {pipeline.prompt_cache.summary()}")
+print(f"Response cache: {cache.stats()}")
 
-for travel_request in travel_requests:
+for travel_request, raw_travel_attributes in zip(travel_requests, raw_travel_attributes_column):
     print("Travel request:")
     print("==============")
     print(travel_request)
     print()
-    raw_travel_attributes = extract_raw_travel_request_attributes_string(
-        travel_request, tool_schema, system_message, client
-    )
-    raw_travel_attributes_column.append(raw_travel_attributes)
     print("Raw Travel Attributes:")
     print("=====================")
     print(raw_travel_attributes)
     print()
     print()
 
+extractions_df = pd.DataFrame(
+    {"travel_request": travel_requests, "raw_travel_attributes": raw_travel_attributes_column}
+)
+
 print(f"🔥🐦 Open the Phoenix UI if you haven't already: {session.url}")
 
 # Export and Evaluate Your Trace Data
-trace_ds = px.Client().get_trace_dataset(project_name="anthropic-tools")
-trace_ds.get_spans_dataframe().head()
\ No newline at end of file
+tracer_provider.force_flush()
+# Spans are read from Phoenix in time-windowed pages and appended to partitioned Parquet;
+# the watermark in SPAN_EXPORT_DIR means reruns only export spans newer than the last export.
+# No grace period, so this run's just-flushed spans are included; any Phoenix hadn't ingested
+# yet are picked up by the next run's overlap re-read
+span_export_dir = os.getenv("SPAN_EXPORT_DIR", "span_export")
+span_export = export_spans(phoenix_span_source("anthropic-tools"), span_export_dir, grace=datetime.timedelta(0))
+print(f"Span export: {span_export}")
+spans_df = read_spans(span_export_dir, span_ids=span_ids)
+
+# Validate every extraction against tool_schema and score it against the labels
+eval_df = evaluate_extractions(raw_travel_attributes_column, travel_request_labels, tool_schema, span_ids)
+print(field_accuracy(eval_df))
+eval_spans_df = join_spans(eval_df, spans_df)
+eval_spans_df.head()
\ No newline at end of file
@@ -0,0 +1,184 @@
+"""Compare models on the travel request extraction: latency, throughput and schema validity.
+
+Runs the ``travel_requests`` workload through ``ExtractionPipeline`` for every
+model at every concurrency level and reports, per run, a per-request latency
+histogram with percentiles, requests/s, output tokens/s, the schema-validity
+rate and field accuracy. Without ``--base-url`` it runs offline against the
+stub server, with ``--model-latency`` setting each model's simulated latency;
+``client_overhead_ms`` (mean latency minus the simulated latency) then tracks
+the cost of our own client path, so CI can catch regressions in it.
+
+    python model_benchmark.py --concurrency 1 4 16 --json model_benchmark.json
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+import statistics
+import time
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import anthropic
+
+from evaluation import evaluate_extractions, field_accuracy
+from extraction import DEFAULT_MODEL, tool_schema, travel_request_labels, travel_requests
+from pipeline import ExtractionPipeline
+from stub_server import StubServer
+
+DEFAULT_MODELS = [DEFAULT_MODEL, "claude-3-5-haiku-20241022", "claude-3-opus-20240229"]
+# Simulated seconds per request on the stub, roughly in the models' relative order
+DEFAULT_MODEL_LATENCY = {DEFAULT_MODEL: 0.04, "claude-3-5-haiku-20241022": 0.02, "claude-3-opus-20240229": 0.08}
+# Upper edges of the latency histogram buckets, in milliseconds (the last bucket is open)
+HISTOGRAM_EDGES_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+
+def latency_histogram(latencies_ms: Sequence[float], edges: Sequence[float] = HISTOGRAM_EDGES_MS) -> Dict[str, int]:
+    """Counts per bucket, keyed by its upper edge (``"<=20"``) and ``">10000"`` for the last."""
+    counts = [0] * (len(edges) + 1)
+    for latency in latencies_ms:
+        counts[bisect.bisect_left(edges, latency)] += 1
+    labels = [f"<={edge:g}" for edge in edges] + [f">{edges[-1]:g}"]
+    return dict(zip(labels, counts))
+
+
+def percentile(ordered: Sequence[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _mean_latency(latency: Union[float, Sequence[float]]) -> float:
+    return statistics.fmean(latency) if isinstance(latency, (tuple, list)) else latency
+
+
+async def _run_pipeline(base_url: Optional[str], api_key: Optional[str], model: str, concurrency: int,
+                        requests: Sequence[str], warmup: int) -> Dict[str, Any]:
+    # A client per run, created inside its event loop
+    async with anthropic.AsyncAnthropic(base_url=base_url, api_key=api_key, max_retries=0) as client:
+        pipeline = ExtractionPipeline(client, concurrency=concurrency, model=model, max_retries=2, base_delay=0.05)
+        if warmup:
+            await pipeline.run(requests[:warmup], return_exceptions=True)
+        start = time.perf_counter()
+        results = await pipeline.run(requests, return_exceptions=True)
+        wall = time.perf_counter() - start
+    return {"results": results, "latencies": pipeline.latencies, "usage": pipeline.prompt_cache.summary(), "wall": wall}
+
+
+def benchmark_run(
+    model: str,
+    concurrency: int,
+    repeats: int = 3,
+    warmup: int = 2,
+    base_url: Optional[str] = None,
+    api_key: Optional[str] = None,
+    simulated_latency: Optional[float] = None,
+) -> Dict[str, Any]:
+    """One report row: ``travel_requests`` repeated ``repeats`` times at ``concurrency`` requests in flight."""
+    requests = list(travel_requests) * repeats
+    run = asyncio.run(_run_pipeline(base_url, api_key, model, concurrency, requests, warmup))
+    latencies_ms = sorted(1000 * latency for latency in run["latencies"])
+    accuracy = field_accuracy(
+        evaluate_extractions(run["results"], list(travel_request_labels) * repeats, tool_schema)
+    )
+    row = {
+        "model": model,
+        "concurrency": concurrency,
+        "requests": len(requests),
+        "errors": sum(isinstance(result, Exception) for result in run["results"]),
+        "wall_s": run["wall"],
+        "requests_per_s": len(requests) / run["wall"],
+        "output_tokens_per_s": run["usage"]["output_tokens"] / run["wall"],
+        "mean_ms": statistics.fmean(latencies_ms),
+        "p50_ms": percentile(latencies_ms, 0.5),
+        "p90_ms": percentile(latencies_ms, 0.9),
+        "p99_ms": percentile(latencies_ms, 0.99),
+        "mean_ttft_ms": run["usage"]["mean_ttft_ms"],
+        "schema_valid_rate": float(accuracy["schema_valid"]),
+        "accuracy": float(accuracy["all"]),
+        "histogram_ms": latency_histogram(latencies_ms),
+    }
+    if simulated_latency is not None:
+        row["client_overhead_ms"] = row["mean_ms"] - 1000 * simulated_latency
+    return row
+
+
+def run_benchmark(
+    models: Sequence[str] = DEFAULT_MODELS,
+    concurrency_levels: Sequence[int] = (1, 4, 8),
+    repeats: int = 3,
+    warmup: int = 2,
+    base_url: Optional[str] = None,
+    api_key: Optional[str] = None,
+    model_latency: Optional[Dict[str, Union[float, Sequence[float]]]] = None,
+    stub_latency: float = 0.04,
+) -> Dict[str, Any]:
+    """The JSON report: the benchmark settings and one row per (model, concurrency).
+
+    Without ``base_url`` the runs go to a stub server whose latency is
+    ``model_latency[model]`` (default ``DEFAULT_MODEL_LATENCY``, else ``stub_latency``).
+    """
+    model_latency = DEFAULT_MODEL_LATENCY if model_latency is None else model_latency
+    settings = {"models": list(models), "concurrency": list(concurrency_levels), "repeats": repeats,
+                "warmup": warmup, "target": base_url or "stub"}
+    rows = []
+    if base_url is None:
+        latencies = {model: model_latency.get(model, stub_latency) for model in models}
+        settings["model_latency"] = latencies
+        with StubServer(latency=stub_latency, model_latency=latencies) as server:
+            for model in models:
+                for concurrency in concurrency_levels:
+                    rows.append(benchmark_run(model, concurrency, repeats, warmup, server.url, "stub",
+                                              _mean_latency(latencies[model])))
+    else:
+        for model in models:
+            for concurrency in concurrency_levels:
+                rows.append(benchmark_run(model, concurrency, repeats, warmup, base_url, api_key))
+    return {"settings": settings, "rows": rows}
+
+
+def format_table(rows: List[Dict[str, Any]]) -> str:
+    lines = [f"{'model':<28} {'conc':>4} {'req/s':>7} {'tok/s':>8} {'mean ms':>8} {'p50 ms':>7} {'p99 ms':>7} "
+             f"{'overhead':>8} {'valid':>6} {'acc':>6} {'errors':>6}"]
+    for row in rows:
+        overhead = row.get("client_overhead_ms")
+        lines.append(
+            f"{row['model']:<28} {row['concurrency']:>4} {row['requests_per_s']:>7.1f} "
+            f"{row['output_tokens_per_s']:>8.0f} {row['mean_ms']:>8.1f} {row['p50_ms']:>7.1f} {row['p99_ms']:>7.1f} "
+            f"{'-' if overhead is None else f'{overhead:.1f}':>8} {row['schema_valid_rate']:>6.1%} "
+            f"{row['accuracy']:>6.1%} {row['errors']:>6}"
+        )
+    return "\n".join(lines)
+
+
+def _model_latency(values: List[str]) -> Dict[str, Union[float, tuple]]:
+    latencies = {}
+    for value in values:
+        model, _, seconds = value.partition("=")
+        parts = [float(part) for part in seconds.split(",")]
+        latencies[model] = parts[0] if len(parts) == 1 else tuple(parts[:2])
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Latency and throughput of the extraction across models.")
+    parser.add_argument("--models", nargs="+", default=DEFAULT_MODELS)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--repeats", type=int, default=3, help="Times to repeat travel_requests per run")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed requests before each run")
+    parser.add_argument("--base-url", help="Benchmark this API instead of the stub server (uses ANTHROPIC_API_KEY)")
+    parser.add_argument("--model-latency", nargs="*", default=[], metavar="MODEL=SECONDS[,MAX]",
+                        help="Simulated latency per model on the stub (a MIN,MAX range is uniform)")
+    parser.add_argument("--stub-latency", type=float, default=0.04, help="Simulated latency of other models")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    model_latency = {**DEFAULT_MODEL_LATENCY, **_model_latency(args.model_latency)}
+    report = run_benchmark(args.models, args.concurrency, args.repeats, args.warmup, args.base_url,
+                           None, model_latency, args.stub_latency)
+    print(format_table(report["rows"]))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
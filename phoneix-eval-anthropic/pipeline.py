@@ -0,0 +1,204 @@
+"""Concurrent extraction over ``AsyncAnthropic``: bounded concurrency, rate limiting and retries."""
+
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+import anthropic
+
+from extraction import (
+    DEFAULT_MODEL,
+    PromptCacheStats,
+    system_message as default_system_message,
+    tool_schema as default_tool_schema,
+)
+from response_cache import ResponseCache, extract_with_cache_async
+
+RETRYABLE_STATUS = {408, 409, 429}
+
+
+class TokenBucket:
+    """Async token bucket: ``rate`` tokens per second, bursts of up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            self._refill()
+            while self.tokens < tokens:
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= tokens
+
+
+def is_retryable(error: BaseException) -> bool:
+    """429s, 5xx (including 529 overloaded), timeouts and dropped connections are worth retrying."""
+    if isinstance(error, anthropic.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS or error.status_code >= 500
+    return isinstance(error, (anthropic.APIConnectionError, anthropic.APITimeoutError))
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds from the ``retry-after`` header of an API error, if it sent one."""
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers["retry-after"])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0, rng: random.Random = random) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return rng.uniform(0, min(cap, base * 2 ** attempt))
+
+
+async def with_retries(
+    call: Callable[[], Awaitable[Any]],
+    max_retries: int = 5,
+    base_delay: float = 0.5,
+    max_delay: float = 30.0,
+    rng: random.Random = random,
+) -> Any:
+    """Await ``call()``, retrying retryable API errors with jittered exponential backoff.
+
+    A ``retry-after`` header from the server is used as the lower bound of the delay.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return await call()
+        except Exception as error:
+            if attempt == max_retries or not is_retryable(error):
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay, rng)
+            await asyncio.sleep(max(delay, retry_after(error) or 0.0))
+
+
+class ExtractionPipeline:
+    """Run extractions concurrently and return the results in input order.
+
+    At most ``concurrency`` requests are in flight, new requests start at no
+    more than ``requests_per_second`` (token bucket with bursts of ``burst``),
+    and failed calls are retried by ``with_retries``. The client's own retries
+    should be disabled (``max_retries=0``) so they don't compound with these.
+    With a ``cache``, hits are answered without a request (or a rate token).
+    After ``run()``, ``span_ids`` holds the extraction span ID of each result,
+    ``latencies`` the seconds each took (retries included; waiting for a
+    concurrency slot or a rate-limit token not), ``rate_limit_waits`` the
+    seconds each waited for tokens and ``prompt_cache`` the token counts and
+    time to first token of its API calls.
+    """
+
+    def __init__(
+        self,
+        client: anthropic.AsyncAnthropic,
+        concurrency: int = 8,
+        requests_per_second: Optional[float] = None,
+        burst: Optional[float] = None,
+        max_retries: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        model: str = DEFAULT_MODEL,
+        tool_schema: Dict[str, Any] = default_tool_schema,
+        system_message: str = default_system_message,
+        seed: Optional[int] = None,
+        cache: Optional[ResponseCache] = None,
+    ):
+        self.client = client
+        self.concurrency = concurrency
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.model = model
+        self.tool_schema = tool_schema
+        self.system_message = system_message
+        self.rng = random.Random(seed)
+        self.cache = cache
+        self.span_ids: List[Optional[str]] = []
+        self.latencies: List[Optional[float]] = []
+        self.rate_limit_waits: List[float] = []
+        self.prompt_cache = PromptCacheStats()
+
+    async def extract(
+        self,
+        travel_request: str,
+        before_request: Optional[Callable[[], Awaitable[Any]]] = None,
+        on_span: Optional[Callable[[str], None]] = None,
+    ) -> Any:
+        return await extract_with_cache_async(
+            travel_request, self.tool_schema, self.system_message, self.client, self.model, self.cache,
+            before_request, on_span, self.prompt_cache.add,
+        )
+
+    async def run(
+        self,
+        travel_requests: Sequence[str],
+        return_exceptions: bool = False,
+        on_result: Optional[Callable[[int, Any], None]] = None,
+    ) -> List[Any]:
+        """Extract every request; ``on_result(index, result)`` is called as each one completes.
+
+        Like ``asyncio.gather``, the first error is raised (and the remaining
+        requests cancelled) unless ``return_exceptions`` is set, in which case
+        the exception takes that request's place in the results.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        bucket = TokenBucket(self.requests_per_second, self.burst) if self.requests_per_second else None
+        results: List[Any] = [None] * len(travel_requests)
+        self.span_ids = [None] * len(travel_requests)
+        self.latencies = [None] * len(travel_requests)
+        self.rate_limit_waits = [0.0] * len(travel_requests)
+        self.prompt_cache = PromptCacheStats()
+
+        async def worker(index: int, travel_request: str) -> None:
+            async with semaphore:
+                async def acquire() -> None:
+                    waited = time.perf_counter()
+                    await bucket.acquire()
+                    self.rate_limit_waits[index] += time.perf_counter() - waited
+
+                async def call() -> Any:
+                    return await self.extract(
+                        travel_request,
+                        acquire if bucket is not None else None,
+                        lambda span_id: self.span_ids.__setitem__(index, span_id),
+                    )
+
+                start = time.perf_counter()
+                try:
+                    results[index] = await with_retries(
+                        call, self.max_retries, self.base_delay, self.max_delay, self.rng
+                    )
+                except Exception as error:
+                    if not return_exceptions:
+                        raise
+                    results[index] = error
+                self.latencies[index] = time.perf_counter() - start - self.rate_limit_waits[index]
+            if on_result is not None:
+                on_result(index, results[index])
+
+        tasks = [asyncio.create_task(worker(i, request)) for i, request in enumerate(travel_requests)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return results
+
+
+def run_extractions(travel_requests: Sequence[str], client: anthropic.AsyncAnthropic, **options: Any) -> List[Any]:
+    """Synchronous entry point: run an ``ExtractionPipeline`` over ``travel_requests``."""
+    return asyncio.run(ExtractionPipeline(client, **options).run(travel_requests))
@@ -0,0 +1,236 @@
+"""Content-addressed on-disk cache of extraction responses, in front of the messages API.
+
+The key is a SHA-256 over the full request (model, system prompt, tool schema,
+tool choice, user message and sampling parameters), so any change to the
+prompt or schema misses the cache instead of serving stale answers. Entries
+expire after ``ttl_seconds`` and the least recently used ones are evicted once
+the cache holds more than ``max_entries`` or ``max_bytes``.
+
+Every lookup runs inside an ``extract_travel_request_attributes`` span with
+``cache.hit``/``cache.key`` attributes; on a miss the instrumented Anthropic
+call is its child, on a hit there is no LLM span at all. Misses are streamed,
+and their time to first token and prompt cache usage (tokens read from and
+written to the API's prompt cache) are recorded on the span too.
+"""
+
+import contextlib
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+
+import anthropic
+from opentelemetry import trace
+
+from extraction import DEFAULT_MODEL, build_message_params, prompt_cache_usage, stream_message, stream_message_async
+
+tracer = trace.get_tracer(__name__)
+
+_MISSING = object()
+
+
+def cache_key(params: Dict[str, Any]) -> str:
+    """SHA-256 of the canonical JSON of ``client.messages.create`` keyword arguments."""
+    canonical = json.dumps(params, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed key/value store of JSON values with TTL and LRU size eviction.
+
+    Safe to share between threads (and the coroutines of one event loop);
+    ``path=":memory:"`` keeps it in memory.
+    """
+
+    def __init__(
+        self,
+        path: str = ".extraction_cache.sqlite",
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+            " created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created > self.ttl_seconds
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or self._expired(row[1], now):
+                if row is not None:
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                return default
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Any) -> None:
+        encoded = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, encoded, len(encoded.encode("utf-8")), now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        if self.ttl_seconds is not None:
+            self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+        if self.max_entries is not None:
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN"
+                " (SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+        if self.max_bytes is not None:
+            # Keep the most recently used entries whose running total fits in max_bytes
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM"
+                " (SELECT key, SUM(size) OVER (ORDER BY accessed DESC, key) AS total FROM responses)"
+                " WHERE total > ?)",
+                (self.max_bytes,),
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"entries": entries, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "ResponseCache":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+@contextlib.contextmanager
+def extraction_span(params: Dict[str, Any], key: str) -> Iterator[trace.Span]:
+    with tracer.start_as_current_span("extract_travel_request_attributes") as span:
+        span.set_attribute("openinference.span.kind", "CHAIN")
+        content = params["messages"][-1]["content"]
+        span.set_attribute("input.value", content if isinstance(content, str) else json.dumps(content))
+        span.set_attribute("llm.model_name", params["model"])
+        span.set_attribute("cache.key", key)
+        yield span
+
+
+def span_id(span: trace.Span) -> str:
+    """The span's ID as the 16-digit hex string Phoenix uses for ``context.span_id``."""
+    return trace.format_span_id(span.get_span_context().span_id)
+
+
+def _record_request(
+    span: trace.Span,
+    message: Any,
+    ttft: float,
+    on_usage: Optional[Callable[[Dict[str, int], float], None]],
+) -> Any:
+    usage = prompt_cache_usage(message.usage)
+    span.set_attribute("llm.token_count.prompt", usage["prompt_tokens"])
+    span.set_attribute("llm.token_count.prompt_details.cache_read", usage["cache_read_input_tokens"])
+    span.set_attribute("llm.token_count.prompt_details.cache_write", usage["cache_creation_input_tokens"])
+    span.set_attribute("prompt_cache.saved_input_tokens", usage["saved_input_tokens"])
+    span.set_attribute("llm.time_to_first_token_ms", 1000 * ttft)
+    if on_usage is not None:
+        on_usage(usage, ttft)
+    return message.content[0].input
+
+
+def _record(span: trace.Span, hit: bool, value: Any) -> None:
+    span.set_attribute("cache.hit", hit)
+    span.set_attribute("output.value", json.dumps(value))
+    span.set_attribute("output.mime_type", "application/json")
+
+
+def extract_with_cache(
+    travel_request: str,
+    tool_schema: Dict[str, Any],
+    system_message: str,
+    client: anthropic.Anthropic,
+    model: str = DEFAULT_MODEL,
+    cache: Optional[ResponseCache] = None,
+    on_span: Optional[Callable[[str], None]] = None,
+    on_usage: Optional[Callable[[Dict[str, int], float], None]] = None,
+) -> Any:
+    """``extract_raw_travel_request_attributes_string`` behind ``cache`` (no caching if it's None).
+
+    ``on_usage(usage, ttft)`` receives the ``prompt_cache_usage`` and time to
+    first token (seconds) of each API call.
+    """
+    params = build_message_params(travel_request, tool_schema, system_message, model)
+    key = cache_key(params)
+    with extraction_span(params, key) as span:
+        if on_span is not None:
+            on_span(span_id(span))
+        value = cache.get(key, _MISSING) if cache is not None else _MISSING
+        hit = value is not _MISSING
+        if not hit:
+            value = _record_request(span, *stream_message(client, params), on_usage)
+            if cache is not None:
+                cache.put(key, value)
+        _record(span, hit, value)
+        return value
+
+
+async def extract_with_cache_async(
+    travel_request: str,
+    tool_schema: Dict[str, Any],
+    system_message: str,
+    client: anthropic.AsyncAnthropic,
+    model: str = DEFAULT_MODEL,
+    cache: Optional[ResponseCache] = None,
+    before_request: Optional[Callable[[], Awaitable[Any]]] = None,
+    on_span: Optional[Callable[[str], None]] = None,
+    on_usage: Optional[Callable[[Dict[str, int], float], None]] = None,
+) -> Any:
+    """Async ``extract_with_cache`` for ``AsyncAnthropic`` clients.
+
+    ``before_request`` is awaited only on a miss, right before the API call
+    (the pipeline takes its rate-limit token there). ``on_span`` receives the
+    ID of the extraction span, for joining results to the exported spans,
+    and ``on_usage`` the usage of each API call.
+    """
+    params = build_message_params(travel_request, tool_schema, system_message, model)
+    key = cache_key(params)
+    with extraction_span(params, key) as span:
+        if on_span is not None:
+            on_span(span_id(span))
+        value = cache.get(key, _MISSING) if cache is not None else _MISSING
+        hit = value is not _MISSING
+        if not hit:
+            if before_request is not None:
+                await before_request()
+            value = _record_request(span, *await stream_message_async(client, params), on_usage)
+            if cache is not None:
+                cache.put(key, value)
+        _record(span, hit, value)
+        return value
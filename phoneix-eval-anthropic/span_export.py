@@ -0,0 +1,271 @@
+"""Incremental export of a Phoenix project's spans to partitioned Parquet.
+
+Instead of pulling the whole project into one dataframe, ``export_spans``
+walks the time range in windows of ``window``, asking the source for at most
+``page_size`` spans at a time. A window that comes back full is split in half
+and re-read, so no page is ever truncated whatever order the source returns
+spans in. Each page is flattened (nested attribute dicts become dotted
+columns, lists become JSON, values get a single type per column) and written
+straight to ``{directory}/start_date=YYYY-MM-DD/``, so memory stays bounded by
+one page.
+
+After every window a watermark (``_watermark.json``) records how far the
+export got; the next run starts from there and only reads newer spans. Spans
+reach the server some time after they start, so a run stops ``grace`` short
+of now and the next one re-reads ``overlap`` before the watermark (from the
+start of the page file it falls in), replacing those pages to pick up spans
+that arrived late. ``read_spans`` loads the dataset back, reconciling the
+per-page schemas.
+"""
+
+import datetime
+import json
+import os
+import re
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# (start, end, limit) -> spans starting in [start, end), at most ``limit`` of them (None when there are none)
+SpanSource = Callable[[datetime.datetime, datetime.datetime, int], Optional[pd.DataFrame]]
+
+WATERMARK_FILE = "_watermark.json"  # leading underscore: ignored when the directory is read as a dataset
+PARTITION_COLUMN = "start_date"
+# Page files are named after the [start, end) window they hold
+PAGE_FILE = re.compile(r"part-(\d{8}T\d{12})-(\d{8}T\d{12})-\d+\.parquet")
+PAGE_TIME_FORMAT = "%Y%m%dT%H%M%S%f"
+
+
+class PageTooLargeError(RuntimeError):
+    """Even a ``min_window``-long window holds ``page_size`` spans or more."""
+
+
+def _utc(value: datetime.datetime) -> datetime.datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=datetime.timezone.utc)
+    return value.astimezone(datetime.timezone.utc)
+
+
+def phoenix_span_source(project_name: str, client: Any = None) -> SpanSource:
+    """Read spans from a Phoenix server with ``Client.get_spans_dataframe``."""
+    if client is None:
+        import phoenix as px
+
+        client = px.Client()
+
+    def fetch(start: datetime.datetime, end: datetime.datetime, limit: int) -> Optional[pd.DataFrame]:
+        return client.get_spans_dataframe(project_name=project_name, start_time=start, end_time=end, limit=limit)
+
+    return fetch
+
+
+def load_watermark(directory: str) -> Optional[Dict[str, Any]]:
+    """``{"end_time", "exported_spans"}`` of the last export to ``directory``, or None before the first."""
+    path = os.path.join(directory, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        watermark = json.load(f)
+    watermark["end_time"] = datetime.datetime.fromisoformat(watermark["end_time"])
+    return watermark
+
+
+def save_watermark(directory: str, end_time: datetime.datetime, exported_spans: int) -> None:
+    path = os.path.join(directory, WATERMARK_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"end_time": end_time.isoformat(), "exported_spans": exported_spans}, f)
+    os.replace(tmp_path, path)
+
+
+def typed_column(column: pd.Series) -> pd.Series:
+    """Give an object column one Parquet-friendly type; anything that isn't a scalar becomes JSON text."""
+    if not pd.api.types.is_object_dtype(column):
+        if isinstance(column.dtype, pd.DatetimeTZDtype) or pd.api.types.is_datetime64_dtype(column):
+            return pd.to_datetime(column, utc=True)
+        return column
+    values = column.dropna()
+    if values.empty:
+        return column
+    kinds = set(values.map(type))
+    if kinds == {bool}:
+        return column.astype("boolean")
+    if kinds == {int}:
+        return column.astype("Int64")
+    if kinds <= {int, float}:
+        return column.astype("Float64")
+    if kinds == {str}:
+        return column.astype("string")
+    return column.map(lambda value: json.dumps(value, default=str), na_action="ignore").astype("string")
+
+
+def flatten_spans(spans: pd.DataFrame) -> pd.DataFrame:
+    """One typed column per leaf attribute, e.g. ``attributes.metadata`` -> ``attributes.metadata.user_id``."""
+    spans = spans.reset_index() if "context.span_id" not in spans.columns else spans.reset_index(drop=True)
+    columns: Dict[str, pd.Series] = {}
+    for name in spans.columns:
+        column = spans[name]
+        values = column.dropna()
+        if not values.empty and pd.api.types.is_object_dtype(column) and values.map(type).eq(dict).all():
+            nested = pd.json_normalize([value if isinstance(value, dict) else {} for value in column], sep=".")
+            for leaf in nested.columns:
+                columns[f"{name}.{leaf}"] = typed_column(nested[leaf].set_axis(spans.index))
+        else:
+            columns[name] = typed_column(column)
+    return pd.DataFrame(columns, index=spans.index)
+
+
+def write_page(spans: pd.DataFrame, directory: str, start: datetime.datetime, end: datetime.datetime) -> List[str]:
+    """Flatten one page, write it into its ``start_date`` partition(s) and return the files written.
+
+    File names come from the window, so re-exporting a window after a crash
+    overwrites its files instead of duplicating them.
+    """
+    flat = flatten_spans(spans)
+    flat[PARTITION_COLUMN] = pd.to_datetime(flat["start_time"], utc=True).dt.strftime("%Y-%m-%d")
+    paths: List[str] = []
+    pq.write_to_dataset(
+        pa.Table.from_pandas(flat, preserve_index=False),
+        directory,
+        partition_cols=[PARTITION_COLUMN],
+        basename_template=f"part-{start:{PAGE_TIME_FORMAT}}-{end:{PAGE_TIME_FORMAT}}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        file_visitor=lambda written: paths.append(os.path.normpath(written.path)),
+    )
+    return paths
+
+
+def page_files(directory: str) -> List[Tuple[datetime.datetime, datetime.datetime, str]]:
+    """``(start, end, path)`` of every page file in ``directory``, from the window in its name."""
+    files = []
+    for partition in os.listdir(directory):
+        if not partition.startswith(f"{PARTITION_COLUMN}="):
+            continue
+        for name in os.listdir(os.path.join(directory, partition)):
+            match = PAGE_FILE.fullmatch(name)
+            if match:
+                start, end = (
+                    datetime.datetime.strptime(value, PAGE_TIME_FORMAT).replace(tzinfo=datetime.timezone.utc)
+                    for value in match.groups()
+                )
+                files.append((start, end, os.path.normpath(os.path.join(directory, partition, name))))
+    return files
+
+
+def iter_pages(
+    fetch: SpanSource,
+    start: datetime.datetime,
+    end: datetime.datetime,
+    page_size: int,
+    min_window: datetime.timedelta,
+) -> Iterator[Tuple[datetime.datetime, datetime.datetime, pd.DataFrame]]:
+    """Yield ``(start, end, spans)`` sub-windows of ``[start, end)`` holding fewer than ``page_size`` spans each."""
+    windows = [(start, end)]
+    while windows:
+        window_start, window_end = windows.pop()
+        spans = fetch(window_start, window_end, page_size)
+        if spans is None or spans.empty:
+            continue
+        if len(spans) >= page_size:
+            if window_end - window_start <= min_window:
+                raise PageTooLargeError(
+                    f"{len(spans)}+ spans between {window_start} and {window_end}; raise page_size"
+                )
+            middle = window_start + (window_end - window_start) / 2
+            windows.extend([(middle, window_end), (window_start, middle)])  # popped earliest first
+            continue
+        starts = pd.to_datetime(spans["start_time"], utc=True)
+        yield window_start, window_end, spans[(starts >= window_start) & (starts < window_end)]
+
+
+def export_spans(
+    fetch: SpanSource,
+    directory: str,
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+    window: datetime.timedelta = datetime.timedelta(hours=1),
+    page_size: int = 10_000,
+    min_window: datetime.timedelta = datetime.timedelta(milliseconds=1),
+    lookback: datetime.timedelta = datetime.timedelta(days=7),
+    grace: datetime.timedelta = datetime.timedelta(minutes=1),
+    overlap: datetime.timedelta = datetime.timedelta(minutes=5),
+) -> Dict[str, Any]:
+    """Export spans that started in ``[start, end)`` to ``directory``, one window at a time.
+
+    ``end`` defaults to ``grace`` before now, leaving spans still being
+    ingested to the next run. ``start`` defaults to ``overlap`` before the
+    directory's watermark, moved back to the start of the page file that time
+    falls in (or ``end - lookback`` on the first run), and is never earlier
+    than that, so reruns export new spans plus any that arrived late behind
+    the watermark. Pages from earlier runs in the re-read range are replaced,
+    not duplicated. Returns a summary with the ``spans`` and ``pages`` written
+    and the ``start``/``end`` covered.
+    """
+    os.makedirs(directory, exist_ok=True)
+    end = _utc(end) if end is not None else datetime.datetime.now(datetime.timezone.utc) - grace
+    watermark = load_watermark(directory) or {"end_time": None, "exported_spans": 0}
+    pages = page_files(directory)
+    if watermark["end_time"] is not None:
+        resume = watermark["end_time"] - overlap
+        resume = min([resume] + [page_start for page_start, page_end, _ in pages if page_start < resume < page_end])
+        start = resume if start is None else max(_utc(start), resume)
+    elif start is None:
+        start = end - lookback
+    start = _utc(start)
+
+    summary = {"spans": 0, "pages": 0, "start": start, "end": max(start, end)}
+    exported_spans = watermark["exported_spans"]
+    # Earlier runs' pages inside [start, end), replaced once the window they start in has been re-read
+    stale = {
+        path: (page_start, pq.read_metadata(path).num_rows)
+        for page_start, page_end, path in pages
+        if page_start >= start and page_end <= end
+    }
+
+    window_start = start
+    while window_start < end:
+        window_end = min(window_start + window, end)
+        written = set()
+        for page_start, page_end, spans in iter_pages(fetch, window_start, window_end, page_size, min_window):
+            if not spans.empty:
+                written.update(write_page(spans, directory, page_start, page_end))
+                summary["spans"] += len(spans)
+                summary["pages"] += 1
+        for path, (page_start, rows) in list(stale.items()):
+            if page_start < window_end:
+                exported_spans -= rows
+                del stale[path]
+                if path not in written:
+                    os.remove(path)
+        save_watermark(directory, window_end, exported_spans + summary["spans"])
+        window_start = window_end
+    return summary
+
+
+def read_spans(
+    directory: str,
+    columns: Optional[List[str]] = None,
+    span_ids: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """Load exported spans (optionally only ``columns`` / ``span_ids``), indexed by ``context.span_id``.
+
+    Pages can disagree on a column's type (e.g. all-integer in one page, float
+    in another) or lack a column entirely; their schemas are unified with type
+    promotion before reading.
+    """
+    partitioning = ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.string())]), flavor="hive")
+    dataset = ds.dataset(directory, format="parquet", partitioning=partitioning)
+    schemas = [fragment.physical_schema for fragment in dataset.get_fragments()]
+    if not schemas:
+        return pd.DataFrame(columns=columns or []).rename_axis("context.span_id")
+    schema = pa.unify_schemas(schemas + [partitioning.schema], promote_options="permissive")
+    dataset = ds.dataset(directory, schema=schema, format="parquet", partitioning=partitioning)
+    if columns is not None and "context.span_id" not in columns:
+        columns = ["context.span_id", *columns]
+    condition = pc.field("context.span_id").isin([i for i in span_ids if i]) if span_ids is not None else None
+    spans = dataset.to_table(columns=columns, filter=condition).to_pandas()
+    return spans.drop_duplicates("context.span_id", keep="last").set_index("context.span_id")
@@ -0,0 +1,386 @@
+"""A local stand-in for the Anthropic messages API, for offline runs and tests.
+
+Point a client at it with ``anthropic.AsyncAnthropic(base_url=server.url, api_key="stub")``.
+It answers ``POST /v1/messages`` with a ``tool_use`` block whose input is a
+keyword-based guess at the travel request attributes, after a configurable
+latency, and can inject 429/5xx errors. It also mocks the Message Batches
+endpoints: a batch stays ``in_progress`` for ``batch_seconds`` and its results
+are streamed back as JSONL in shuffled order (like the real API, which doesn't
+keep request order), with injected errors as ``errored`` results.
+
+Prompt caching is simulated: the prompt up to the last ``cache_control``
+breakpoint (in tools, system, messages order) is remembered for
+``prompt_cache_ttl`` seconds, and ``usage`` reports it as
+``cache_creation_input_tokens`` the first time and ``cache_read_input_tokens``
+after that. Only uncached tokens cost ``prefill_seconds_per_token``, so the
+time to first token of ``"stream": true`` requests (answered as server-sent
+events) drops on cache reads the way the real API's does.
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+CITIES = {
+    "tokyo": "Tokyo, Japan",
+    "london": "London, United Kingdom",
+    "san francisco": "San Francisco, California, USA",
+    "new york": "New York City, New York, USA",
+    "paris": "Paris, France",
+}
+BUDGET_KEYWORDS = [("luxur", "high"), ("mid-range", "medium"), ("budget", "low"), ("cheap", "low")]
+PURPOSE_KEYWORDS = [("business", "business"), ("honeymoon", "pleasure"), ("vacation", "pleasure"),
+                    ("backpacking", "pleasure"), ("cultural", "pleasure"), ("romantic", "pleasure")]
+
+ERROR_TYPES = {429: "rate_limit_error", 500: "api_error", 529: "overloaded_error"}
+
+
+def guess_travel_attributes(text: str) -> Dict[str, str]:
+    """Deterministic keyword extraction with the same fields as ``tool_schema``."""
+    lowered = text.lower()
+    location = next((name for key, name in CITIES.items() if key in lowered), "not_stated")
+    budget_level = next((level for key, level in BUDGET_KEYWORDS if key in lowered), "not_stated")
+    purpose = next((value for key, value in PURPOSE_KEYWORDS if key in lowered), "not_stated")
+    return {"location": location, "budget_level": budget_level, "purpose": purpose}
+
+
+def count_tokens(value: Any) -> int:
+    """Rough token count (words and punctuation) of any JSON value."""
+    return len(re.findall(r"\w+|[^\w\s]", json.dumps(value) if not isinstance(value, str) else value))
+
+
+def user_text(messages: list) -> str:
+    content = messages[-1]["content"]
+    if isinstance(content, str):
+        return content
+    return " ".join(block.get("text", "") for block in content if block.get("type") == "text")
+
+
+def _without_cache_control(block: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in block.items() if key != "cache_control"}
+
+
+def prompt_blocks(body: Dict[str, Any]) -> List[Tuple[Dict[str, Any], int, bool]]:
+    """``(block, tokens, has breakpoint)`` for each prompt block, in the order the API caches them."""
+    system = body.get("system") or []
+    if isinstance(system, str):
+        system = [{"type": "text", "text": system}]
+    blocks = [(tool, count_tokens(_without_cache_control(tool)), "cache_control" in tool)
+              for tool in body.get("tools", [])]
+    blocks += [(block, count_tokens(block["text"]), "cache_control" in block) for block in system]
+    for message in body["messages"]:
+        content = message["content"]
+        if isinstance(content, str):
+            content = [{"type": "text", "text": content}]
+        blocks += [(block, count_tokens(block.get("text", block)), "cache_control" in block) for block in content]
+    return blocks
+
+
+class StubState:
+    """Configuration and counters shared by the handler threads."""
+
+    def __init__(self, latency: Union[float, Tuple[float, float]] = 0.0, error_rate: float = 0.0,
+                 error_status: int = 429, fail_first: int = 0, seed: int = 0, batch_seconds: float = 0.1,
+                 prefill_seconds_per_token: float = 0.0, prompt_cache_ttl: float = 300.0,
+                 model_latency: Optional[Dict[str, Union[float, Tuple[float, float]]]] = None):
+        self.latency = latency
+        self.model_latency = model_latency or {}  # overrides ``latency`` for these models
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.fail_first = fail_first
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.batch_seconds = batch_seconds
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self.prefill_seconds_per_token = prefill_seconds_per_token
+        self.prompt_cache_ttl = prompt_cache_ttl
+        self.prompt_cache: Dict[str, float] = {}  # prefix hash -> expiry
+
+    def sleep(self, model: Optional[str] = None) -> None:
+        latency = self.model_latency.get(model, self.latency)
+        if isinstance(latency, (tuple, list)):
+            with self.lock:
+                latency = self.random.uniform(*latency)
+        if latency:
+            time.sleep(latency)
+
+    def prompt_usage(self, body: Dict[str, Any]) -> Dict[str, int]:
+        """Input token counts of a request, caching its prefix up to the last breakpoint."""
+        blocks = prompt_blocks(body)
+        total = sum(tokens for _, tokens, _ in blocks)
+        breakpoints = [i for i, (_, _, marked) in enumerate(blocks) if marked]
+        if not breakpoints:
+            return {"input_tokens": total, "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0}
+        prefix = blocks[:breakpoints[-1] + 1]
+        canonical = json.dumps([body["model"]] + [_without_cache_control(block) for block, _, _ in prefix],
+                               sort_keys=True)
+        key = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+        prefix_tokens = sum(tokens for _, tokens, _ in prefix)
+        now = time.time()
+        with self.lock:
+            hit = self.prompt_cache.get(key, 0.0) > now
+            self.prompt_cache[key] = now + self.prompt_cache_ttl  # reads refresh the TTL too
+        return {
+            "input_tokens": total - prefix_tokens,
+            "cache_creation_input_tokens": 0 if hit else prefix_tokens,
+            "cache_read_input_tokens": prefix_tokens if hit else 0,
+        }
+
+    def prefill(self, usage: Dict[str, int]) -> None:
+        uncached = usage["input_tokens"] + usage["cache_creation_input_tokens"]
+        if self.prefill_seconds_per_token:
+            time.sleep(uncached * self.prefill_seconds_per_token)
+
+    def should_fail(self) -> bool:
+        with self.lock:
+            self.requests += 1
+            fail = self.requests <= self.fail_first or self.random.random() < self.error_rate
+            self.errors += fail
+            return fail
+
+
+def message_response(body: Dict[str, Any], usage: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    """A messages API response that calls the first tool with guessed attributes.
+
+    ``usage`` holds the input token counts (default: the whole prompt, uncached).
+    """
+    text = user_text(body["messages"])
+    if usage is None:
+        total = sum(tokens for _, tokens, _ in prompt_blocks(body))
+        usage = {"input_tokens": total, "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0}
+    tool = body["tools"][0]
+    content = [{"type": "tool_use", "id": f"toolu_{uuid.uuid4().hex[:24]}", "name": tool["name"],
+                "input": guess_travel_attributes(text)}]
+    return {
+        "id": f"msg_{uuid.uuid4().hex[:24]}",
+        "type": "message",
+        "role": "assistant",
+        "model": body["model"],
+        "content": content,
+        "stop_reason": "tool_use",
+        "stop_sequence": None,
+        "usage": {**usage, "output_tokens": count_tokens(content[0]["input"])},
+    }
+
+
+def stream_events(message: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """The server-sent events of a streamed ``message``: its tool input arrives as JSON deltas."""
+    block = message["content"][0]
+    usage = {**message["usage"], "output_tokens": 1}
+    yield {"type": "message_start", "message": {**message, "content": [], "stop_reason": None, "usage": usage}}
+    yield {"type": "content_block_start", "index": 0, "content_block": {**block, "input": {}}}
+    partial_json = json.dumps(block["input"])
+    middle = len(partial_json) // 2
+    for chunk in (partial_json[:middle], partial_json[middle:]):
+        yield {"type": "content_block_delta", "index": 0, "delta": {"type": "input_json_delta", "partial_json": chunk}}
+    yield {"type": "content_block_stop", "index": 0}
+    yield {"type": "message_delta", "delta": {"stop_reason": message["stop_reason"], "stop_sequence": None},
+           "usage": {"output_tokens": message["usage"]["output_tokens"]}}
+    yield {"type": "message_stop"}
+
+
+def _timestamp(seconds: float) -> str:
+    return datetime.datetime.fromtimestamp(seconds, datetime.timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def create_batch(state: StubState, body: Dict[str, Any]) -> Dict[str, Any]:
+    """Register a batch and compute its results up front (each request may be an injected error)."""
+    batch_id = f"msgbatch_{uuid.uuid4().hex[:24]}"
+    results = []
+    for request in body["requests"]:
+        if state.should_fail():
+            error = {"type": ERROR_TYPES.get(state.error_status, "api_error"), "message": "injected error"}
+            result = {"type": "errored", "error": {"type": "error", "error": error}}
+        else:
+            result = {"type": "succeeded", "message": message_response(request["params"])}
+        results.append({"custom_id": request["custom_id"], "result": result})
+    with state.lock:
+        state.random.shuffle(results)
+        state.batches[batch_id] = {"created": time.time(), "results": results}
+    return batch_status(state, batch_id, "")
+
+
+def batch_status(state: StubState, batch_id: str, base_url: str) -> Dict[str, Any]:
+    batch = state.batches[batch_id]
+    ended = time.time() - batch["created"] >= state.batch_seconds
+    results = batch["results"]
+    succeeded = sum(r["result"]["type"] == "succeeded" for r in results)
+    return {
+        "id": batch_id,
+        "type": "message_batch",
+        "processing_status": "ended" if ended else "in_progress",
+        "request_counts": {
+            "processing": 0 if ended else len(results),
+            "succeeded": succeeded if ended else 0,
+            "errored": len(results) - succeeded if ended else 0,
+            "canceled": 0,
+            "expired": 0,
+        },
+        "created_at": _timestamp(batch["created"]),
+        "expires_at": _timestamp(batch["created"] + 24 * 3600),
+        "ended_at": _timestamp(batch["created"] + state.batch_seconds) if ended else None,
+        "cancel_initiated_at": None,
+        "archived_at": None,
+        "results_url": f"{base_url}/v1/messages/batches/{batch_id}/results" if ended else None,
+    }
+
+
+def make_handler(state: StubState):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are separate writes; without this, keep-alive clients hit delayed-ACK stalls
+        disable_nagle_algorithm = True
+
+        def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_events(self, events: Iterator[Dict[str, Any]]) -> None:
+            # Chunked, so the connection stays reusable without knowing the length up front
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for event in events:
+                data = f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _read_json(self) -> Dict[str, Any]:
+            return json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+
+        def _not_found(self, path: str) -> None:
+            self._send_json(404, {"type": "error", "error": {"type": "not_found_error", "message": path}})
+
+        @property
+        def base_url(self) -> str:
+            return f"http://{self.headers.get('Host')}"
+
+        def do_GET(self) -> None:
+            parts = self.path.split("?")[0].strip("/").split("/")
+            if parts[:3] != ["v1", "messages", "batches"] or len(parts) not in (4, 5):
+                return self._not_found(self.path)
+            batch_id = parts[3]
+            if batch_id not in state.batches:
+                return self._not_found(self.path)
+            if len(parts) == 4:
+                return self._send_json(200, batch_status(state, batch_id, self.base_url))
+            if parts[4] != "results" or batch_status(state, batch_id, "")["processing_status"] != "ended":
+                return self._not_found(self.path)
+            body = "".join(json.dumps(result) + "\n" for result in state.batches[batch_id]["results"]).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/binary")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self) -> None:
+            path = self.path.split("?")[0]
+            if path == "/v1/messages/batches":
+                return self._send_json(200, create_batch(state, self._read_json()))
+            if path != "/v1/messages":
+                return self._not_found(path)
+            body = self._read_json()
+            with state.lock:
+                state.in_flight += 1
+                state.max_in_flight = max(state.max_in_flight, state.in_flight)
+            try:
+                state.sleep(body.get("model"))
+                if state.should_fail():
+                    error = {"type": ERROR_TYPES.get(state.error_status, "api_error"), "message": "injected error"}
+                    return self._send_json(state.error_status, {"type": "error", "error": error},
+                                           {"retry-after": "0"})
+                usage = state.prompt_usage(body)
+                state.prefill(usage)
+                message = message_response(body, usage)
+                if body.get("stream"):
+                    return self._send_events(stream_events(message))
+                self._send_json(200, message)
+            finally:
+                with state.lock:
+                    state.in_flight -= 1
+
+        def log_message(self, format, *args) -> None:
+            pass
+
+    return StubHandler
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 drops connections when a pipeline opens many at once
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class StubServer:
+    """Run the stub on a background thread; use as a context manager."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, **options: Any):
+        self.state = StubState(**options)
+        self.httpd = _StubHTTPServer((host, port), make_handler(self.state))
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stub of the Anthropic messages API.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, nargs="+", default=[0.2],
+                        help="Seconds per request, or MIN MAX for a uniform range")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=429)
+    parser.add_argument("--prefill-seconds-per-token", type=float, default=0.0,
+                        help="Extra time to first token per uncached prompt token")
+    args = parser.parse_args()
+
+    latency = args.latency[0] if len(args.latency) == 1 else tuple(args.latency[:2])
+    server = StubServer(port=args.port, latency=latency, error_rate=args.error_rate, error_status=args.error_status,
+                        prefill_seconds_per_token=args.prefill_seconds_per_token)
+    print(f"Stub messages API on {server.url} (set ANTHROPIC_BASE_URL to use it)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
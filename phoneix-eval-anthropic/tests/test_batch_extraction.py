@@ -0,0 +1,46 @@
+import anthropic
+
+from batch_extraction import BatchError, BatchExtractor
+from extraction import travel_requests
+from response_cache import ResponseCache
+from stub_server import StubServer, guess_travel_attributes
+
+
+def make_client(server):
+    return anthropic.Anthropic(base_url=server.url, api_key="stub", max_retries=0)
+
+
+def expected(requests):
+    return [guess_travel_attributes(request) for request in requests]
+
+
+def test_batches_stream_back_in_input_order():
+    requests = travel_requests * 5
+    with StubServer(batch_seconds=0.05) as server:
+        extractor = BatchExtractor(make_client(server), max_batch_size=20, poll_interval=0.01)
+        streamed = []
+        results = extractor.run(requests, on_result=lambda index, value: streamed.append(index))
+
+    assert results == expected(requests)
+    assert len(extractor.batch_ids) == 3  # 50 requests in batches of 20
+    assert sorted(streamed) == list(range(50)) and streamed != list(range(50))
+
+
+def test_errored_results_are_resubmitted_then_reported():
+    with StubServer(batch_seconds=0, fail_first=3, error_status=529) as server:
+        extractor = BatchExtractor(make_client(server), poll_interval=0.01, max_resubmits=1)
+        assert extractor.run(travel_requests) == expected(travel_requests)
+        assert len(extractor.batch_ids) == 2 and server.state.requests == 13
+
+    with StubServer(batch_seconds=0, error_rate=1.0) as server:
+        results = BatchExtractor(make_client(server), poll_interval=0.01, max_resubmits=0).run(travel_requests[:2])
+    assert all(isinstance(r, BatchError) and r.result_type == "errored" for r in results)
+
+
+def test_cached_requests_are_not_resubmitted():
+    with StubServer(batch_seconds=0) as server, ResponseCache(":memory:") as cache:
+        client = make_client(server)
+        BatchExtractor(client, poll_interval=0.01, cache=cache).run(travel_requests[:4])
+        extractor = BatchExtractor(client, poll_interval=0.01, cache=cache)
+        assert extractor.run(travel_requests) == expected(travel_requests)
+        assert server.state.requests == len(travel_requests)
@@ -0,0 +1,93 @@
+import time
+
+import jsonschema
+import numpy as np
+import pandas as pd
+
+from evaluation import evaluate_extractions, field_accuracy, join_spans
+from extraction import tool_schema, travel_request_labels
+
+
+def test_validation_and_per_field_scores():
+    extractions = [
+        {"location": "tokyo", "budget_level": "high", "purpose": "pleasure"},  # all correct
+        {"location": "London", "budget_level": "expensive", "purpose": "pleasure"},  # enum violation
+        {"location": "San Francisco, CA", "budget_level": "low"},  # missing purpose
+        {"location": ["New York"], "budget_level": "not_stated", "purpose": "pleasure"},  # wrong type
+        RuntimeError("request failed"),
+        {"location": "Tokyo", "budget_level": "not_stated", "purpose": "pleasure", "extra": 1},  # wrong budget
+    ]
+    labels = travel_request_labels[:4] + [travel_request_labels[1], travel_request_labels[0]]
+    results = evaluate_extractions(extractions, labels, tool_schema,
+                                   span_ids=[f"{i:016x}" for i in range(6)])
+
+    assert results["valid"].tolist() == [True, False, False, False, False, True]
+    assert "'expensive' is not one of" in results.loc[1, "errors"]
+    assert "'purpose' is a required property" in results.loc[2, "errors"]
+    assert results.loc[3, "errors"] == "['New York'] is not of type 'string'"
+    assert results["location_correct"].tolist() == [True, False, False, False, False, True]
+    assert results["all_correct"].tolist() == [True, False, False, False, False, False]
+
+    accuracy = field_accuracy(results)
+    assert accuracy["schema_valid"] == 2 / 6 and accuracy["location"] == 2 / 6 and accuracy["all"] == 1 / 6
+
+
+def test_columns_without_any_strings():
+    labels = travel_request_labels[:2]
+    extractions = [{**label, "location": 7} for label in labels]
+    results = evaluate_extractions(extractions, labels, tool_schema)
+    assert not results["valid"].any() and not results["location_correct"].any()
+    assert results.loc[0, "errors"] == "7 is not of type 'string'"
+
+    extractions = [{**label, "location": None} for label in labels]
+    results = evaluate_extractions(extractions, labels, tool_schema)
+    assert not results["valid"].any() and not results["location_correct"].any()
+
+
+def test_join_to_spans_by_span_id():
+    results = evaluate_extractions(travel_request_labels[:3], travel_request_labels[:3], tool_schema,
+                                   span_ids=["a" * 16, "b" * 16, None])
+    spans = pd.DataFrame(
+        {"name": ["extract_travel_request_attributes", "Messages", "extract_travel_request_attributes"]},
+        index=pd.Index(["b" * 16, "c" * 16, "a" * 16], name="context.span_id"),
+    )
+    joined = join_spans(results, spans)
+    assert joined["context.span_id"].tolist()[:2] == ["a" * 16, "b" * 16]
+    assert pd.isna(joined.loc[2, "context.span_id"]) and pd.isna(joined.loc[2, "name"])
+    assert joined["name"].tolist()[:2] == ["extract_travel_request_attributes"] * 2
+    assert joined["eval.all_correct"].all()
+
+
+def test_vectorized_type_checks_agree_with_jsonschema():
+    schema = {
+        "type": "object",
+        "properties": {"flag": {"type": "boolean"}, "tags": {"type": "array"}, "meta": {"type": "object"},
+                       "name": {"type": "string"}},
+        "required": ["name"],
+    }
+    values = [True, False, 1, 0, "True", "[1]", "{}", [1], [], {"a": 1}, {}, 1.5, "x"]
+    extractions = [{"name": "x", field: value} for field in ("flag", "tags", "meta", "name") for value in values]
+    results = evaluate_extractions(extractions, [{"name": "x"}] * len(extractions), schema)
+    validator = jsonschema.Draft202012Validator(schema)
+    assert results["valid"].tolist() == [validator.is_valid(record) for record in extractions]
+
+
+def test_scales_to_100k_rows(monkeypatch):
+    rng = np.random.default_rng(0)
+    labels = [travel_request_labels[i] for i in rng.integers(0, 10, 100_000)]
+    extractions = [dict(label) for label in labels]
+    for i in rng.choice(100_000, 1_000, replace=False):
+        extractions[i]["budget_level"] = "unknown"
+
+    # Guard against per-row Python callbacks creeping back into the column checks and scoring
+    def no_row_callbacks(*args, **kwargs):
+        raise AssertionError("evaluate_extractions must not call a Python function per row")
+
+    monkeypatch.setattr(pd.Series, "map", no_row_callbacks)
+    monkeypatch.setattr(pd.Series, "apply", no_row_callbacks)
+    start = time.perf_counter()
+    results = evaluate_extractions(extractions, labels, tool_schema)
+    elapsed = time.perf_counter() - start
+    assert (~results["valid"]).sum() == 1_000
+    assert field_accuracy(results)["budget_level"] == 0.99
+    assert elapsed < 30  # about a second; a per-row loop over 100k rows with pandas overhead is far slower
@@ -0,0 +1,27 @@
+import json
+
+from extraction import travel_requests
+from model_benchmark import format_table, latency_histogram, run_benchmark
+
+
+def test_latency_histogram_buckets_by_upper_edge():
+    histogram = latency_histogram([0.5, 1, 1.5, 30, 30, 12000], edges=[1, 10, 100])
+    assert histogram == {"<=1": 2, "<=10": 1, "<=100": 2, ">100": 1}
+
+
+def test_offline_report_compares_models_and_concurrency():
+    models = ["fast-model", "slow-model"]
+    report = run_benchmark(models, [1, 5], repeats=1, warmup=0,
+                           model_latency={"fast-model": 0.01, "slow-model": 0.05})
+    rows = {(row["model"], row["concurrency"]): row for row in report["rows"]}
+
+    assert list(rows) == [(model, concurrency) for model in models for concurrency in [1, 5]]
+    for row in rows.values():
+        assert row["requests"] == len(travel_requests) and row["errors"] == 0
+        assert sum(row["histogram_ms"].values()) == row["requests"]
+        assert row["schema_valid_rate"] == 1.0 and row["output_tokens_per_s"] > 0
+        assert row["client_overhead_ms"] > 0 and row["p50_ms"] <= row["p99_ms"]
+    assert rows["fast-model", 1]["mean_ms"] < rows["slow-model", 1]["mean_ms"]
+    assert rows["slow-model", 5]["requests_per_s"] > 2 * rows["slow-model", 1]["requests_per_s"]
+    assert json.loads(json.dumps(report))["settings"]["model_latency"] == {"fast-model": 0.01, "slow-model": 0.05}
+    assert format_table(report["rows"]).count("\n") == 4
@@ -0,0 +1,79 @@
+import asyncio
+import random
+import time
+
+import anthropic
+import pytest
+
+from extraction import travel_requests
+from pipeline import ExtractionPipeline, TokenBucket, backoff_delay
+from stub_server import StubServer, guess_travel_attributes
+
+
+def make_client(server):
+    return anthropic.AsyncAnthropic(base_url=server.url, api_key="stub", max_retries=0)
+
+
+def test_results_are_ordered_and_concurrency_is_bounded():
+    with StubServer(latency=(0.01, 0.05)) as server:
+        pipeline = ExtractionPipeline(make_client(server), concurrency=4)
+        results = asyncio.run(pipeline.run(travel_requests * 3))
+
+    assert results == [guess_travel_attributes(request) for request in travel_requests * 3]
+    assert 1 < server.state.max_in_flight <= 4
+
+
+def test_concurrency_beats_sequential_latency():
+    with StubServer(latency=0.1) as server:
+        pipeline = ExtractionPipeline(make_client(server), concurrency=10)
+        start = time.perf_counter()
+        asyncio.run(pipeline.run(travel_requests))
+        elapsed = time.perf_counter() - start
+    # 10 requests of 100 ms each: at least 1 s sequentially, ~0.1 s with 10 in flight
+    assert server.state.max_in_flight >= 5
+    assert elapsed < 1.0
+
+
+def test_retries_rate_limit_and_server_errors():
+    with StubServer(fail_first=3, error_status=429) as server:
+        pipeline = ExtractionPipeline(make_client(server), concurrency=1, base_delay=0.01, seed=0)
+        results = asyncio.run(pipeline.run(travel_requests[:2]))
+        assert server.state.errors == 3 and server.state.requests == 5
+    assert results[0] == guess_travel_attributes(travel_requests[0])
+
+    with StubServer(fail_first=10, error_status=529) as server:
+        pipeline = ExtractionPipeline(make_client(server), concurrency=2, max_retries=1, base_delay=0.01)
+        results = asyncio.run(pipeline.run(travel_requests[:2], return_exceptions=True))
+        assert all(isinstance(r, anthropic.APIStatusError) and r.status_code == 529 for r in results)
+        with pytest.raises(anthropic.APIStatusError):
+            asyncio.run(pipeline.run(travel_requests[:2]))
+
+
+def test_latencies_exclude_rate_limit_waits():
+    with StubServer(latency=0.01) as server:
+        pipeline = ExtractionPipeline(make_client(server), concurrency=4, requests_per_second=10, burst=1)
+        asyncio.run(pipeline.run(travel_requests[:4]))
+    # One token every 100 ms: the last request waits ~0.3 s for its token, then takes ~10 ms
+    assert pipeline.rate_limit_waits[0] < 0.05
+    assert sum(pipeline.rate_limit_waits) >= 0.5
+    assert max(pipeline.latencies) < max(pipeline.rate_limit_waits)
+
+
+def test_token_bucket_limits_request_rate():
+    async def acquire_all(bucket, n):
+        start = time.monotonic()
+        for _ in range(n):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    # A burst of 5 is free; the next 5 tokens take 5 / 50 = 0.1 s. Sleeps can run late on a
+    # loaded machine but never early, so only the lower bound is tight
+    elapsed = asyncio.run(acquire_all(TokenBucket(rate=50, capacity=5), 10))
+    assert 0.08 <= elapsed < 1.0
+
+
+def test_backoff_delay_is_jittered_and_capped():
+    rng = random.Random(0)
+    delays = [backoff_delay(attempt, base=1.0, cap=4.0, rng=rng) for attempt in range(10)]
+    assert all(0 <= delay <= min(4.0, 2 ** attempt) for attempt, delay in enumerate(delays))
+    assert len(set(delays)) == len(delays)
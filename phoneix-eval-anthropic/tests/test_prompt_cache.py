@@ -0,0 +1,75 @@
+import asyncio
+
+import anthropic
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+import response_cache
+from extraction import (
+    build_message_params,
+    extract_raw_travel_request_attributes_string,
+    system_message,
+    tool_schema,
+    travel_requests,
+)
+from pipeline import ExtractionPipeline
+from stub_server import StubServer, guess_travel_attributes
+
+
+def test_system_message_ends_the_cached_prefix():
+    params = build_message_params(travel_requests[0], tool_schema, system_message)
+    assert params["system"] == [{"type": "text", "text": system_message, "cache_control": {"type": "ephemeral"}}]
+    assert params["tools"] == [tool_schema]
+    assert build_message_params(travel_requests[0], tool_schema, system_message, prompt_cache=False)["system"] == (
+        system_message
+    )
+
+
+def test_stub_reports_cache_writes_then_reads():
+    with StubServer() as server:
+        client = anthropic.Anthropic(base_url=server.url, api_key="stub", max_retries=0)
+        usages = [
+            client.messages.create(**build_message_params(request, tool_schema, system_message)).usage
+            for request in travel_requests[:3]
+        ]
+        uncached = client.messages.create(
+            **build_message_params(travel_requests[0], tool_schema, system_message, prompt_cache=False)
+        ).usage
+        assert extract_raw_travel_request_attributes_string(
+            travel_requests[0], tool_schema, system_message, client
+        ) == guess_travel_attributes(travel_requests[0])
+
+    prefix = usages[0].cache_creation_input_tokens
+    assert prefix > 0 and usages[0].cache_read_input_tokens == 0
+    assert all(u.cache_read_input_tokens == prefix and u.cache_creation_input_tokens == 0 for u in usages[1:])
+    assert uncached.cache_read_input_tokens == 0 and uncached.input_tokens == prefix + usages[0].input_tokens
+
+
+def test_pipeline_records_ttft_and_savings_on_spans(monkeypatch):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(response_cache, "tracer", provider.get_tracer("test"))
+
+    # 1 ms per uncached prompt token: the first request prefills the whole prompt, the rest only the user message
+    with StubServer(prefill_seconds_per_token=0.001) as server:
+        client = anthropic.AsyncAnthropic(base_url=server.url, api_key="stub", max_retries=0)
+        pipeline = ExtractionPipeline(client, concurrency=1)
+        results = asyncio.run(pipeline.run(travel_requests))
+
+    assert results == [guess_travel_attributes(request) for request in travel_requests]
+    stats = pipeline.prompt_cache.summary()
+    assert stats["requests"] == 10 and stats["cache_read_input_tokens"] == 9 * stats["cache_creation_input_tokens"]
+    assert stats["saved_input_tokens"] == stats["cache_read_input_tokens"] and stats["cached_prompt_fraction"] > 0.5
+
+    spans = sorted(
+        (span for span in exporter.get_finished_spans() if span.name == "extract_travel_request_attributes"),
+        key=lambda span: span.start_time,
+    )
+    first, rest = spans[0].attributes, [span.attributes for span in spans[1:]]
+    assert first["llm.token_count.prompt_details.cache_write"] > 0
+    assert first["llm.token_count.prompt_details.cache_read"] == 0
+    prefix = stats["cache_creation_input_tokens"]
+    assert all(attributes["prompt_cache.saved_input_tokens"] == prefix for attributes in rest)
+    assert all(attributes["llm.time_to_first_token_ms"] < first["llm.time_to_first_token_ms"] for attributes in rest)
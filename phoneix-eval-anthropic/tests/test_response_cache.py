@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+import anthropic
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+import response_cache
+from extraction import build_message_params, system_message, tool_schema, travel_requests
+from pipeline import ExtractionPipeline
+from response_cache import ResponseCache, cache_key
+from stub_server import StubServer
+
+
+def test_cache_key_covers_the_whole_request():
+    params = build_message_params(travel_requests[0], tool_schema, system_message)
+    assert cache_key(params) == cache_key(dict(reversed(list(params.items()))))
+    for changed in [
+        build_message_params(travel_requests[1], tool_schema, system_message),
+        build_message_params(travel_requests[0], tool_schema, system_message + " "),
+        build_message_params(travel_requests[0], tool_schema, system_message, model="claude-3-haiku-20240307"),
+        build_message_params(travel_requests[0], {**tool_schema, "description": "x"}, system_message),
+    ]:
+        assert cache_key(changed) != cache_key(params)
+
+
+def test_ttl_and_size_eviction(tmp_path):
+    with ResponseCache(str(tmp_path / "cache.sqlite"), max_entries=3) as cache:
+        for i in range(5):
+            cache.put(f"k{i}", {"i": i})
+            time.sleep(0.001)
+        cache.get("k2")  # most recently used now
+        cache.put("k5", {"i": 5})
+        assert [cache.get(f"k{i}") is not None for i in range(6)] == [False, False, True, False, True, True]
+
+    with ResponseCache(":memory:", ttl_seconds=0.05) as cache:
+        cache.put("k", [1, 2])
+        assert cache.get("k") == [1, 2]
+        time.sleep(0.06)
+        assert cache.get("k", "gone") == "gone"
+
+    with ResponseCache(":memory:", max_bytes=25) as cache:
+        for i in range(4):
+            cache.put(f"k{i}", "x" * 8)  # 10 bytes of JSON each
+            time.sleep(0.001)
+        assert cache.stats()["entries"] == 2 and cache.get("k3") == "x" * 8
+
+
+def test_rerun_is_served_from_cache_and_traced(tmp_path, monkeypatch):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(response_cache, "tracer", provider.get_tracer("test"))
+    path = str(tmp_path / "cache.sqlite")
+
+    with StubServer(latency=0.05) as server:
+        client = anthropic.AsyncAnthropic(base_url=server.url, api_key="stub", max_retries=0)
+        with ResponseCache(path) as cache:
+            first = asyncio.run(ExtractionPipeline(client, cache=cache).run(travel_requests))
+        with ResponseCache(path) as cache:  # a later run reopens the same file
+            start = time.perf_counter()
+            second = asyncio.run(ExtractionPipeline(client, cache=cache, requests_per_second=0.1).run(travel_requests))
+            elapsed = time.perf_counter() - start
+            assert cache.stats()["hits"] == len(travel_requests)
+        assert server.state.requests == len(travel_requests)
+
+    assert second == first and elapsed < 0.5
+    hits = [span.attributes["cache.hit"] for span in exporter.get_finished_spans()]
+    assert hits == [False] * len(travel_requests) + [True] * len(travel_requests)
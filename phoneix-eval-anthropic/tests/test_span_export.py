@@ -0,0 +1,108 @@
+import datetime
+import os
+
+import pandas as pd
+import pyarrow.dataset as ds
+import pytest
+
+from span_export import PageTooLargeError, export_spans, load_watermark, read_spans
+
+T0 = datetime.datetime(2026, 10, 17, 22, 0, tzinfo=datetime.timezone.utc)
+
+
+def make_spans(n, start, step=datetime.timedelta(seconds=30), offset=0):
+    rows = []
+    for i in range(offset, offset + n):
+        started = start + (i - offset) * step
+        rows.append({
+            "context.span_id": f"span-{i:05d}",
+            "name": "Messages",
+            "start_time": started,
+            "end_time": started + datetime.timedelta(milliseconds=400),
+            "status_code": "OK",
+            # Phoenix leaves some attributes nested: dicts, lists, and numbers that are sometimes missing
+            "attributes.metadata": {"run": {"id": i % 3}, "tag": "eval"},
+            "attributes.llm.input_messages": [{"message.role": "user", "message.content": f"request {i}"}],
+            "attributes.llm.token_count.prompt": i if i % 4 else None,
+            "attributes.cache.hit": bool(i % 2),
+        })
+    return pd.DataFrame(rows).set_index("context.span_id")
+
+
+class FakePagedSource:
+    """Newest-first with a hard limit, like the Phoenix client; counts the pages requested."""
+
+    def __init__(self, spans):
+        self.spans = spans
+        self.calls = []
+
+    def __call__(self, start, end, limit):
+        self.calls.append((start, end, limit))
+        page = self.spans[(self.spans["start_time"] >= start) & (self.spans["start_time"] < end)]
+        return page.sort_values("start_time", ascending=False).head(limit) if len(page) else None
+
+
+def test_exports_every_span_once_with_flat_typed_columns(tmp_path):
+    spans = make_spans(500, T0)  # about four hours, across midnight
+    source = FakePagedSource(spans)
+    summary = export_spans(source, str(tmp_path), start=T0, end=T0 + datetime.timedelta(hours=5), page_size=64)
+
+    assert summary["spans"] == 500 and summary["pages"] >= 500 // 64
+    assert sorted(os.listdir(tmp_path)) == ["_watermark.json", "start_date=2026-10-17", "start_date=2026-10-18"]
+    exported = read_spans(str(tmp_path))
+    assert sorted(exported.index) == sorted(spans.index)
+    assert exported["attributes.metadata.run.id"].tolist() == [int(i[-5:]) % 3 for i in exported.index]
+    assert exported["attributes.metadata.tag"].eq("eval").all()
+    assert exported["attributes.llm.token_count.prompt"].isna().sum() == 125
+    assert pd.api.types.is_numeric_dtype(exported["attributes.llm.token_count.prompt"])
+    assert pd.api.types.is_bool_dtype(exported["attributes.cache.hit"])
+    assert exported["attributes.llm.input_messages"].str.startswith('[{"message.role": "user"').all()
+
+
+def test_later_runs_export_only_spans_after_the_watermark(tmp_path):
+    source = FakePagedSource(make_spans(100, T0))
+    export_spans(source, str(tmp_path), start=T0, end=T0 + datetime.timedelta(hours=1))
+    assert load_watermark(str(tmp_path)) == {"end_time": T0 + datetime.timedelta(hours=1), "exported_spans": 100}
+
+    source.spans = pd.concat([source.spans, make_spans(20, T0 + datetime.timedelta(hours=1), offset=100)])
+    source.calls.clear()
+    summary = export_spans(source, str(tmp_path), end=T0 + datetime.timedelta(hours=2), overlap=datetime.timedelta(0))
+    assert summary["spans"] == 20
+    assert all(start >= T0 + datetime.timedelta(hours=1) for start, _, _ in source.calls)
+    assert load_watermark(str(tmp_path))["exported_spans"] == 120
+    assert len(read_spans(str(tmp_path))) == 120
+    assert read_spans(str(tmp_path), ["name"], span_ids=["span-00003", "span-00110"]).index.tolist() == [
+        "span-00003", "span-00110"
+    ]
+
+
+def test_spans_arriving_late_behind_the_watermark_are_exported_next_run(tmp_path):
+    source = FakePagedSource(make_spans(100, T0))  # T0 to T0 + 50 min
+    export_spans(source, str(tmp_path), start=T0, end=T0 + datetime.timedelta(hours=1),
+                 window=datetime.timedelta(minutes=20))
+    assert load_watermark(str(tmp_path))["exported_spans"] == 100
+
+    # Started before the watermark, but only ingested after the first run
+    late = make_spans(2, T0 + datetime.timedelta(minutes=57), step=datetime.timedelta(seconds=1), offset=100)
+    source.spans = pd.concat([source.spans, late, make_spans(20, T0 + datetime.timedelta(hours=1), offset=102)])
+    source.calls.clear()
+    export_spans(source, str(tmp_path), end=T0 + datetime.timedelta(hours=2))
+
+    # Only the last 20-minute page (the one the 5-minute overlap falls in) is re-read and rewritten
+    assert min(start for start, _, _ in source.calls) == T0 + datetime.timedelta(minutes=40)
+    assert load_watermark(str(tmp_path))["exported_spans"] == 122
+    assert ds.dataset(str(tmp_path), format="parquet").count_rows() == 122
+    assert {"span-00100", "span-00101"} <= set(read_spans(str(tmp_path)).index)
+
+
+def test_end_defaults_to_a_grace_period_before_now(tmp_path):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    summary = export_spans(FakePagedSource(make_spans(1, now)), str(tmp_path), start=now - datetime.timedelta(hours=1),
+                           grace=datetime.timedelta(minutes=10))
+    assert summary["spans"] == 0 and summary["end"] < now - datetime.timedelta(minutes=9)
+
+
+def test_a_window_too_dense_to_page_raises(tmp_path):
+    source = FakePagedSource(make_spans(10, T0, step=datetime.timedelta(0)))
+    with pytest.raises(PageTooLargeError):
+        export_spans(source, str(tmp_path), start=T0, end=T0 + datetime.timedelta(minutes=1), page_size=5)
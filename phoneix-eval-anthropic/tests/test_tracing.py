@@ -0,0 +1,66 @@
+import time
+
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import Status, StatusCode, set_span_in_context
+
+from tracing import TailSamplingProcessor, TracingConfig, build_tracer_provider
+from tracing_benchmark import run_benchmark
+
+
+def make_provider(**options):
+    exporter = InMemorySpanExporter()
+    provider = build_tracer_provider(TracingConfig(batch=False, **options), exporter)
+    return provider, provider.get_tracer("test"), exporter
+
+
+def run_traces(tracer, n, fail_every=None):
+    for i in range(n):
+        with tracer.start_as_current_span("extract") as root:
+            with tracer.start_as_current_span("Messages"):
+                pass
+            if fail_every and i % fail_every == 0:
+                root.set_status(Status(StatusCode.ERROR))
+
+
+def test_head_sampling_keeps_whole_traces():
+    provider, tracer, exporter = make_provider(head_sample_ratio=0.25)
+    run_traces(tracer, 400)
+    spans = exporter.get_finished_spans()
+    assert 60 < len(spans) / 2 < 140
+    assert len({span.context.trace_id for span in spans}) * 2 == len(spans)
+
+
+def test_tail_sampling_keeps_errors_and_slow_traces():
+    provider, tracer, exporter = make_provider(tail_sample_ratio=0.0, tail_latency_ms=20)
+    run_traces(tracer, 20, fail_every=5)
+    with tracer.start_as_current_span("slow"):
+        time.sleep(0.03)
+    names = [span.name for span in exporter.get_finished_spans()]
+    assert names.count("extract") == 4 and names.count("Messages") == 4 and names.count("slow") == 1
+
+
+def test_tail_sampling_bounds_unfinished_traces():
+    exporter = InMemorySpanExporter()
+    processor = TailSamplingProcessor(SimpleSpanProcessor(exporter), ratio=1.0, max_buffered_traces=2)
+    provider, tracer, _ = make_provider()
+    provider.add_span_processor(processor)
+    roots = [tracer.start_span(f"root{i}") for i in range(4)]
+    for root in roots:
+        tracer.start_span("child", context=set_span_in_context(root)).end()
+    assert len(processor._traces) == 2 and len(exporter.get_finished_spans()) == 2
+
+
+def test_attributes_are_truncated():
+    provider, tracer, exporter = make_provider(max_attribute_length=16)
+    with tracer.start_as_current_span("extract") as span:
+        span.set_attribute("input.value", "x" * 1000)
+    assert exporter.get_finished_spans()[0].attributes["input.value"] == "x" * 16
+
+
+def test_benchmark_exports_through_the_collector_stand_in():
+    configs = {"batch": TracingConfig(), "head_0": TracingConfig(head_sample_ratio=0.0)}
+    rows = run_benchmark(configs, calls=10, warmup=2)
+    assert [row["config"] for row in rows] == ["untraced", "batch", "head_0"]
+    assert rows[1]["spans_exported"] == 12 and rows[1]["bytes_exported"] > 0
+    assert rows[2]["spans_exported"] == 0
@@ -0,0 +1,179 @@
+"""Tracing configuration for the Anthropic instrumentation: sampling, batching and attribute limits.
+
+``configure_tracing(TracingConfig(...))`` replaces ``phoenix.otel.register`` +
+``AnthropicInstrumentor().instrument``. It builds a tracer provider with
+
+* head sampling: a parent-based trace-ID ratio, decided when a trace starts;
+* tail sampling: once a trace's root span ends, keep it if any span errored or
+  the root took at least ``tail_latency_ms``, otherwise keep ``tail_sample_ratio``
+  of them (by trace ID, so the decision is stable);
+* a ``BatchSpanProcessor`` with a bounded queue, flushed in the background;
+  spans beyond ``max_queue_size`` are dropped instead of blocking calls;
+* a cap on attribute value length, so large prompts and tool schemas don't
+  bloat every exported span.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from typing import List, Optional
+
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, SpanLimits, SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SimpleSpanProcessor, SpanExporter
+from opentelemetry.sdk.trace.sampling import ALWAYS_ON, ParentBased, TraceIdRatioBased
+from opentelemetry.trace import StatusCode
+
+PROJECT_NAME_ATTRIBUTE = "openinference.project.name"  # the resource attribute Phoenix groups projects by
+TRACE_ID_MASK = (1 << 64) - 1
+
+
+@dataclass
+class TracingConfig:
+    project_name: str = "anthropic-tools"
+    endpoint: str = "http://localhost:6006/v1/traces"
+    head_sample_ratio: float = 1.0
+    tail_sample_ratio: float = 1.0
+    tail_latency_ms: Optional[float] = None
+    max_buffered_traces: int = 10_000
+    batch: bool = True
+    max_queue_size: int = 2048
+    max_export_batch_size: int = 512
+    schedule_delay_millis: float = 1000
+    export_timeout_millis: float = 30_000
+    max_attribute_length: Optional[int] = 4096
+
+    @classmethod
+    def from_env(cls, prefix: str = "TRACING_", **overrides) -> "TracingConfig":
+        """Read any field from ``{prefix}{FIELD_NAME}`` environment variables (e.g. ``TRACING_HEAD_SAMPLE_RATIO``)."""
+        values = {}
+        for field in fields(cls):
+            raw = os.getenv(prefix + field.name.upper())
+            if raw is None:
+                continue
+            kind = field.type if isinstance(field.type, type) else field.type.__args__[0]  # unwrap Optional[...]
+            values[field.name] = raw.lower() in ("1", "true", "yes") if kind is bool else kind(raw)
+        values.update(overrides)
+        return cls(**values)
+
+
+def _keep_by_trace_id(trace_id: int, ratio: float) -> bool:
+    # Same rule as TraceIdRatioBased, so head and tail decisions compose predictably
+    return (trace_id & TRACE_ID_MASK) < ratio * (TRACE_ID_MASK + 1)
+
+
+class TailSamplingProcessor(SpanProcessor):
+    """Buffer each trace's spans until its root ends, then forward or drop the whole trace.
+
+    At most ``max_buffered_traces`` unfinished traces are held; beyond that
+    the oldest one is decided early, so a trace whose root never ends can't
+    leak memory.
+    """
+
+    def __init__(self, delegate: SpanProcessor, ratio: float = 1.0, latency_ms: Optional[float] = None,
+                 max_buffered_traces: int = 10_000):
+        self.delegate = delegate
+        self.ratio = ratio
+        self.latency_ms = latency_ms
+        self.max_buffered_traces = max_buffered_traces
+        self.kept = 0
+        self.dropped = 0
+        self._traces: "OrderedDict[int, List[ReadableSpan]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def on_start(self, span, parent_context=None) -> None:
+        self.delegate.on_start(span, parent_context=parent_context)
+
+    def _keep(self, spans: List[ReadableSpan], root: Optional[ReadableSpan]) -> bool:
+        if any(span.status.status_code is StatusCode.ERROR for span in spans):
+            return True
+        if root is not None and self.latency_ms is not None:
+            if (root.end_time - root.start_time) / 1e6 >= self.latency_ms:
+                return True
+        return _keep_by_trace_id(spans[0].context.trace_id, self.ratio)
+
+    def _decide(self, spans: List[ReadableSpan], root: Optional[ReadableSpan]) -> None:
+        if self._keep(spans, root):
+            self.kept += 1
+            for span in spans:
+                self.delegate.on_end(span)
+        else:
+            self.dropped += 1
+
+    def on_end(self, span: ReadableSpan) -> None:
+        trace_id = span.context.trace_id
+        is_root = span.parent is None or span.parent.is_remote
+        decided = []
+        with self._lock:
+            spans = self._traces.setdefault(trace_id, [])
+            spans.append(span)
+            if is_root:
+                decided.append((self._traces.pop(trace_id), span))
+            elif len(self._traces) > self.max_buffered_traces:
+                decided.append((self._traces.popitem(last=False)[1], None))
+        for spans, root in decided:
+            self._decide(spans, root)
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.delegate.force_flush(timeout_millis)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pending, self._traces = list(self._traces.values()), OrderedDict()
+        for spans in pending:
+            self._decide(spans, None)
+        self.delegate.shutdown()
+
+
+def otlp_exporter(endpoint: str) -> SpanExporter:
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+    return OTLPSpanExporter(endpoint=endpoint)
+
+
+def build_span_processor(config: TracingConfig, exporter: SpanExporter) -> SpanProcessor:
+    if config.batch:
+        processor: SpanProcessor = BatchSpanProcessor(
+            exporter,
+            max_queue_size=config.max_queue_size,
+            schedule_delay_millis=config.schedule_delay_millis,
+            max_export_batch_size=config.max_export_batch_size,
+            export_timeout_millis=config.export_timeout_millis,
+        )
+    else:
+        processor = SimpleSpanProcessor(exporter)
+    if config.tail_sample_ratio < 1.0:
+        processor = TailSamplingProcessor(
+            processor, config.tail_sample_ratio, config.tail_latency_ms, config.max_buffered_traces
+        )
+    return processor
+
+
+def build_tracer_provider(config: TracingConfig, exporter: Optional[SpanExporter] = None) -> TracerProvider:
+    """A tracer provider for ``config`` exporting to ``exporter`` (default: OTLP/HTTP to ``config.endpoint``)."""
+    if config.max_attribute_length is not None:
+        # Truncation is the point of the limit; don't log a warning for every long attribute
+        logging.getLogger("opentelemetry.attributes").setLevel(logging.ERROR)
+    sampler = ALWAYS_ON if config.head_sample_ratio >= 1.0 else ParentBased(TraceIdRatioBased(config.head_sample_ratio))
+    provider = TracerProvider(
+        sampler=sampler,
+        resource=Resource.create({PROJECT_NAME_ATTRIBUTE: config.project_name}),
+        span_limits=SpanLimits(max_span_attribute_length=config.max_attribute_length),
+    )
+    provider.add_span_processor(build_span_processor(config, exporter or otlp_exporter(config.endpoint)))
+    return provider
+
+
+def configure_tracing(config: Optional[TracingConfig] = None, exporter: Optional[SpanExporter] = None,
+                      set_global: bool = True) -> TracerProvider:
+    """Build the tracer provider, make it global and instrument the Anthropic client with it."""
+    from openinference.instrumentation.anthropic import AnthropicInstrumentor
+
+    provider = build_tracer_provider(config or TracingConfig.from_env(), exporter)
+    if set_global:
+        trace.set_tracer_provider(provider)
+    AnthropicInstrumentor().instrument(tracer_provider=provider)
+    return provider
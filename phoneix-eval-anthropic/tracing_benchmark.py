@@ -0,0 +1,176 @@
+"""Measure the per-call cost of the Anthropic instrumentation under different tracing configs.
+
+Each config instruments ``AsyncAnthropic`` and runs the extraction workload
+sequentially against the stub messages API, exporting over OTLP/HTTP to an
+in-process stand-in collector. Per-call overhead is the difference from an
+uninstrumented baseline run of the same calls.
+
+    python tracing_benchmark.py --calls 500
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+import anthropic
+
+from extraction import extract_raw_travel_request_attributes_async, system_message, tool_schema, travel_requests
+from stub_server import StubServer
+from tracing import TracingConfig, build_tracer_provider, otlp_exporter
+
+CONFIGS = {
+    "simple": TracingConfig(batch=False),
+    "batch": TracingConfig(),
+    "batch_truncated": TracingConfig(max_attribute_length=256),
+    "batch_head_10pct": TracingConfig(head_sample_ratio=0.1),
+    "batch_tail_10pct": TracingConfig(tail_sample_ratio=0.1),
+}
+
+
+class CollectorStandIn:
+    """In-process OTLP/HTTP trace collector that counts the spans and bytes it receives."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.requests = 0
+        self.spans = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.httpd.daemon_threads = True
+
+    def _handler(self):
+        collector = self
+
+        class CollectorHandler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import ExportTraceServiceRequest
+
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                request = ExportTraceServiceRequest.FromString(body)
+                spans = sum(len(scope.spans) for resource in request.resource_spans for scope in resource.scope_spans)
+                if collector.latency:
+                    time.sleep(collector.latency)
+                with collector._lock:
+                    collector.requests += 1
+                    collector.spans += spans
+                    collector.bytes += len(body)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-protobuf")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+        return CollectorHandler
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1/traces"
+
+    def __enter__(self) -> "CollectorStandIn":
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+async def _time_calls(base_url: str, calls: int, warmup: int) -> List[float]:
+    # A fresh client per run, so the instrumentation (if any) wraps it
+    timings = []
+    async with anthropic.AsyncAnthropic(base_url=base_url, api_key="stub", max_retries=0) as client:
+        for i in range(warmup + calls):
+            start = time.perf_counter()
+            await extract_raw_travel_request_attributes_async(
+                travel_requests[i % len(travel_requests)], tool_schema, system_message, client
+            )
+            if i >= warmup:
+                timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _summarize(timings: List[float]) -> Dict[str, float]:
+    ordered = sorted(timings)
+    return {
+        "mean_us": 1e6 * statistics.fmean(ordered),
+        "p50_us": 1e6 * ordered[len(ordered) // 2],
+        "p99_us": 1e6 * ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))],
+    }
+
+
+def run_benchmark(
+    configs: Optional[Dict[str, TracingConfig]] = None,
+    calls: int = 200,
+    warmup: int = 20,
+    stub_latency: float = 0.0,
+    collector_latency: float = 0.0,
+) -> List[Dict[str, Any]]:
+    """One row per config (plus the ``untraced`` baseline) with latency, overhead and export counts."""
+    from openinference.instrumentation.anthropic import AnthropicInstrumentor
+
+    configs = CONFIGS if configs is None else configs
+    rows = []
+    with StubServer(latency=stub_latency) as server, CollectorStandIn(collector_latency) as collector:
+        baseline = _summarize(asyncio.run(_time_calls(server.url, calls, warmup)))
+        rows.append({"config": "untraced", **baseline, "overhead_us": 0.0, "spans_exported": 0, "bytes_exported": 0})
+
+        for name, config in configs.items():
+            provider = build_tracer_provider(config, otlp_exporter(collector.endpoint))
+            instrumentor = AnthropicInstrumentor()
+            instrumentor.instrument(tracer_provider=provider)
+            spans_before, bytes_before = collector.spans, collector.bytes
+            try:
+                summary = _summarize(asyncio.run(_time_calls(server.url, calls, warmup)))
+            finally:
+                instrumentor.uninstrument()
+                provider.force_flush()
+                provider.shutdown()
+            rows.append({
+                "config": name,
+                **summary,
+                "overhead_us": summary["mean_us"] - baseline["mean_us"],
+                "spans_exported": collector.spans - spans_before,
+                "bytes_exported": collector.bytes - bytes_before,
+            })
+    return rows
+
+
+def format_table(rows: List[Dict[str, Any]]) -> str:
+    lines = [f"{'config':<18} {'mean us':>9} {'p50 us':>9} {'p99 us':>9} {'overhead':>9} {'spans':>7} {'bytes':>9}"]
+    for row in rows:
+        lines.append(
+            f"{row['config']:<18} {row['mean_us']:>9.0f} {row['p50_us']:>9.0f} {row['p99_us']:>9.0f} "
+            f"{row['overhead_us']:>9.0f} {row['spans_exported']:>7} {row['bytes_exported']:>9}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-call overhead of the Anthropic tracing configurations.")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="Seconds per stub API call")
+    parser.add_argument("--collector-latency", type=float, default=0.0, help="Seconds per OTLP export request")
+    parser.add_argument("--configs", nargs="+", choices=list(CONFIGS), default=list(CONFIGS))
+    parser.add_argument("--json", help="Also write the rows to this file")
+    args = parser.parse_args()
+
+    rows = run_benchmark({name: CONFIGS[name] for name in args.configs}, args.calls, args.warmup,
+                         args.stub_latency, args.collector_latency)
+    print(format_table(rows))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()